@@ -1,18 +1,50 @@
+import asyncio
+import csv
+import io
 import logging
+from collections.abc import Iterator
+from typing import Literal, Optional
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from pydantic import BaseModel
 from sqlalchemy import text
 from sqlalchemy.orm import Session
 
-from app.db.session import get_session
+from app.db.queries import decode_cursor, fetch_page, iter_export_rows
+from app.db.repository import get_inventory
+from app.db.session import get_db_session, get_session
+from app.ingestion.batch import run_batch
 from app.ingestion.cache import RedisCache
 from app.ingestion.pipeline import run_pipeline
-from app.models.pydantic_models import HealthStatus, IngestRequest, RunSummary
+from app.ingestion.runs import IngestRunManager, RunQueueFullError
+from app.ingestion.upload import UploadBodyStream, UploadInterruptedError, run_upload_pipeline
+from app.metrics import render_metrics
+from app.models.pydantic_models import (
+    HealthStatus,
+    IngestBatchRequest,
+    IngestBatchSummary,
+    IngestRequest,
+    InventoryOut,
+    OrderOut,
+    OrderPage,
+    ProductOut,
+    ProductPage,
+    RunHandle,
+    RunStatus,
+    RunSummary,
+)
 
 
 router = APIRouter()
 cache_instance: RedisCache | None = None
+run_manager: IngestRunManager | None = None
 logger = logging.getLogger(__name__)
+QUEUE_FULL_RETRY_AFTER_SECONDS = 5
+MAX_PAGE_SIZE = 1000
+EXPORT_FLUSH_ROWS = 1000
+EXPORT_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+ExportFormat = Literal["json", "ndjson", "csv"]
 
 
 def get_cache() -> RedisCache:
@@ -21,6 +53,12 @@ def get_cache() -> RedisCache:
     return cache_instance
 
 
+def get_run_manager() -> IngestRunManager:
+    if run_manager is None:
+        raise HTTPException(status_code=503, detail="Run queue is unavailable")
+    return run_manager
+
+
 @router.post("/ingest", response_model=RunSummary)
 def ingest_feed(payload: IngestRequest, cache: RedisCache = Depends(get_cache)) -> RunSummary:
     try:
@@ -34,6 +72,74 @@ def ingest_feed(payload: IngestRequest, cache: RedisCache = Depends(get_cache))
         raise HTTPException(status_code=500, detail="Ingestion failed")
 
 
+@router.post("/ingest/batch", response_model=IngestBatchSummary)
+def ingest_batch(payload: IngestBatchRequest, cache: RedisCache = Depends(get_cache)) -> IngestBatchSummary:
+    # Per-item failures are reported in the item's summary; only an oversized batch fails the request.
+    try:
+        return run_batch(payload.items, cache)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+
+
+@router.post("/ingest/upload", response_model=RunSummary)
+async def ingest_upload(
+    request: Request,
+    filename: str = Query(..., min_length=1),
+    supplier_id: str = Query(..., min_length=1),
+    record_type: Literal["product", "order"] = Query(...),
+    sha256: Optional[str] = Query(None, pattern="^[0-9a-fA-F]{64}$"),
+    cache: RedisCache = Depends(get_cache),
+) -> RunSummary:
+    # The event loop feeds body chunks to a worker thread, which spools them and then runs the pipeline.
+    body = UploadBodyStream()
+    run = asyncio.create_task(
+        asyncio.to_thread(run_upload_pipeline, body, filename, supplier_id, record_type, cache, sha256)
+    )
+    failed = False
+    try:
+        async for chunk in request.stream():
+            if not await asyncio.to_thread(body.feed, chunk):
+                break
+    except Exception:
+        failed = True
+        raise
+    finally:
+        await asyncio.to_thread(body.finish, failed)
+        if failed:
+            await asyncio.gather(run, return_exceptions=True)
+
+    try:
+        return await run
+    except UploadInterruptedError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    except Exception:
+        logger.exception("ingest.upload_failed")
+        raise HTTPException(status_code=500, detail="Ingestion failed")
+
+
+@router.post("/ingest/submit", response_model=RunHandle, status_code=status.HTTP_202_ACCEPTED)
+def submit_ingest(payload: IngestRequest, manager: IngestRunManager = Depends(get_run_manager)) -> RunHandle:
+    try:
+        run = manager.submit(payload)
+    except RunQueueFullError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=str(exc),
+            headers={"Retry-After": str(QUEUE_FULL_RETRY_AFTER_SECONDS)},
+        ) from exc
+    return RunHandle(run_id=run.run_id, status=run.status)
+
+
+@router.get("/runs/{run_id}", response_model=RunStatus)
+def get_run(run_id: str, manager: IngestRunManager = Depends(get_run_manager)) -> RunStatus:
+    run = manager.get(run_id)
+    if run is None:
+        raise HTTPException(status_code=404, detail="Run not found")
+    return run
+
+
 @router.get("/health", response_model=HealthStatus)
 def health(cache: RedisCache = Depends(get_cache), session: Session = Depends(get_session)) -> HealthStatus:
     db_status = "ok"
@@ -48,4 +154,95 @@ def health(cache: RedisCache = Depends(get_cache), session: Session = Depends(ge
         redis_status = "down"
 
     overall = "ok" if db_status == "ok" and redis_status == "ok" else "degraded"
-    return HealthStatus(status=overall, db=db_status, redis=redis_status)
\ No newline at end of file
+    return HealthStatus(status=overall, db=db_status, redis=redis_status)
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+def metrics() -> PlainTextResponse:
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
+
+def _export_stream(
+    record_type: str,
+    item_model: type[BaseModel],
+    output: str,
+    supplier_id: Optional[str],
+    after: Optional[tuple],
+) -> Iterator[str]:
+    # The session is opened here: a Depends session is closed before a streamed body is sent.
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n") if output == "csv" else None
+    if writer:
+        writer.writerow(item_model.model_fields)
+    pending = 0
+    with get_db_session() as session:
+        for row in iter_export_rows(session, record_type, supplier_id, after):
+            item = item_model.model_validate(row)
+            if writer:
+                writer.writerow(item.model_dump(mode="json").values())
+            else:
+                buffer.write(item.model_dump_json())
+                buffer.write("\n")
+            pending += 1
+            if pending >= EXPORT_FLUSH_ROWS:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+                pending = 0
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def _list_records(
+    record_type: str,
+    page_model: type[BaseModel],
+    item_model: type[BaseModel],
+    session: Session,
+    supplier_id: Optional[str],
+    limit: int,
+    cursor: Optional[str],
+    output: str,
+):
+    try:
+        after = decode_cursor(record_type, cursor) if cursor else None
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+
+    if output in EXPORT_MEDIA_TYPES:
+        return StreamingResponse(
+            _export_stream(record_type, item_model, output, supplier_id, after),
+            media_type=EXPORT_MEDIA_TYPES[output],
+        )
+    items, next_cursor = fetch_page(session, record_type, limit, supplier_id, after)
+    return page_model(items=items, next_cursor=next_cursor)
+
+
+@router.get("/products", response_model=ProductPage)
+def list_products(
+    supplier_id: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    output: ExportFormat = Query("json", alias="format"),
+    session: Session = Depends(get_session),
+):
+    return _list_records("product", ProductPage, ProductOut, session, supplier_id, limit, cursor, output)
+
+
+@router.get("/orders", response_model=OrderPage)
+def list_orders(
+    supplier_id: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    output: ExportFormat = Query("json", alias="format"),
+    session: Session = Depends(get_session),
+):
+    return _list_records("order", OrderPage, OrderOut, session, supplier_id, limit, cursor, output)
+
+
+@router.get("/inventory/{sku}", response_model=InventoryOut)
+def get_inventory_summary(sku: str, session: Session = Depends(get_session)) -> InventoryOut:
+    # Served from the incrementally maintained summary row, not an aggregate over products.
+    summary = get_inventory(session, sku)
+    if summary is None:
+        raise HTTPException(status_code=404, detail="SKU not found")
+    return InventoryOut.model_validate(summary, from_attributes=True)
@@ -0,0 +1,271 @@
+import csv
+import io
+import logging
+import time
+from collections.abc import Iterable
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.db.repository import (
+    CALLER_COMMIT,
+    ORDER_KEY_LOCK_CLASS,
+    PRODUCT_KEY_LOCK_CLASS,
+    filter_changed_rows,
+    upsert_orders,
+    upsert_products,
+)
+
+
+logger = logging.getLogger(__name__)
+
+PRODUCT_COLUMNS = ("sku", "price", "quantity", "supplier_id", "status", "content_hash")
+ORDER_COLUMNS = ("order_id", "sku", "quantity", "supplier_id", "status", "price", "content_hash")
+
+PRODUCT_STAGING_DDL = """
+CREATE TEMP TABLE staging_products (
+    seq BIGSERIAL,
+    sku VARCHAR(40),
+    price NUMERIC(12, 2),
+    quantity INTEGER,
+    supplier_id VARCHAR(64),
+    status VARCHAR(32),
+    content_hash VARCHAR(64)
+) ON COMMIT DROP
+"""
+
+ORDER_STAGING_DDL = """
+CREATE TEMP TABLE staging_orders (
+    seq BIGSERIAL,
+    order_id VARCHAR(80),
+    sku VARCHAR(40),
+    quantity INTEGER,
+    supplier_id VARCHAR(64),
+    status VARCHAR(32),
+    price NUMERIC(12, 2),
+    content_hash VARCHAR(64)
+) ON COMMIT DROP
+"""
+
+# DISTINCT ON keeps the last staged row per key so ON CONFLICT never touches a row twice.
+PRODUCT_MERGE_SQL = """
+INSERT INTO products (id, sku, price, quantity, supplier_id, status, content_hash, updated_at)
+SELECT gen_random_uuid()::text, sku, price, quantity, supplier_id, status, content_hash, timezone('utc', now())
+FROM (
+    SELECT DISTINCT ON (sku, supplier_id) *
+    FROM staging_products
+    ORDER BY sku, supplier_id, seq DESC
+) AS staged
+ON CONFLICT ON CONSTRAINT uq_products_sku_supplier DO UPDATE SET
+    price = EXCLUDED.price,
+    quantity = EXCLUDED.quantity,
+    status = EXCLUDED.status,
+    content_hash = EXCLUDED.content_hash,
+    updated_at = EXCLUDED.updated_at
+"""
+
+# Runs before PRODUCT_MERGE_SQL so the LEFT JOIN still sees the pre-merge quantities and statuses.
+# Same keys, hash order and lock class as the upsert path (see product_lock_key), so both serialise together.
+PRODUCT_KEY_LOCK_SQL = f"""
+SELECT pg_advisory_xact_lock({PRODUCT_KEY_LOCK_CLASS}, key_hash)
+FROM (
+    SELECT DISTINCT hashtext(sku || chr(31) || supplier_id) AS key_hash
+    FROM staging_products
+    ORDER BY 1
+) AS ordered
+"""
+
+INVENTORY_DELTA_SQL = """
+WITH staged AS (
+    SELECT DISTINCT ON (sku, supplier_id) sku, supplier_id, quantity, status
+    FROM staging_products
+    ORDER BY sku, supplier_id, seq DESC
+),
+deltas AS (
+    SELECT
+        s.sku,
+        SUM(s.quantity - COALESCE(p.quantity, 0)) AS total_quantity,
+        SUM(
+            CASE WHEN s.status = 'active' THEN s.quantity ELSE 0 END
+            - CASE WHEN p.status = 'active' THEN p.quantity ELSE 0 END
+        ) AS available_quantity,
+        COUNT(*) FILTER (WHERE p.id IS NULL) AS supplier_count
+    FROM staged AS s
+    LEFT JOIN products AS p ON p.sku = s.sku AND p.supplier_id = s.supplier_id
+    GROUP BY s.sku
+)
+INSERT INTO inventory_summary (sku, total_quantity, available_quantity, supplier_count, updated_at)
+SELECT sku, total_quantity, available_quantity, supplier_count, timezone('utc', now())
+FROM deltas
+WHERE total_quantity <> 0 OR available_quantity <> 0 OR supplier_count <> 0
+ON CONFLICT (sku) DO UPDATE SET
+    total_quantity = inventory_summary.total_quantity + EXCLUDED.total_quantity,
+    available_quantity = inventory_summary.available_quantity + EXCLUDED.available_quantity,
+    supplier_count = inventory_summary.supplier_count + EXCLUDED.supplier_count,
+    updated_at = EXCLUDED.updated_at
+"""
+
+ORDER_MERGE_SQL = """
+INSERT INTO orders (id, order_id, sku, quantity, supplier_id, status, price, content_hash, created_at)
+SELECT
+    gen_random_uuid()::text, order_id, sku, quantity, supplier_id, status, price, content_hash,
+    timezone('utc', now())
+FROM (
+    SELECT DISTINCT ON (order_id) *
+    FROM staging_orders
+    ORDER BY order_id, seq DESC
+) AS staged
+ON CONFLICT (order_id) DO UPDATE SET
+    sku = EXCLUDED.sku,
+    quantity = EXCLUDED.quantity,
+    supplier_id = EXCLUDED.supplier_id,
+    status = EXCLUDED.status,
+    price = EXCLUDED.price,
+    content_hash = EXCLUDED.content_hash
+"""
+
+# Same lock class as the partitioned upsert path, so both serialise writers of an order_id.
+ORDER_KEY_LOCK_SQL = f"""
+SELECT pg_advisory_xact_lock({ORDER_KEY_LOCK_CLASS}, key_hash)
+FROM (
+    SELECT DISTINCT hashtext(order_id) AS key_hash
+    FROM staging_orders
+    ORDER BY 1
+) AS ordered
+"""
+
+# Partitioned orders have no global unique order_id to conflict on: update in place, insert the rest.
+PARTITIONED_ORDER_MERGE_SQL = """
+WITH staged AS (
+    SELECT DISTINCT ON (order_id) *
+    FROM staging_orders
+    ORDER BY order_id, seq DESC
+),
+updated AS (
+    UPDATE orders AS o SET
+        sku = s.sku,
+        quantity = s.quantity,
+        supplier_id = s.supplier_id,
+        status = s.status,
+        price = s.price,
+        content_hash = s.content_hash
+    FROM staged AS s
+    WHERE o.order_id = s.order_id
+    RETURNING o.order_id
+),
+inserted AS (
+    INSERT INTO orders (id, order_id, sku, quantity, supplier_id, status, price, content_hash, created_at)
+    SELECT
+        gen_random_uuid()::text, order_id, sku, quantity, supplier_id, status, price, content_hash,
+        timezone('utc', now())
+    FROM staged
+    WHERE order_id NOT IN (SELECT order_id FROM updated)
+    RETURNING 1
+)
+SELECT (SELECT count(*) FROM updated) + (SELECT count(*) FROM inserted)
+"""
+
+
+# File-like reader that renders rows as COPY-compatible CSV as psycopg2 pulls from it.
+class CsvRowStream:
+    def __init__(self, rows: Iterable[dict], columns: tuple[str, ...]):
+        self._rows = iter(rows)
+        self._columns = columns
+        self._buffer = io.StringIO()
+        self._writer = csv.writer(self._buffer, lineterminator="\n")
+        self._pending = ""
+        self.row_count = 0
+
+    def _fill(self, size: int) -> None:
+        while size < 0 or len(self._pending) < size:
+            row = next(self._rows, None)
+            if row is None:
+                return
+            # None renders as an unquoted empty field, which COPY reads as NULL.
+            self._writer.writerow([row.get(column) for column in self._columns])
+            self.row_count += 1
+            self._pending += self._buffer.getvalue()
+            self._buffer.seek(0)
+            self._buffer.truncate()
+
+    def read(self, size: int = -1) -> str:
+        self._fill(size)
+        if size < 0:
+            chunk, self._pending = self._pending, ""
+        else:
+            chunk, self._pending = self._pending[:size], self._pending[size:]
+        return chunk
+
+
+def _copy_merge(
+    session: Session,
+    items: Iterable[dict],
+    staging_table: str,
+    staging_ddl: str,
+    columns: tuple[str, ...],
+    merge_sql: tuple[str, ...],
+    commit_mode: str | None = None,
+) -> int:
+    started = time.perf_counter()
+    session.execute(text(staging_ddl))
+
+    stream = CsvRowStream(items, columns)
+    cursor = session.connection().connection.cursor()
+    try:
+        cursor.copy_expert(
+            f"COPY {staging_table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)",
+            stream,
+        )
+    finally:
+        cursor.close()
+
+    written = 0
+    if stream.row_count:
+        for statement in merge_sql:
+            result = session.execute(text(statement))
+        # The last statement is the merge; staged rows collapse to one per key, so count what it wrote.
+        written = result.scalar_one() if result.returns_rows else result.rowcount
+    if commit_mode == CALLER_COMMIT:
+        # ON COMMIT DROP only fires at the caller's commit; drop now so the next chunk can recreate it.
+        session.execute(text(f"DROP TABLE {staging_table}"))
+    else:
+        session.commit()
+
+    elapsed = time.perf_counter() - started
+    logger.info(
+        "repository.copy_merged",
+        extra={
+            "table": staging_table,
+            "rows": stream.row_count,
+            "written": written,
+            "elapsed_ms": int(elapsed * 1000),
+            "rows_per_sec": round(stream.row_count / elapsed, 1) if elapsed > 0 else None,
+        },
+    )
+    return written
+
+
+def _is_postgres(session: Session) -> bool:
+    return bool(session.bind and session.bind.dialect.name == "postgresql")
+
+
+def copy_upsert_products(session: Session, items: Iterable[dict], commit_mode: str | None = None) -> int:
+    if not _is_postgres(session):
+        return upsert_products(session, items, commit_mode=commit_mode)
+    rows, _ = filter_changed_rows(session, "product", list(items))
+    merge_sql = (PRODUCT_KEY_LOCK_SQL, INVENTORY_DELTA_SQL, PRODUCT_MERGE_SQL)
+    return _copy_merge(
+        session, rows, "staging_products", PRODUCT_STAGING_DDL, PRODUCT_COLUMNS, merge_sql, commit_mode
+    )
+
+
+def copy_upsert_orders(session: Session, items: Iterable[dict], commit_mode: str | None = None) -> int:
+    if not _is_postgres(session):
+        return upsert_orders(session, items, commit_mode=commit_mode)
+    rows, _ = filter_changed_rows(session, "order", list(items))
+    if settings.orders_partitioned:
+        merge_sql = (ORDER_KEY_LOCK_SQL, PARTITIONED_ORDER_MERGE_SQL)
+    else:
+        merge_sql = (ORDER_MERGE_SQL,)
+    return _copy_merge(session, rows, "staging_orders", ORDER_STAGING_DDL, ORDER_COLUMNS, merge_sql, commit_mode)
@@ -1,7 +1,7 @@
 ﻿import uuid
 from datetime import datetime
 
-from sqlalchemy import DateTime, Integer, Numeric, String, UniqueConstraint
+from sqlalchemy import DateTime, Index, Integer, Numeric, String, UniqueConstraint
 from sqlalchemy.orm import Mapped, mapped_column
 
 from app.db.base import Base
@@ -9,7 +9,10 @@ from app.db.base import Base
 
 class Product(Base):
     __tablename__ = "products"
-    __table_args__ = (UniqueConstraint("sku", "supplier_id", name="uq_products_sku_supplier"),)
+    __table_args__ = (
+        UniqueConstraint("sku", "supplier_id", name="uq_products_sku_supplier"),
+        Index("ix_products_supplier_sku", "supplier_id", "sku"),
+    )
 
     id: Mapped[str] = mapped_column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     sku: Mapped[str] = mapped_column(String(40), index=True, nullable=False)
@@ -17,11 +20,13 @@ class Product(Base):
     quantity: Mapped[int] = mapped_column(Integer, nullable=False)
     supplier_id: Mapped[str] = mapped_column(String(64), index=True, nullable=False)
     status: Mapped[str] = mapped_column(String(32), nullable=False)
+    content_hash: Mapped[str | None] = mapped_column(String(64), nullable=True)
     updated_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
 
 
 class Order(Base):
     __tablename__ = "orders"
+    __table_args__ = (Index("ix_orders_created_order", "created_at", "order_id"),)
 
     id: Mapped[str] = mapped_column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     order_id: Mapped[str] = mapped_column(String(80), unique=True, index=True, nullable=False)
@@ -30,4 +35,15 @@ class Order(Base):
     supplier_id: Mapped[str] = mapped_column(String(64), index=True, nullable=False)
     status: Mapped[str] = mapped_column(String(32), nullable=False)
     price: Mapped[float | None] = mapped_column(Numeric(12, 2), nullable=True)
+    content_hash: Mapped[str | None] = mapped_column(String(64), nullable=True)
     created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, default=datetime.utcnow)
+
+
+class InventorySummary(Base):
+    __tablename__ = "inventory_summary"
+
+    sku: Mapped[str] = mapped_column(String(40), primary_key=True)
+    total_quantity: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    available_quantity: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    supplier_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -0,0 +1,135 @@
+import logging
+import re
+from datetime import datetime
+
+from sqlalchemy import Connection, Engine, text
+
+
+logger = logging.getLogger(__name__)
+RETENTION_ACTIONS = {"detach", "drop"}
+PARTITION_NAME_PATTERN = re.compile(r"^orders_p(\d{4})(\d{2})$")
+
+# Unique constraints on a partitioned table must include the partition key, so order_id is only
+# unique per created_at here; the upsert paths look up the stored created_at to keep keys aligned.
+PARTITIONED_ORDERS_DDL = """
+CREATE TABLE IF NOT EXISTS orders (
+    id VARCHAR(36) NOT NULL,
+    order_id VARCHAR(80) NOT NULL,
+    sku VARCHAR(40) NOT NULL,
+    quantity INTEGER NOT NULL,
+    supplier_id VARCHAR(64) NOT NULL,
+    status VARCHAR(32) NOT NULL,
+    price NUMERIC(12, 2),
+    content_hash VARCHAR(64),
+    created_at TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+    PRIMARY KEY (id, created_at),
+    CONSTRAINT uq_orders_order_created UNIQUE (order_id, created_at)
+) PARTITION BY RANGE (created_at)
+"""
+
+PARTITIONED_ORDERS_INDEXES = (
+    "CREATE INDEX IF NOT EXISTS ix_orders_sku ON orders (sku)",
+    "CREATE INDEX IF NOT EXISTS ix_orders_supplier_id ON orders (supplier_id)",
+    "CREATE INDEX IF NOT EXISTS ix_orders_created_order ON orders (created_at, order_id)",
+)
+
+ORDERS_RELKIND_SQL = "SELECT relkind FROM pg_class WHERE relname = 'orders' AND relkind IN ('r', 'p')"
+
+LIST_PARTITIONS_SQL = """
+SELECT child.relname
+FROM pg_inherits
+JOIN pg_class AS parent ON parent.oid = pg_inherits.inhparent
+JOIN pg_class AS child ON child.oid = pg_inherits.inhrelid
+WHERE parent.relname = 'orders'
+"""
+
+
+def month_start(value: datetime) -> datetime:
+    return datetime(value.year, value.month, 1)
+
+
+def add_months(value: datetime, months: int) -> datetime:
+    index = value.year * 12 + value.month - 1 + months
+    return datetime(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: datetime) -> str:
+    return f"orders_p{month:%Y%m}"
+
+
+def create_partitioned_orders(connection: Connection) -> bool:
+    relkind = connection.execute(text(ORDERS_RELKIND_SQL)).scalar()
+    if relkind == "r":
+        # Converting a populated table is a manual migration; leave it untouched.
+        logger.warning("partitions.orders_not_partitioned")
+        return False
+    connection.execute(text(PARTITIONED_ORDERS_DDL))
+    for statement in PARTITIONED_ORDERS_INDEXES:
+        connection.execute(text(statement))
+    return True
+
+
+def ensure_order_partitions(connection: Connection, months_ahead: int, now: datetime | None = None) -> list[str]:
+    current = month_start(now or datetime.utcnow())
+    created: list[str] = []
+    for offset in range(max(0, months_ahead) + 1):
+        start = add_months(current, offset)
+        name = partition_name(start)
+        connection.execute(
+            text(
+                f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF orders "
+                f"FOR VALUES FROM ('{start:%Y-%m-%d}') TO ('{add_months(start, 1):%Y-%m-%d}')"
+            )
+        )
+        created.append(name)
+    # Catches rows outside the premade months so inserts never fail if maintenance falls behind.
+    connection.execute(text("CREATE TABLE IF NOT EXISTS orders_default PARTITION OF orders DEFAULT"))
+    return created
+
+
+def expired_partitions(names: list[str], cutoff: datetime) -> list[str]:
+    expired: list[str] = []
+    for name in names:
+        match = PARTITION_NAME_PATTERN.match(name)
+        if match and add_months(datetime(int(match[1]), int(match[2]), 1), 1) <= cutoff:
+            expired.append(name)
+    return sorted(expired)
+
+
+def apply_order_retention(
+    connection: Connection,
+    retention_months: int,
+    action: str,
+    now: datetime | None = None,
+) -> list[str]:
+    if action not in RETENTION_ACTIONS:
+        raise ValueError("orders_retention_action must be 'detach' or 'drop'")
+    if retention_months <= 0:
+        return []
+    cutoff = add_months(month_start(now or datetime.utcnow()), -retention_months)
+    names = list(connection.execute(text(LIST_PARTITIONS_SQL)).scalars())
+    retired = expired_partitions(names, cutoff)
+    for name in retired:
+        # Detaching is a catalog update, not a row-by-row DELETE.
+        connection.execute(text(f"ALTER TABLE orders DETACH PARTITION {name}"))
+        if action == "drop":
+            connection.execute(text(f"DROP TABLE {name}"))
+    return retired
+
+
+def prepare_partitioned_orders(engine: Engine, months_ahead: int) -> bool:
+    with engine.begin() as connection:
+        if not create_partitioned_orders(connection):
+            return False
+        ensure_order_partitions(connection, months_ahead)
+    return True
+
+
+def maintain_order_partitions(engine: Engine, months_ahead: int, retention_months: int, action: str) -> None:
+    with engine.begin() as connection:
+        created = ensure_order_partitions(connection, months_ahead)
+        retired = apply_order_retention(connection, retention_months, action)
+    logger.info(
+        "partitions.maintained",
+        extra={"ensured": created, "retired": retired, "action": action},
+    )
@@ -0,0 +1,99 @@
+import base64
+import binascii
+import json
+from collections.abc import Iterator
+from datetime import datetime
+
+from sqlalchemy import Select, select, tuple_
+from sqlalchemy.orm import Session
+
+from app.db.models import Order, Product
+
+
+EXPORT_FETCH_SIZE = 2_000
+PRODUCT_EXPORT_COLUMNS = (
+    Product.sku,
+    Product.price,
+    Product.quantity,
+    Product.supplier_id,
+    Product.status,
+    Product.updated_at,
+)
+ORDER_EXPORT_COLUMNS = (
+    Order.order_id,
+    Order.sku,
+    Order.quantity,
+    Order.supplier_id,
+    Order.status,
+    Order.price,
+    Order.created_at,
+)
+# Keyset order per record type; each matches a composite index declared on the model.
+PRODUCT_KEYSET = (Product.supplier_id, Product.sku)
+ORDER_KEYSET = (Order.created_at, Order.order_id)
+
+
+def _spec(record_type: str):
+    if record_type == "product":
+        return PRODUCT_EXPORT_COLUMNS, PRODUCT_KEYSET, Product.supplier_id
+    if record_type == "order":
+        return ORDER_EXPORT_COLUMNS, ORDER_KEYSET, Order.supplier_id
+    raise ValueError("record_type must be 'product' or 'order'")
+
+
+def encode_cursor(record_type: str, row: dict) -> str:
+    _, keyset, _ = _spec(record_type)
+    values = [row[column.key] for column in keyset]
+    values = [value.isoformat() if isinstance(value, datetime) else value for value in values]
+    return base64.urlsafe_b64encode(json.dumps(values).encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(record_type: str, token: str) -> tuple:
+    _, keyset, _ = _spec(record_type)
+    try:
+        values = json.loads(base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)))
+        if not isinstance(values, list) or len(values) != len(keyset) or not all(isinstance(v, str) for v in values):
+            raise ValueError
+        if record_type == "order":
+            values[0] = datetime.fromisoformat(values[0])
+    except (ValueError, binascii.Error) as exc:
+        raise ValueError("Invalid cursor") from exc
+    return tuple(values)
+
+
+def keyset_select(record_type: str, supplier_id: str | None = None, after: tuple | None = None) -> Select:
+    columns, keyset, supplier_column = _spec(record_type)
+    stmt = select(*columns).order_by(*keyset)
+    if supplier_id is not None:
+        stmt = stmt.where(supplier_column == supplier_id)
+    if after is not None:
+        # Row-value comparison seeks straight to the cursor instead of counting past an OFFSET.
+        stmt = stmt.where(tuple_(*keyset) > tuple_(*after))
+    return stmt
+
+
+def fetch_page(
+    session: Session,
+    record_type: str,
+    limit: int,
+    supplier_id: str | None = None,
+    after: tuple | None = None,
+) -> tuple[list[dict], str | None]:
+    stmt = keyset_select(record_type, supplier_id, after).limit(limit + 1)
+    rows = [dict(row) for row in session.execute(stmt).mappings()]
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(record_type, rows[-1])
+
+
+def iter_export_rows(
+    session: Session,
+    record_type: str,
+    supplier_id: str | None = None,
+    after: tuple | None = None,
+) -> Iterator[dict]:
+    # yield_per streams through a server-side cursor on PostgreSQL, so memory stays bounded by the fetch size.
+    stmt = keyset_select(record_type, supplier_id, after).execution_options(yield_per=EXPORT_FETCH_SIZE)
+    for row in session.execute(stmt).mappings():
+        yield dict(row)
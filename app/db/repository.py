@@ -1,84 +1,463 @@
-﻿from collections.abc import Iterable
+﻿import hashlib
+import logging
+import time
+from collections.abc import Callable, Iterable, Iterator
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+from itertools import islice
 
-from sqlalchemy import select
-from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy import Table, bindparam, case, delete, func, insert, literal, select, text, tuple_, update
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.orm import Session
 
-from app.db.models import Order, Product
+from app.config import settings
+from app.db.models import InventorySummary, Order, Product
 
 
-def upsert_products(session: Session, items: Iterable[dict]) -> int:
-    rows = list(items)
-    if not rows:
-        return 0
+logger = logging.getLogger(__name__)
+POSTGRES_MAX_BIND_PARAMS = 65535
+COMMIT_MODES = {"batch", "run"}
+# Not a DB_COMMIT_MODE value: callers that pass it own the transaction and commit or roll back themselves.
+CALLER_COMMIT = "caller"
+DIGEST_LOOKUP_BATCH = 5000
+PRODUCT_KEY = ("sku", "supplier_id")
+PRODUCT_UPDATE_COLUMNS = ("price", "quantity", "status", "content_hash")
+PRODUCT_DIGEST_COLUMNS = ("sku", "supplier_id", "price", "quantity", "status")
+ORDER_KEY = ("order_id",)
+# Conflict target when orders is range-partitioned by created_at (see app/db/partitions.py).
+PARTITIONED_ORDER_KEY = ("order_id", "created_at")
+ORDER_UPDATE_COLUMNS = ("sku", "quantity", "supplier_id", "status", "price", "content_hash")
+ORDER_DIGEST_COLUMNS = ("order_id", "sku", "quantity", "supplier_id", "status", "price")
+# pg_advisory_xact_lock classes: one per (sku, supplier_id) product key, one for the summary backfill and
+# one per order_id on partitioned orders.
+PRODUCT_KEY_LOCK_CLASS = 7101
+INVENTORY_BACKFILL_LOCK_CLASS = 7102
+ORDER_KEY_LOCK_CLASS = 7103
+# Each batch takes its locks in hash order, so writers that commit per batch cannot deadlock. With
+# DB_COMMIT_MODE=run one transaction spans batches, and two such runs can still lock shared keys in
+# opposite orders; PostgreSQL then aborts one of them with a deadlock error.
+KEY_LOCK_SQL = text(
+    "SELECT pg_advisory_xact_lock(:lock_class, key_hash) FROM ("
+    "SELECT DISTINCT hashtext(key) AS key_hash FROM unnest(CAST(:keys AS text[])) AS key ORDER BY 1"
+    ") AS ordered"
+)
+DIGEST_MONEY_COLUMNS = {"price"}
+MONEY_QUANTUM = Decimal("0.01")
+INVENTORY_AVAILABLE_STATUS = "active"
+INVENTORY_DELTA_COLUMNS = ("total_quantity", "available_quantity", "supplier_count")
 
-    if session.bind and session.bind.dialect.name == "postgresql":
-        stmt = insert(Product).values(rows)
-        stmt = stmt.on_conflict_do_update(
-            constraint="uq_products_sku_supplier",
-            set_={
-                "price": stmt.excluded.price,
-                "quantity": stmt.excluded.quantity,
-                "status": stmt.excluded.status,
-                "updated_at": stmt.excluded.updated_at,
+
+def _dialect_name(session: Session) -> str | None:
+    return session.bind.dialect.name if session.bind else None
+
+
+def _batch_size_for(table: Table, batch_size: int | None) -> int:
+    max_rows = POSTGRES_MAX_BIND_PARAMS // len(table.columns)
+    requested = settings.db_batch_size if batch_size is None else batch_size
+    if requested <= 0:
+        return max_rows
+    return min(requested, max_rows)
+
+
+def _resolve_commit_mode(commit_mode: str | None) -> str:
+    if commit_mode == CALLER_COMMIT:
+        return commit_mode
+    mode = commit_mode or settings.db_commit_mode
+    if mode not in COMMIT_MODES:
+        raise ValueError("commit_mode must be 'batch' or 'run'")
+    return mode
+
+
+def _iter_batches(items: Iterable, size: int) -> Iterator[list]:
+    iterator = iter(items)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def _latest_per_key(rows: list[dict], key_columns: tuple[str, ...]) -> list[dict]:
+    # Later rows in the feed win, so an earlier duplicate must not decide what gets written.
+    latest: dict[tuple, dict] = {}
+    for row in rows:
+        latest[tuple(row[column] for column in key_columns)] = row
+    return list(latest.values())
+
+
+def _execute_in_batches(
+    session: Session,
+    stmt,
+    table: Table,
+    key_columns: tuple[str, ...],
+    items: Iterable[dict],
+    batch_size: int | None,
+    commit_mode: str | None,
+    prepare: Callable[[Session, list[dict]], list[dict]] | None = None,
+) -> int:
+    size = _batch_size_for(table, batch_size)
+    mode = _resolve_commit_mode(commit_mode)
+    written = 0
+    for batch_number, batch in enumerate(_iter_batches(items, size), start=1):
+        started = time.perf_counter()
+        # psycopg2 sends the batch as one multi-row INSERT ... VALUES ... ON CONFLICT, which fails if a key
+        # repeats within the statement.
+        batch = _latest_per_key(batch, key_columns)
+        if prepare is not None:
+            batch = prepare(session, batch)
+        if not batch:
+            continue
+        session.execute(stmt, batch)
+        if mode == "batch":
+            session.commit()
+        elapsed = time.perf_counter() - started
+        written += len(batch)
+        logger.info(
+            "repository.batch_upserted",
+            extra={
+                "table": table.name,
+                "batch": batch_number,
+                "rows": len(batch),
+                "elapsed_ms": int(elapsed * 1000),
+                "rows_per_sec": round(len(batch) / elapsed, 1) if elapsed > 0 else None,
             },
         )
-        session.execute(stmt)
+    if mode == "run" and written:
         session.commit()
-        return len(rows)
+    return written
 
-    # Fallback for non-Postgres test environments.
-    inserted = 0
-    for row in rows:
-        existing = session.execute(
-            select(Product).where(
-                Product.sku == row["sku"],
-                Product.supplier_id == row["supplier_id"],
+
+def _product_upsert_stmt(dialect_insert: Callable = postgresql.insert):
+    stmt = dialect_insert(Product)
+    return stmt.on_conflict_do_update(
+        index_elements=list(PRODUCT_KEY),
+        set_={
+            "price": stmt.excluded.price,
+            "quantity": stmt.excluded.quantity,
+            "status": stmt.excluded.status,
+            "content_hash": stmt.excluded.content_hash,
+            "updated_at": stmt.excluded.updated_at,
+        },
+    )
+
+
+def _order_upsert_stmt(dialect_insert: Callable = postgresql.insert, key: tuple[str, ...] = ORDER_KEY):
+    stmt = dialect_insert(Order)
+    return stmt.on_conflict_do_update(
+        index_elements=list(key),
+        set_={
+            "sku": stmt.excluded.sku,
+            "quantity": stmt.excluded.quantity,
+            "supplier_id": stmt.excluded.supplier_id,
+            "status": stmt.excluded.status,
+            "price": stmt.excluded.price,
+            "content_hash": stmt.excluded.content_hash,
+        },
+    )
+
+
+def _assign_order_created_at(session: Session, rows: list[dict]) -> list[dict]:
+    # ON CONFLICT only sees the partition named by created_at, so existing orders keep their stored value
+    # and new ones land in the current month.
+    latest = {row["order_id"]: row for row in rows}
+    stored = dict(
+        session.execute(select(Order.order_id, Order.created_at).where(Order.order_id.in_(list(latest)))).all()
+    )
+    now = datetime.utcnow()
+    return [{**row, "created_at": stored.get(order_id, now)} for order_id, row in latest.items()]
+
+
+def _digest_value(column: str, value) -> str:
+    if value is None:
+        return ""
+    if column in DIGEST_MONEY_COLUMNS:
+        # Numeric(12, 2) stores 10.5 as 10.50; hash the stored form so a re-sent "10.5" is not a change.
+        try:
+            return str(Decimal(str(value)).quantize(MONEY_QUANTUM))
+        except InvalidOperation:
+            return str(value)
+    return str(value)
+
+
+def row_digest(row: dict, columns: tuple[str, ...]) -> str:
+    payload = "\x1f".join(_digest_value(column, row.get(column)) for column in columns)
+    return hashlib.blake2b(payload.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def filter_changed_rows(session: Session, record_type: str, rows: list[dict]) -> tuple[list[dict], int]:
+    if record_type == "product":
+        model, key_columns, digest_columns = Product, PRODUCT_KEY, PRODUCT_DIGEST_COLUMNS
+    else:
+        model, key_columns, digest_columns = Order, ORDER_KEY, ORDER_DIGEST_COLUMNS
+
+    keyed: list[tuple[tuple, dict]] = []
+    for row in _latest_per_key(rows, key_columns):
+        row["content_hash"] = row_digest(row, digest_columns)
+        keyed.append((tuple(row[column] for column in key_columns), row))
+
+    key_attrs = [getattr(model, column) for column in key_columns]
+    key_filter = tuple_(*key_attrs) if len(key_attrs) > 1 else key_attrs[0]
+    stored: dict[tuple, str | None] = {}
+    for lookup in _iter_batches([key for key, _ in keyed], DIGEST_LOOKUP_BATCH):
+        values = lookup if len(key_attrs) > 1 else [key[0] for key in lookup]
+        for found in session.execute(select(*key_attrs, model.content_hash).where(key_filter.in_(values))):
+            stored[tuple(found[:-1])] = found[-1]
+
+    changed = [row for key, row in keyed if stored.get(key) != row["content_hash"]]
+    return changed, len(rows) - len(changed)
+
+
+def _prefetch_upsert(
+    session: Session,
+    model,
+    key_columns: tuple[str, ...],
+    update_columns: tuple[str, ...],
+    items: Iterable[dict],
+    batch_size: int | None,
+    commit_mode: str | None,
+    prepare: Callable[[Session, list[dict]], list[dict]] | None = None,
+) -> int:
+    # Dialects without a native upsert: one key lookup per batch, then bulk INSERT/UPDATE.
+    size = _batch_size_for(model.__table__, batch_size)
+    mode = _resolve_commit_mode(commit_mode)
+    key_attrs = [getattr(model, column) for column in key_columns]
+    key_filter = tuple_(*key_attrs) if len(key_attrs) > 1 else key_attrs[0]
+    touches_updated_at = "updated_at" in model.__table__.columns
+
+    written = 0
+    for batch in _iter_batches(items, size):
+        if prepare is not None:
+            batch = prepare(session, batch)
+        if not batch:
+            continue
+        latest: dict[tuple, dict] = {}
+        for row in batch:
+            latest[tuple(row[column] for column in key_columns)] = row
+
+        lookup = list(latest) if len(key_attrs) > 1 else [key[0] for key in latest]
+        existing_ids = {
+            tuple(found[1:]): found[0]
+            for found in session.execute(select(model.id, *key_attrs).where(key_filter.in_(lookup)))
+        }
+
+        inserts = [row for key, row in latest.items() if key not in existing_ids]
+        updates = []
+        for key, row in latest.items():
+            if key not in existing_ids:
+                continue
+            values = {"id": existing_ids[key], **{column: row.get(column) for column in update_columns}}
+            if touches_updated_at:
+                values["updated_at"] = datetime.utcnow()
+            updates.append(values)
+
+        if inserts:
+            session.execute(insert(model), inserts)
+        if updates:
+            session.execute(update(model), updates)
+        if mode == "batch":
+            session.commit()
+        written += len(batch)
+
+    if mode == "run" and written:
+        session.commit()
+    return written
+
+
+def _inventory_contribution(quantity: int, status: str) -> tuple[int, int, int]:
+    return quantity, quantity if status == INVENTORY_AVAILABLE_STATUS else 0, 1
+
+
+def _inventory_upsert_stmt(dialect_insert: Callable):
+    stmt = dialect_insert(InventorySummary)
+    return stmt.on_conflict_do_update(
+        index_elements=["sku"],
+        set_={
+            **{column: getattr(InventorySummary, column) + stmt.excluded[column] for column in INVENTORY_DELTA_COLUMNS},
+            "updated_at": stmt.excluded.updated_at,
+        },
+    )
+
+
+def _write_inventory_deltas(session: Session, deltas: list[dict]) -> None:
+    dialect = _dialect_name(session)
+    if dialect == "postgresql":
+        session.execute(_inventory_upsert_stmt(postgresql.insert), deltas)
+        return
+    if dialect == "sqlite":
+        session.execute(_inventory_upsert_stmt(sqlite.insert), deltas)
+        return
+
+    existing = set(
+        session.execute(
+            select(InventorySummary.sku).where(InventorySummary.sku.in_([delta["sku"] for delta in deltas]))
+        ).scalars()
+    )
+    inserts = [delta for delta in deltas if delta["sku"] not in existing]
+    updates = [{f"delta_{key}": value for key, value in delta.items()} for delta in deltas if delta["sku"] in existing]
+    if inserts:
+        session.execute(insert(InventorySummary), inserts)
+    if updates:
+        table = InventorySummary.__table__
+        stmt = (
+            table.update()
+            .where(table.c.sku == bindparam("delta_sku"))
+            .values(
+                **{column: table.c[column] + bindparam(f"delta_{column}") for column in INVENTORY_DELTA_COLUMNS},
+                updated_at=bindparam("delta_updated_at"),
             )
-        ).scalar_one_or_none()
-        if existing:
-            existing.price = row["price"]
-            existing.quantity = row["quantity"]
-            existing.status = row["status"]
-        else:
-            session.add(Product(**row))
-        inserted += 1
-    session.commit()
-    return inserted
-
-
-def upsert_orders(session: Session, items: Iterable[dict]) -> int:
-    rows = list(items)
-    if not rows:
-        return 0
-
-    if session.bind and session.bind.dialect.name == "postgresql":
-        stmt = insert(Order).values(rows)
-        stmt = stmt.on_conflict_do_update(
-            index_elements=["order_id"],
-            set_={
-                "sku": stmt.excluded.sku,
-                "quantity": stmt.excluded.quantity,
-                "supplier_id": stmt.excluded.supplier_id,
-                "status": stmt.excluded.status,
-                "price": stmt.excluded.price,
-            },
         )
-        session.execute(stmt)
-        session.commit()
-        return len(rows)
+        session.connection().execute(stmt, updates)
 
-    inserted = 0
-    for row in rows:
-        existing = session.execute(select(Order).where(Order.order_id == row["order_id"])).scalar_one_or_none()
-        if existing:
-            existing.sku = row["sku"]
-            existing.quantity = row["quantity"]
-            existing.supplier_id = row["supplier_id"]
-            existing.status = row["status"]
-            existing.price = row.get("price")
-        else:
-            session.add(Order(**row))
-        inserted += 1
+
+def product_lock_key(sku: str, supplier_id: str) -> str:
+    return f"{sku}\x1f{supplier_id}"
+
+
+def _lock_keys(session: Session, lock_class: int, keys: list[str]) -> None:
+    if _dialect_name(session) != "postgresql":
+        return
+    session.execute(KEY_LOCK_SQL, {"lock_class": lock_class, "keys": keys})
+
+
+def _lock_product_keys(session: Session, keys: list[tuple[str, str]]) -> None:
+    # Held until commit, so a concurrent writer of the same product reads the stored row only after this
+    # batch's write lands. FOR UPDATE would miss products that neither transaction has inserted yet.
+    _lock_keys(session, PRODUCT_KEY_LOCK_CLASS, [product_lock_key(sku, supplier_id) for sku, supplier_id in keys])
+
+
+def _apply_inventory_deltas(session: Session, rows: list[dict]) -> list[dict]:
+    # Runs before the product batch is written, in the same transaction, so the summary moves with it.
+    latest = {(row["sku"], row["supplier_id"]): row for row in rows}
+    _lock_product_keys(session, list(latest))
+    stored = {
+        (sku, supplier_id): (quantity, status)
+        for sku, supplier_id, quantity, status in session.execute(
+            select(Product.sku, Product.supplier_id, Product.quantity, Product.status).where(
+                tuple_(Product.sku, Product.supplier_id).in_(list(latest))
+            )
+        )
+    }
+
+    totals: dict[str, list[int]] = {}
+    for key, row in latest.items():
+        new = _inventory_contribution(row["quantity"], row["status"])
+        old = _inventory_contribution(*stored[key]) if key in stored else (0, 0, 0)
+        delta = totals.setdefault(key[0], [0, 0, 0])
+        for position in range(3):
+            delta[position] += new[position] - old[position]
+
+    now = datetime.utcnow()
+    deltas = [
+        {"sku": sku, **dict(zip(INVENTORY_DELTA_COLUMNS, values)), "updated_at": now}
+        for sku, values in totals.items()
+        if any(values)
+    ]
+    if deltas:
+        _write_inventory_deltas(session, deltas)
+    return rows
+
+
+def rebuild_inventory_summary(session: Session) -> int:
+    # Full recompute for backfills or drift repair; ingestion keeps the table current incrementally.
+    session.execute(delete(InventorySummary))
+    aggregate = select(
+        Product.sku,
+        func.sum(Product.quantity),
+        func.sum(case((Product.status == INVENTORY_AVAILABLE_STATUS, Product.quantity), else_=0)),
+        func.count(),
+        literal(datetime.utcnow()),
+    ).group_by(Product.sku)
+    result = session.execute(
+        insert(InventorySummary).from_select(
+            ["sku", "total_quantity", "available_quantity", "supplier_count", "updated_at"], aggregate
+        )
+    )
     session.commit()
-    return inserted
+    return result.rowcount
+
+
+def backfill_inventory_summary(session: Session) -> bool:
+    # Seeds the summary once for databases that already held products before it existed.
+    if _dialect_name(session) == "postgresql":
+        # Instances starting together queue here; later ones find the summary seeded and return.
+        lock = text("SELECT pg_advisory_xact_lock(:lock_class, 0)")
+        session.execute(lock, {"lock_class": INVENTORY_BACKFILL_LOCK_CLASS})
+    if session.execute(select(InventorySummary.sku).limit(1)).first() is not None:
+        return False
+    if session.execute(select(Product.id).limit(1)).first() is None:
+        return False
+    rebuild_inventory_summary(session)
+    return True
+
+
+def get_inventory(session: Session, sku: str) -> InventorySummary | None:
+    return session.get(InventorySummary, sku)
+
+
+def _prepare_products(session: Session, rows: list[dict]) -> list[dict]:
+    # Rows whose stored digest already matches cost neither a write nor an inventory delta.
+    rows, _ = filter_changed_rows(session, "product", rows)
+    return _apply_inventory_deltas(session, rows) if rows else rows
+
+
+def _prepare_orders(session: Session, rows: list[dict]) -> list[dict]:
+    rows, _ = filter_changed_rows(session, "order", rows)
+    return rows
+
+
+def _prepare_partitioned_orders(session: Session, rows: list[dict]) -> list[dict]:
+    # Nothing enforces a global order_id on partitioned orders, so concurrent runs creating the same order
+    # would each pick their own created_at; the lock makes the second one find the first one's row.
+    _lock_keys(session, ORDER_KEY_LOCK_CLASS, list(dict.fromkeys(row["order_id"] for row in rows)))
+    rows = _prepare_orders(session, rows)
+    return _assign_order_created_at(session, rows) if rows else rows
+
+
+def upsert_products(
+    session: Session,
+    items: Iterable[dict],
+    batch_size: int | None = None,
+    commit_mode: str | None = None,
+) -> int:
+    dialect = _dialect_name(session)
+    if dialect in {"postgresql", "sqlite"}:
+        stmt = _product_upsert_stmt(postgresql.insert if dialect == "postgresql" else sqlite.insert)
+        return _execute_in_batches(
+            session, stmt, Product.__table__, PRODUCT_KEY, items, batch_size, commit_mode, prepare=_prepare_products
+        )
+    return _prefetch_upsert(
+        session,
+        Product,
+        PRODUCT_KEY,
+        PRODUCT_UPDATE_COLUMNS,
+        items,
+        batch_size,
+        commit_mode,
+        prepare=_prepare_products,
+    )
+
+
+def upsert_orders(
+    session: Session,
+    items: Iterable[dict],
+    batch_size: int | None = None,
+    commit_mode: str | None = None,
+) -> int:
+    dialect = _dialect_name(session)
+    if dialect == "postgresql" and settings.orders_partitioned:
+        stmt = _order_upsert_stmt(key=PARTITIONED_ORDER_KEY)
+        return _execute_in_batches(
+            session,
+            stmt,
+            Order.__table__,
+            ORDER_KEY,
+            items,
+            batch_size,
+            commit_mode,
+            prepare=_prepare_partitioned_orders,
+        )
+    if dialect in {"postgresql", "sqlite"}:
+        stmt = _order_upsert_stmt(sqlite.insert) if dialect == "sqlite" else _order_upsert_stmt()
+        return _execute_in_batches(
+            session, stmt, Order.__table__, ORDER_KEY, items, batch_size, commit_mode, prepare=_prepare_orders
+        )
+    return _prefetch_upsert(
+        session, Order, ORDER_KEY, ORDER_UPDATE_COLUMNS, items, batch_size, commit_mode, prepare=_prepare_orders
+    )
@@ -0,0 +1,34 @@
+import logging
+
+from sqlalchemy import Engine, inspect, text
+
+from app.db.models import Order, Product
+
+
+logger = logging.getLogger(__name__)
+# Columns added after a table first shipped; create_all never alters a table that already exists.
+ADDED_COLUMNS = {
+    Product.__table__: ("content_hash",),
+    Order.__table__: ("content_hash",),
+}
+
+
+def add_missing_columns(engine: Engine) -> list[str]:
+    inspector = inspect(engine)
+    # IF NOT EXISTS keeps concurrent workers booting against the same database from colliding.
+    if_not_exists = " IF NOT EXISTS" if engine.dialect.name == "postgresql" else ""
+    added: list[str] = []
+    with engine.begin() as connection:
+        for table, column_names in ADDED_COLUMNS.items():
+            if not inspector.has_table(table.name):
+                continue
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            for name in column_names:
+                if name in existing:
+                    continue
+                column_type = table.c[name].type.compile(dialect=engine.dialect)
+                connection.execute(text(f"ALTER TABLE {table.name} ADD COLUMN{if_not_exists} {name} {column_type}"))
+                added.append(f"{table.name}.{name}")
+    if added:
+        logger.info("schema.columns_added", extra={"columns": added})
+    return added
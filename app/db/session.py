@@ -1,18 +1,56 @@
-﻿from contextlib import contextmanager
+﻿import threading
+from contextlib import contextmanager
 
-from sqlalchemy import create_engine
+from sqlalchemy import Engine, create_engine, make_url
 from sqlalchemy.orm import sessionmaker
 
 from app.config import settings
 
 
-engine = create_engine(settings.database_url, pool_pre_ping=True)
-SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
+# Sessions are bound per call so the engine is only built when something first talks to the database.
+SessionLocal = sessionmaker(autoflush=False, autocommit=False)
+_engine: Engine | None = None
+_engine_lock = threading.Lock()
+
+
+def engine_options(database_url: str) -> dict:
+    options: dict = {"pool_pre_ping": True}
+    url = make_url(database_url)
+    if url.get_backend_name() == "sqlite":
+        return options
+    # Every ingest worker and scheduler thread can hold a session at once, plus one for the API.
+    pool_size = settings.db_pool_size or settings.ingest_workers + settings.scheduler_workers + 1
+    options.update(
+        pool_size=pool_size,
+        max_overflow=settings.db_max_overflow,
+        pool_recycle=settings.db_pool_recycle_seconds,
+        pool_timeout=settings.db_pool_timeout_seconds,
+    )
+    if url.get_backend_name() == "postgresql" and settings.db_statement_timeout_ms > 0:
+        options["connect_args"] = {"options": f"-c statement_timeout={settings.db_statement_timeout_ms}"}
+    return options
+
+
+def get_engine() -> Engine:
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = create_engine(settings.database_url, **engine_options(settings.database_url))
+    return _engine
+
+
+def dispose_engine() -> None:
+    global _engine
+    with _engine_lock:
+        if _engine is not None:
+            _engine.dispose()
+            _engine = None
 
 
 @contextmanager
 def get_db_session():
-    session = SessionLocal()
+    session = SessionLocal(bind=get_engine())
     try:
         yield session
     finally:
@@ -0,0 +1,126 @@
+import logging
+import queue
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from app.config import settings
+from app.db.session import get_db_session
+from app.ingestion.cache import RedisCache
+from app.ingestion.pipeline import resolve_ingest_path, run_pipeline
+from app.metrics import CACHE_EVENTS
+from app.models.pydantic_models import IngestBatchSummary, IngestBatchTotals, IngestRequest, RunSummary
+
+
+logger = logging.getLogger(__name__)
+# (position in the request, request)
+BatchItem = tuple[int, IngestRequest]
+
+
+def _summary(status: str, errors: list[dict] | None = None, skipped_cached: bool = False) -> RunSummary:
+    return RunSummary(
+        run_id=str(uuid.uuid4()),
+        status=status,
+        processed=0,
+        inserted=0,
+        rejected=0,
+        skipped_cached=skipped_cached,
+        errors=errors or [],
+    )
+
+
+def _failed(message: str) -> RunSummary:
+    return _summary("failed", errors=[{"error": message}])
+
+
+def _run_item(request: IngestRequest, cache: RedisCache, session) -> RunSummary:
+    try:
+        # Hashing happens here, on the worker, so feeds are read in parallel rather than up front.
+        return run_pipeline(request.file_path, request.supplier_id, request.record_type, cache, session=session)
+    except (ValueError, FileNotFoundError) as exc:
+        # The worker's session carries on with the next feed, so drop whatever this one left open.
+        session.rollback()
+        return _failed(str(exc))
+    except Exception:
+        logger.exception("ingest_batch.item_failed", extra={"file_path": request.file_path})
+        session.rollback()
+        return _failed("Ingestion failed")
+
+
+def _drain(items: queue.SimpleQueue, cache: RedisCache, results: dict[int, RunSummary]) -> None:
+    # One session per worker for the whole batch, instead of one per feed.
+    with get_db_session() as session:
+        while True:
+            try:
+                position, request = items.get_nowait()
+            except queue.Empty:
+                return
+            results[position] = _run_item(request, cache, session)
+
+
+def _totals(summaries: list[RunSummary], duration_ms: int) -> IngestBatchTotals:
+    return IngestBatchTotals(
+        items=len(summaries),
+        completed=sum(1 for summary in summaries if summary.status == "completed"),
+        failed=sum(1 for summary in summaries if summary.status == "failed"),
+        skipped_cached=sum(1 for summary in summaries if summary.skipped_cached),
+        processed=sum(summary.processed for summary in summaries),
+        inserted=sum(summary.inserted for summary in summaries),
+        rejected=sum(summary.rejected for summary in summaries),
+        skipped_unchanged=sum(summary.skipped_unchanged for summary in summaries),
+        duration_ms=duration_ms,
+    )
+
+
+def run_batch(requests: list[IngestRequest], cache: RedisCache, workers: int | None = None) -> IngestBatchSummary:
+    if len(requests) > settings.ingest_batch_max_items:
+        raise ValueError(f"A batch may contain at most {settings.ingest_batch_max_items} items")
+    started = time.perf_counter()
+    results: dict[int, RunSummary] = {}
+    keyed: list[tuple[BatchItem, tuple[str, str, Path], str | None]] = []
+
+    for position, request in enumerate(requests):
+        try:
+            path = resolve_ingest_path(request.file_path)
+        except (ValueError, OSError) as exc:
+            results[position] = _failed(str(exc))
+            continue
+        # Only digests already indexed for the file's current stat() are prechecked; the request thread never
+        # reads a feed.
+        file_hash = cache.indexed_hash(path)
+        cache_key = cache.build_key(request.supplier_id, request.record_type, path, file_hash) if file_hash else None
+        keyed.append(((position, request), (request.supplier_id, request.record_type, path), cache_key))
+
+    # One pipelined EXISTS for the whole batch instead of a Redis round trip per feed.
+    found = cache.exists_many([cache_key for _, _, cache_key in keyed if cache_key])
+    pending: queue.SimpleQueue = queue.SimpleQueue()
+    first_position: dict[tuple[str, str, Path], int] = {}
+    duplicates: list[tuple[int, int]] = []
+    for (position, request), feed, cache_key in keyed:
+        if cache_key and found.get(cache_key):
+            CACHE_EVENTS.inc(event="hit", supplier_id=request.supplier_id, record_type=request.record_type)
+            results[position] = _summary("completed", skipped_cached=True)
+        elif feed in first_position:
+            # The same feed listed twice runs once; two concurrent runs would race on its checkpoint.
+            duplicates.append((position, first_position[feed]))
+        else:
+            first_position[feed] = position
+            pending.put((position, request))
+
+    worker_count = min(max(1, workers or settings.ingest_batch_workers), len(first_position))
+    if worker_count:
+        with ThreadPoolExecutor(max_workers=worker_count, thread_name_prefix="ingest-batch") as executor:
+            for future in [executor.submit(_drain, pending, cache, results) for _ in range(worker_count)]:
+                future.result()
+    for position, original in duplicates:
+        # Reported like a second sequential call: cached after a completed run, failed again otherwise.
+        if results[original].status == "completed":
+            results[position] = _summary("completed", skipped_cached=True)
+        else:
+            results[position] = results[original].model_copy(update={"run_id": str(uuid.uuid4())})
+
+    summaries = [results[position] for position in range(len(requests))]
+    totals = _totals(summaries, int((time.perf_counter() - started) * 1000))
+    logger.info("ingest_batch.completed", extra=totals.model_dump())
+    return IngestBatchSummary(items=summaries, totals=totals)
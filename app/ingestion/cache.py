@@ -1,22 +1,205 @@
 ﻿import hashlib
+import json
 import logging
+import os
+import threading
+import time
+from collections import OrderedDict
 from pathlib import Path
 
 import redis
 
 
 logger = logging.getLogger(__name__)
+HASH_BUFFER_SIZE = 1 << 20
+# Files modified this recently are rehashed; a same-size rewrite could share their mtime.
+FINGERPRINT_RACY_WINDOW_NS = 2_000_000_000
+# Least recently used paths fall out first; a dropped path is simply rehashed on its next run.
+FINGERPRINT_MAX_ENTRIES = 10_000
+
+
+# Bounded LRU of cache keys with wall-clock expiry, so entries survive a restart when persisted.
+class LocalCacheTier:
+    def __init__(self, ttl_seconds: int, max_entries: int, path: Path | None = None):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.path = path
+        self._entries: OrderedDict[str, float] = OrderedDict()
+        self._lock = threading.Lock()
+        self._journal_lines = 0
+        if path is not None:
+            self._load()
+
+    def _load(self) -> None:
+        try:
+            lines = self.path.read_text(encoding="utf-8").splitlines()
+        except FileNotFoundError:
+            return
+        except OSError:
+            logger.warning("cache.local_load_failed", extra={"path": str(self.path)})
+            return
+        now = time.time()
+        for line in lines:
+            try:
+                key, expires_at = json.loads(line)
+            except (ValueError, TypeError):
+                # A line torn by a crash mid-append only loses that mark.
+                continue
+            self._entries.pop(key, None)
+            if expires_at > now:
+                self._entries[key] = expires_at
+        self._journal_lines = len(lines)
+        self._evict()
+
+    def _append(self, keys: list[str], expires_at: float) -> None:
+        # Marks are appended as JSON lines; the file is only rewritten once stale lines outnumber live ones.
+        if self._journal_lines + len(keys) > 2 * max(len(self._entries), 1):
+            self._compact()
+            return
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with self.path.open("a", encoding="utf-8") as journal:
+                journal.writelines(json.dumps([key, expires_at]) + "\n" for key in keys)
+            self._journal_lines += len(keys)
+        except OSError:
+            logger.warning("cache.local_save_failed", extra={"path": str(self.path)})
+
+    def _compact(self) -> None:
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path.write_text(
+                "".join(json.dumps([key, expires_at]) + "\n" for key, expires_at in self._entries.items()),
+                encoding="utf-8",
+            )
+            os.replace(tmp_path, self.path)
+            self._journal_lines = len(self._entries)
+        except OSError:
+            logger.warning("cache.local_save_failed", extra={"path": str(self.path)})
+
+    def _evict(self) -> None:
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def contains(self, key: str) -> bool:
+        with self._lock:
+            expires_at = self._entries.get(key)
+            if expires_at is None:
+                return False
+            if expires_at <= time.time():
+                del self._entries[key]
+                return False
+            self._entries.move_to_end(key)
+            return True
+
+    def add_many(self, keys: list[str]) -> None:
+        if self.max_entries < 1 or not keys:
+            return
+        expires_at = time.time() + self.ttl_seconds
+        with self._lock:
+            for key in keys:
+                self._entries[key] = expires_at
+                self._entries.move_to_end(key)
+            self._evict()
+            if self.path is not None:
+                self._append(keys, expires_at)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
 
 
 class RedisCache:
-    def __init__(self, redis_url: str, ttl_seconds: int):
+    def __init__(
+        self,
+        redis_url: str,
+        ttl_seconds: int,
+        max_connections: int | None = None,
+        socket_timeout: float | None = None,
+        socket_connect_timeout: float | None = None,
+        local_max_entries: int = 10_000,
+        local_path: Path | None = None,
+        reconnect_interval: float = 30.0,
+    ):
         self.ttl_seconds = ttl_seconds
+        self.local = LocalCacheTier(ttl_seconds, local_max_entries, local_path)
+        self._fingerprints: OrderedDict[str, tuple[tuple[int, int, int], str]] = OrderedDict()
+        self._fingerprints_lock = threading.Lock()
+        self._redis_url = redis_url
+        # Bounded pool and socket timeouts: a slow Redis degrades to cache misses instead of stalling runs.
+        self._client_options = {
+            "decode_responses": True,
+            "max_connections": max_connections,
+            "socket_timeout": socket_timeout,
+            "socket_connect_timeout": socket_connect_timeout,
+        }
+        self._reconnect_interval = reconnect_interval
+        self._reconnect_lock = threading.Lock()
+        self._reconnect_thread: threading.Thread | None = None
+        self._closed = threading.Event()
+        # The first connection is made on first use, so constructing a cache never blocks on Redis.
+        self._client = None
+        self._connect_attempted = False
+        self._connect_lock = threading.Lock()
+        self._unsynced: set[str] = set()
+        self._unsynced_lock = threading.Lock()
+
+    @property
+    def client(self):
+        if not self._connect_attempted:
+            self._first_connect()
+        return self._client
+
+    @client.setter
+    def client(self, value) -> None:
+        self._connect_attempted = True
+        self._client = value
+
+    def _first_connect(self) -> None:
+        with self._connect_lock:
+            if self._connect_attempted:
+                return
+            # A successful _connect marks the attempt through the client setter.
+            if not self._connect():
+                self._connect_attempted = True
+                logger.warning("cache.unavailable")
+                self._schedule_reconnect()
+
+    def _connect(self) -> bool:
         try:
-            self.client = redis.Redis.from_url(redis_url, decode_responses=True)
-            self.client.ping()
+            client = redis.Redis.from_url(self._redis_url, **self._client_options)
+            client.ping()
         except Exception:
+            return False
+        self.client = client
+        return True
+
+    def _schedule_reconnect(self) -> None:
+        if self._reconnect_interval <= 0 or self._closed.is_set():
+            return
+        with self._reconnect_lock:
+            if self._reconnect_thread and self._reconnect_thread.is_alive():
+                return
+            self._reconnect_thread = threading.Thread(target=self._reconnect_loop, name="redis-reconnect", daemon=True)
+            self._reconnect_thread.start()
+
+    def _reconnect_loop(self) -> None:
+        while not self._closed.wait(self._reconnect_interval):
+            if self._connect():
+                logger.info("cache.reconnected")
+                self._replay_unsynced()
+                return
+
+    def _on_error(self, event: str, exc: Exception, **extra) -> None:
+        logger.warning(event, extra=extra)
+        if isinstance(exc, (redis.ConnectionError, redis.TimeoutError)) and self._client is not None:
+            # Stop paying a socket timeout per call; the local tier answers until the reconnect succeeds.
             self.client = None
-            logger.warning("cache.unavailable")
+            logger.warning("cache.connection_lost")
+            self._schedule_reconnect()
+
+    def close(self) -> None:
+        self._closed.set()
 
     def is_available(self) -> bool:
         return self.client is not None
@@ -29,26 +212,175 @@ class RedisCache:
         except Exception:
             return False
 
+    @staticmethod
+    def _fingerprint(file_path: Path) -> tuple[int, int, int]:
+        stat = file_path.stat()
+        return stat.st_size, stat.st_mtime_ns, stat.st_ino
+
+    @staticmethod
+    def _stream_hash(file_path: Path) -> str:
+        hasher = hashlib.sha256()
+        buffer = bytearray(HASH_BUFFER_SIZE)
+        view = memoryview(buffer)
+        with file_path.open("rb", buffering=0) as file:
+            while size := file.readinto(buffer):
+                hasher.update(view[:size])
+        return hasher.hexdigest()
+
+    def _index_fingerprint(self, index_key: str, entry: tuple[tuple[int, int, int], str]) -> None:
+        # Caller holds _fingerprints_lock.
+        self._fingerprints[index_key] = entry
+        self._fingerprints.move_to_end(index_key)
+        while len(self._fingerprints) > FINGERPRINT_MAX_ENTRIES:
+            self._fingerprints.popitem(last=False)
+
+    def _forget_fingerprint(self, file_path: Path) -> None:
+        with self._fingerprints_lock:
+            self._fingerprints.pop(str(file_path), None)
+
     def file_hash(self, file_path: Path) -> str:
-        file_bytes = file_path.read_bytes()
-        return hashlib.sha256(file_bytes).hexdigest()
+        index_key = str(file_path)
+        try:
+            fingerprint = self._fingerprint(file_path)
+        except FileNotFoundError:
+            self._forget_fingerprint(file_path)
+            raise
+        indexed = self.hash_entry(file_path)
+        if indexed and indexed[0] == fingerprint:
+            return indexed[1]
+
+        digest = self._stream_hash(file_path)
+
+        stable = self._fingerprint(file_path) == fingerprint
+        settled = time.time_ns() - fingerprint[1] > FINGERPRINT_RACY_WINDOW_NS
+        with self._fingerprints_lock:
+            if stable and settled:
+                self._index_fingerprint(index_key, (fingerprint, digest))
+            else:
+                self._fingerprints.pop(index_key, None)
+        return digest
+
+    def hash_entry(self, file_path: Path) -> tuple[tuple[int, int, int], str] | None:
+        index_key = str(file_path)
+        with self._fingerprints_lock:
+            entry = self._fingerprints.get(index_key)
+            if entry is not None:
+                self._fingerprints.move_to_end(index_key)
+            return entry
+
+    def restore_hash_entry(self, file_path: Path, entry: tuple[tuple[int, int, int], str]) -> None:
+        with self._fingerprints_lock:
+            self._index_fingerprint(str(file_path), entry)
+
+    def indexed_hash(self, file_path: Path) -> str | None:
+        # The digest indexed for the file's current stat(), if any; never reads the file.
+        entry = self.hash_entry(file_path)
+        try:
+            return entry[1] if entry and entry[0] == self._fingerprint(file_path) else None
+        except FileNotFoundError:
+            # Feeds are usually moved or deleted once ingested; drop their entry instead of keeping it forever.
+            self._forget_fingerprint(file_path)
+            return None
+        except OSError:
+            return None
 
     def build_key(self, supplier_id: str, record_type: str, file_path: Path, file_hash: str) -> str:
         return f"ingest:{supplier_id}:{record_type}:{file_path}:{file_hash}"
 
+    def build_upload_key(self, supplier_id: str, record_type: str, file_hash: str) -> str:
+        return f"ingest:{supplier_id}:{record_type}:upload:{file_hash}"
+
+    # Redis is the source of truth while reachable, so deleting a key there forces a rerun.
+    # The local tier only answers while Redis is down.
     def exists(self, key: str) -> bool:
-        if not self.client:
+        client = self.client
+        if client:
+            try:
+                return bool(client.exists(key))
+            except Exception as exc:
+                self._on_error("cache.exists_failed", exc, key=key)
+        return self.local.contains(key)
+
+    def set(self, key: str) -> None:
+        self.set_many([key])
+
+    def exists_many(self, keys: list[str]) -> dict[str, bool]:
+        client = self.client
+        if client and keys:
+            try:
+                pipe = client.pipeline(transaction=False)
+                for key in keys:
+                    pipe.exists(key)
+                return {key: bool(hit) for key, hit in zip(keys, pipe.execute())}
+            except Exception as exc:
+                self._on_error("cache.exists_many_failed", exc, keys=len(keys))
+        return {key: self.local.contains(key) for key in keys}
+
+    def set_many(self, keys: list[str]) -> None:
+        if not keys:
+            return
+        self.local.add_many(keys)
+        if not self._write_remote(keys):
+            # Replayed into Redis on reconnect, so the outage's marks survive once Redis answers again.
+            with self._unsynced_lock:
+                self._unsynced.update(keys)
+
+    def _write_remote(self, keys: list[str]) -> bool:
+        client = self.client
+        if not client:
             return False
         try:
-            return bool(self.client.exists(key))
-        except Exception:
-            logger.warning("cache.exists_failed", extra={"key": key})
+            pipe = client.pipeline(transaction=False)
+            for key in keys:
+                pipe.setex(key, self.ttl_seconds, "1")
+            pipe.execute()
+            return True
+        except Exception as exc:
+            self._on_error("cache.set_many_failed", exc, keys=len(keys))
             return False
 
-    def set(self, key: str) -> None:
-        if not self.client:
+    def _replay_unsynced(self) -> None:
+        with self._unsynced_lock:
+            keys, self._unsynced = list(self._unsynced), set()
+        # Only marks the local tier still holds are replayed; expired ones would be stale in Redis too.
+        live = [key for key in keys if self.local.contains(key)]
+        if live and not self._write_remote(live):
+            with self._unsynced_lock:
+                self._unsynced.update(live)
+
+    # Progress of an unfinished run, keyed by its cache key so any change to the file invalidates it.
+    def get_checkpoint(self, cache_key: str) -> dict | None:
+        client = self.client
+        if not client:
+            return None
+        try:
+            raw = client.get(f"checkpoint:{cache_key}")
+        except Exception as exc:
+            self._on_error("cache.checkpoint_read_failed", exc, key=cache_key)
+            return None
+        if not raw:
+            return None
+        try:
+            checkpoint = json.loads(raw)
+        except ValueError:
+            return None
+        return checkpoint if isinstance(checkpoint, dict) else None
+
+    def save_checkpoint(self, cache_key: str, records: int, valid: int, rejected: int = 0) -> None:
+        client = self.client
+        if not client:
             return
+        checkpoint = {"records": records, "valid": valid, "rejected": rejected}
         try:
-            self.client.setex(key, self.ttl_seconds, "1")
-        except Exception:
-            logger.warning("cache.set_failed", extra={"key": key})
+            client.setex(f"checkpoint:{cache_key}", self.ttl_seconds, json.dumps(checkpoint))
+        except Exception as exc:
+            self._on_error("cache.checkpoint_write_failed", exc, key=cache_key)
+
+    def clear_checkpoint(self, cache_key: str) -> None:
+        client = self.client
+        if not client:
+            return
+        try:
+            client.delete(f"checkpoint:{cache_key}")
+        except Exception as exc:
+            self._on_error("cache.checkpoint_clear_failed", exc, key=cache_key)
@@ -1,49 +1,256 @@
-﻿import csv
+﻿import bz2
+import csv
+import gzip
 import json
+import lzma
+from collections.abc import Iterable, Iterator
+from itertools import islice
 from pathlib import Path
+from typing import TextIO
 
+try:
+    import zstandard
+except ImportError:  # optional: only needed for .zst feeds
+    zstandard = None
 
-def load_csv(filepath: Path) -> list[dict]:
-    with filepath.open("r", encoding="utf-8") as file:
-        return [dict(row) for row in csv.DictReader(file)]
 
+COMPRESSION_SUFFIXES = {".gz", ".bz2", ".xz", ".zst"}
+NDJSON_EXTENSIONS = {".jsonl", ".ndjson"}
+JSON_FEED_EXTENSIONS = {".json", *NDJSON_EXTENSIONS}
+JSON_READ_SIZE = 1 << 20
+JSON_FEED_ERROR = "JSON feed must be a list of records or a single-key wrapped list"
+_JSON_DECODER = json.JSONDecoder()
+_JSON_WHITESPACE = " \t\n\r"
 
-def load_json(filepath: Path) -> list[dict]:
-    with filepath.open("r", encoding="utf-8") as file:
-        payload = json.load(file)
-    if isinstance(payload, dict) and len(payload) == 1:
-        value = next(iter(payload.values()))
-        if isinstance(value, list):
-            payload = value
-    if not isinstance(payload, list):
-        raise ValueError("JSON feed must be a list of records or a single-key wrapped list")
-    return [dict(row) for row in payload]
 
+def split_feed_suffix(filepath: Path) -> tuple[str, str | None]:
+    # acme_products.csv.gz -> (".csv", ".gz"); the format is always the suffix before any compression suffix.
+    suffixes = [suffix.lower() for suffix in filepath.suffixes]
+    if suffixes and suffixes[-1] in COMPRESSION_SUFFIXES:
+        return (suffixes[-2] if len(suffixes) > 1 else ""), suffixes[-1]
+    return (suffixes[-1] if suffixes else ""), None
 
-def load_txt(filepath: Path) -> list[dict]:
-    rows: list[dict] = []
-    with filepath.open("r", encoding="utf-8") as file:
-        for line in file:
-            stripped = line.strip()
-            if not stripped:
-                continue
-            row: dict = {}
-            for part in stripped.split(","):
-                if ":" not in part:
+
+def compression_available(compression: str | None) -> bool:
+    return compression != ".zst" or zstandard is not None
+
+
+def feed_stem(filepath: Path) -> str:
+    _, compression = split_feed_suffix(filepath)
+    return filepath.stem if compression is None else Path(filepath.stem).stem
+
+
+def open_feed(filepath: Path) -> TextIO:
+    # Compressed feeds are decoded as they are read; nothing is unpacked to disk.
+    _, compression = split_feed_suffix(filepath)
+    if compression is None:
+        return filepath.open("r", encoding="utf-8")
+    if compression == ".gz":
+        return gzip.open(filepath, "rt", encoding="utf-8")
+    if compression == ".bz2":
+        return bz2.open(filepath, "rt", encoding="utf-8")
+    if compression == ".xz":
+        return lzma.open(filepath, "rt", encoding="utf-8")
+    if zstandard is None:
+        raise ValueError("Reading .zst feeds requires the zstandard package")
+    return zstandard.open(filepath, "rt", encoding="utf-8")
+
+
+def parse_csv(file: TextIO) -> Iterator[dict]:
+    yield from csv.DictReader(file)
+
+
+def iter_csv(filepath: Path) -> Iterator[dict]:
+    with open_feed(filepath) as file:
+        yield from parse_csv(file)
+
+
+# Pull-based JSON tokenizer: holds one read window plus the value being decoded, never the document.
+class _JsonStream:
+    def __init__(self, file: TextIO, read_size: int | None = None):
+        self._file = file
+        # Resolved per stream so JSON_READ_SIZE can be tuned (or shrunk in tests) after import.
+        self._read_size = read_size or JSON_READ_SIZE
+        self._buffer = ""
+        self._pos = 0
+        self._eof = False
+
+    def _fill(self) -> bool:
+        if self._eof:
+            return False
+        chunk = self._file.read(self._read_size)
+        if not chunk:
+            self._eof = True
+            return False
+        self._buffer = self._buffer[self._pos :] + chunk
+        self._pos = 0
+        return True
+
+    def peek(self) -> str:
+        while True:
+            while self._pos < len(self._buffer) and self._buffer[self._pos] in _JSON_WHITESPACE:
+                self._pos += 1
+            if self._pos < len(self._buffer) or not self._fill():
+                return self._buffer[self._pos : self._pos + 1]
+
+    def expect(self, token: str) -> None:
+        if self.peek() != token:
+            raise ValueError(JSON_FEED_ERROR)
+        self._pos += 1
+
+    def decode(self):
+        self.peek()
+        while True:
+            try:
+                value, end = _JSON_DECODER.raw_decode(self._buffer, self._pos)
+            except json.JSONDecodeError:
+                if self._fill():
                     continue
-                key, value = part.split(":", 1)
-                row[key.strip()] = value.strip()
-            if row:
-                rows.append(row)
-    return rows
+                raise
+            # A bare number cut at the window edge still decodes, so only trust values with a known end.
+            if end == len(self._buffer) and self._fill():
+                continue
+            self._pos = end
+            return value
 
 
-def load_records(filepath: Path) -> list[dict]:
-    ext = filepath.suffix.lower()
+def _iter_json_array(stream: _JsonStream) -> Iterator[dict]:
+    stream.expect("[")
+    if stream.peek() == "]":
+        stream.expect("]")
+        return
+    while True:
+        row = stream.decode()
+        if not isinstance(row, dict):
+            raise ValueError("JSON feed records must be objects")
+        yield row
+        if stream.peek() == "]":
+            stream.expect("]")
+            return
+        stream.expect(",")
+
+
+def parse_json(file: TextIO) -> Iterator[dict]:
+    stream = _JsonStream(file)
+    if stream.peek() == "{":
+        # Only {"<key>": [...]} is accepted. Rows stream before the closing tail is seen, so callers that
+        # persist as they go run check_json_feed first.
+        stream.expect("{")
+        if stream.peek() != '"' or not isinstance(stream.decode(), str):
+            raise ValueError(JSON_FEED_ERROR)
+        stream.expect(":")
+        if stream.peek() != "[":
+            raise ValueError(JSON_FEED_ERROR)
+        yield from _iter_json_array(stream)
+        stream.expect("}")
+    else:
+        yield from _iter_json_array(stream)
+    if stream.peek():
+        raise ValueError(JSON_FEED_ERROR)
+
+
+def iter_json(filepath: Path) -> Iterator[dict]:
+    with open_feed(filepath) as file:
+        yield from parse_json(file)
+
+
+def parse_ndjson(file: TextIO) -> Iterator[dict]:
+    for line_number, line in enumerate(file, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except json.JSONDecodeError as exc:
+            raise ValueError(f"NDJSON line {line_number} is not valid JSON: {exc.msg} at column {exc.colno}") from exc
+        if not isinstance(row, dict):
+            raise ValueError(f"NDJSON line {line_number} is not a JSON object")
+        yield row
+
+
+def check_json_feed(filepath: Path) -> None:
+    # Full pass that keeps nothing, so a malformed tail or NDJSON line is rejected before any row is written.
+    for _ in iter_records(filepath):
+        pass
+
+
+def iter_ndjson(filepath: Path) -> Iterator[dict]:
+    with open_feed(filepath) as file:
+        yield from parse_ndjson(file)
+
+
+def _parse_txt_line(line: str) -> dict:
+    row: dict = {}
+    stripped = line.strip()
+    if not stripped:
+        return row
+    for part in stripped.split(","):
+        if ":" not in part:
+            continue
+        key, value = part.split(":", 1)
+        row[key.strip()] = value.strip()
+    return row
+
+
+def parse_txt(file: TextIO) -> Iterator[dict]:
+    for line in file:
+        row = _parse_txt_line(line)
+        if row:
+            yield row
+
+
+def iter_txt(filepath: Path) -> Iterator[dict]:
+    with open_feed(filepath) as file:
+        yield from parse_txt(file)
+
+
+def stream_parser(ext: str):
     if ext == ".csv":
-        return load_csv(filepath)
+        return parse_csv
     if ext == ".json":
-        return load_json(filepath)
+        return parse_json
+    if ext in NDJSON_EXTENSIONS:
+        return parse_ndjson
     if ext == ".txt":
-        return load_txt(filepath)
+        return parse_txt
     raise ValueError(f"Unsupported file type: {ext}")
+
+
+def iter_records(filepath: Path) -> Iterator[dict]:
+    ext, _ = split_feed_suffix(filepath)
+    if ext == ".csv":
+        return iter_csv(filepath)
+    if ext == ".json":
+        return iter_json(filepath)
+    if ext in NDJSON_EXTENSIONS:
+        return iter_ndjson(filepath)
+    if ext == ".txt":
+        return iter_txt(filepath)
+    raise ValueError(f"Unsupported file type: {ext}")
+
+
+def iter_chunks(records: Iterable[dict], size: int) -> Iterator[list[dict]]:
+    if size < 1:
+        raise ValueError("chunk size must be at least 1")
+    iterator = iter(records)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def load_csv(filepath: Path) -> list[dict]:
+    return list(iter_csv(filepath))
+
+
+def load_json(filepath: Path) -> list[dict]:
+    return list(iter_json(filepath))
+
+
+def load_ndjson(filepath: Path) -> list[dict]:
+    return list(iter_ndjson(filepath))
+
+
+def load_txt(filepath: Path) -> list[dict]:
+    return list(iter_txt(filepath))
+
+
+def load_records(filepath: Path) -> list[dict]:
+    return list(iter_records(filepath))
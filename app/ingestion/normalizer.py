@@ -1,4 +1,6 @@
+from collections.abc import Callable
 from decimal import Decimal
+from functools import lru_cache
 
 KEY_ALIASES = {
     "sku": ("sku", "item_sku", "sku_code"),
@@ -23,20 +25,7 @@ def _normalize_value(value):
     return value
 
 
-def normalize_record(record: dict, default_supplier_id: str, record_type: str) -> dict:
-    cleaned = {k.strip().lower(): _normalize_value(v) for k, v in record.items() if str(k).strip()}
-
-    normalized = {
-        "sku": _pick_value(cleaned, "sku"),
-        "quantity": _pick_value(cleaned, "quantity"),
-        "supplier_id": _pick_value(cleaned, "supplier_id") or default_supplier_id,
-        "status": (_pick_value(cleaned, "status") or "").lower(),
-        "price": _pick_value(cleaned, "price"),
-    }
-
-    if record_type == "order":
-        normalized["order_id"] = _pick_value(cleaned, "order_id")
-
+def _coerce_types(normalized: dict, record_type: str) -> dict:
     if normalized.get("quantity") not in (None, ""):
         try:
             normalized["quantity"] = int(normalized["quantity"])
@@ -56,5 +45,73 @@ def normalize_record(record: dict, default_supplier_id: str, record_type: str) -
     return normalized
 
 
+def normalize_record(record: dict, default_supplier_id: str, record_type: str) -> dict:
+    cleaned = {k.strip().lower(): _normalize_value(v) for k, v in record.items() if str(k).strip()}
+
+    normalized = {
+        "sku": _pick_value(cleaned, "sku"),
+        "quantity": _pick_value(cleaned, "quantity"),
+        "supplier_id": _pick_value(cleaned, "supplier_id") or default_supplier_id,
+        "status": (_pick_value(cleaned, "status") or "").lower(),
+        "price": _pick_value(cleaned, "price"),
+    }
+
+    if record_type == "order":
+        normalized["order_id"] = _pick_value(cleaned, "order_id")
+
+    return _coerce_types(normalized, record_type)
+
+
+def _source_value(record: dict, source_key):
+    if source_key is None:
+        return None
+    return _normalize_value(record[source_key])
+
+
+@lru_cache(maxsize=256)
+def compile_normalizer(source_keys: tuple, record_type: str) -> Callable[[dict, str], dict]:
+    # Resolve the alias scan once per key layout; the same last-key-wins rule as normalize_record applies.
+    cleaned_sources = {}
+    for source_key in source_keys:
+        if str(source_key).strip():
+            cleaned_sources[source_key.strip().lower()] = source_key
+
+    def resolve(canonical_key: str):
+        for alias in KEY_ALIASES[canonical_key]:
+            if alias in cleaned_sources:
+                return cleaned_sources[alias]
+        return None
+
+    sku_key = resolve("sku")
+    quantity_key = resolve("quantity")
+    supplier_key = resolve("supplier_id")
+    status_key = resolve("status")
+    price_key = resolve("price")
+    order_key = resolve("order_id") if record_type == "order" else None
+
+    def normalize(record: dict, default_supplier_id: str) -> dict:
+        normalized = {
+            "sku": _source_value(record, sku_key),
+            "quantity": _source_value(record, quantity_key),
+            "supplier_id": _source_value(record, supplier_key) or default_supplier_id,
+            "status": (_source_value(record, status_key) or "").lower(),
+            "price": _source_value(record, price_key),
+        }
+        if record_type == "order":
+            normalized["order_id"] = _source_value(record, order_key)
+        return _coerce_types(normalized, record_type)
+
+    return normalize
+
+
 def normalize_records(records: list[dict], supplier_id: str, record_type: str) -> list[dict]:
-    return [normalize_record(record, supplier_id, record_type) for record in records]
\ No newline at end of file
+    normalized: list[dict] = []
+    layout = None
+    normalize = None
+    for record in records:
+        keys = tuple(record)
+        if keys != layout:
+            layout = keys
+            normalize = compile_normalizer(keys, record_type)
+        normalized.append(normalize(record, supplier_id))
+    return normalized
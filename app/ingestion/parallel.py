@@ -0,0 +1,96 @@
+import csv
+import io
+import math
+import multiprocessing
+from collections import deque
+from collections.abc import Iterator
+from concurrent.futures import Future, ProcessPoolExecutor
+from pathlib import Path
+
+from app.ingestion.loaders import _parse_txt_line, split_feed_suffix
+from app.ingestion.normalizer import normalize_records
+from app.ingestion.validation import validate_rows
+
+
+PARALLEL_EXTENSIONS = {".csv", ".txt"}
+
+
+def supports_parallel_parse(path: Path) -> bool:
+    # Compressed streams cannot be split at byte offsets, so they always take the serial path.
+    ext, compression = split_feed_suffix(path)
+    return compression is None and ext in PARALLEL_EXTENSIONS
+
+
+def split_byte_ranges(path: Path, range_bytes: int) -> tuple[list[str] | None, list[tuple[int, int]]]:
+    # Ranges end on a newline, so CSV feeds must not embed newlines inside quoted fields.
+    size = path.stat().st_size
+    header: list[str] | None = None
+    with path.open("rb") as file:
+        if path.suffix.lower() == ".csv":
+            header_line = file.readline()
+            header = next(csv.reader([header_line.decode("utf-8")]), [])
+        offset = file.tell()
+        parts = max(1, math.ceil((size - offset) / max(1, range_bytes)))
+        step = max(1, (size - offset) // parts)
+
+        ranges: list[tuple[int, int]] = []
+        while offset < size:
+            file.seek(min(size, offset + step))
+            file.readline()
+            end = min(size, file.tell())
+            ranges.append((offset, end))
+            offset = end
+    return header, ranges
+
+
+def process_byte_range(
+    file_path: str,
+    start: int,
+    end: int,
+    header: list[str] | None,
+    supplier_id: str,
+    record_type: str,
+) -> tuple[int, list[dict], list[dict]]:
+    with open(file_path, "rb") as file:
+        file.seek(start)
+        text = file.read(end - start).decode("utf-8")
+
+    # newline=None applies the same universal-newline translation as the serial text-mode loaders.
+    lines = io.StringIO(text, newline=None)
+    if header is not None:
+        records = list(csv.DictReader(lines, fieldnames=header))
+    else:
+        records = [row for row in map(_parse_txt_line, lines) if row]
+
+    normalized = normalize_records(records, supplier_id=supplier_id, record_type=record_type)
+    valid_rows, errors = validate_rows(normalized, record_type)
+    return len(normalized), valid_rows, errors
+
+
+def iter_parallel_chunks(
+    path: Path,
+    supplier_id: str,
+    record_type: str,
+    workers: int,
+    range_bytes: int,
+) -> Iterator[tuple[int, list[dict], list[dict]]]:
+    header, ranges = split_byte_ranges(path, range_bytes)
+    pending = deque(ranges)
+    in_flight: deque[Future] = deque()
+    processed = 0
+
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as executor:
+        while pending or in_flight:
+            # A bounded window keeps finished-but-unwritten ranges from piling up in memory.
+            while pending and len(in_flight) < workers * 2:
+                start, end = pending.popleft()
+                in_flight.append(
+                    executor.submit(process_byte_range, str(path), start, end, header, supplier_id, record_type)
+                )
+
+            # Ranges are consumed in file order so record indices line up with a serial run.
+            count, valid_rows, errors = in_flight.popleft().result()
+            for error in errors:
+                error["index"] += processed
+            processed += count
+            yield count, valid_rows, errors
@@ -1,23 +1,38 @@
 import logging
 import time
 import uuid
+from collections.abc import Callable, Iterable, Iterator
+from contextlib import nullcontext
+from itertools import islice
 from pathlib import Path
 
-from pydantic import ValidationError
+from sqlalchemy.orm import Session
 
+from app.config import settings
+from app.db.copy_loader import copy_upsert_orders, copy_upsert_products
 from app.db.repository import upsert_orders, upsert_products
 from app.db.session import get_db_session
 from app.ingestion.cache import RedisCache
-from app.ingestion.loaders import load_records
+from app.ingestion.loaders import (
+    JSON_FEED_EXTENSIONS,
+    check_json_feed,
+    iter_chunks,
+    iter_records,
+    split_feed_suffix,
+)
 from app.ingestion.normalizer import normalize_records
-from app.models.pydantic_models import OrderIn, ProductIn, RunSummary
+from app.ingestion.parallel import iter_parallel_chunks, supports_parallel_parse
+from app.ingestion.validation import validate_rows
+from app.metrics import CACHE_EVENTS, DB_ROWS_WRITTEN, ROWS_REJECTED, ROWS_SKIPPED_UNCHANGED, StageTimer
+from app.models.pydantic_models import RunSummary
 
 
 logger = logging.getLogger(__name__)
 ALLOWED_INGEST_ROOT = Path("data/incoming").resolve()
+PERSIST_MODES = {"upsert", "copy"}
 
 
-def _resolve_ingest_path(file_path: str) -> Path:
+def resolve_ingest_path(file_path: str) -> Path:
     resolved_path = Path(file_path).resolve()
 
     try:
@@ -31,63 +46,128 @@ def _resolve_ingest_path(file_path: str) -> Path:
     return resolved_path
 
 
-def run_pipeline(file_path: str, supplier_id: str, record_type: str, cache: RedisCache) -> RunSummary:
-    run_id = str(uuid.uuid4())
-    start = time.time()
-    path = _resolve_ingest_path(file_path)
+def _persist_rows(
+    session: Session, record_type: str, rows: list[dict], persist_mode: str, commit_mode: str | None = None
+) -> int:
+    options = {} if commit_mode is None else {"commit_mode": commit_mode}
+    if persist_mode == "copy":
+        if record_type == "product":
+            return copy_upsert_products(session, rows, **options)
+        return copy_upsert_orders(session, rows, **options)
+    if record_type == "product":
+        return upsert_products(session, rows, **options)
+    return upsert_orders(session, rows, **options)
+
+
+def iter_validated_chunks(
+    records: Iterable[dict],
+    supplier_id: str,
+    record_type: str,
+    chunk_size: int,
+    timer: StageTimer,
+    start_index: int = 1,
+) -> Iterator[tuple[int, list[dict], list[dict]]]:
+    processed = 0
+    chunks = iter_chunks(records, chunk_size)
+    while True:
+        with timer.measure("load"):
+            chunk = next(chunks, None)
+        if chunk is None:
+            return
+        timer.add("load", rows=len(chunk))
+
+        with timer.measure("normalize"):
+            normalized = normalize_records(chunk, supplier_id=supplier_id, record_type=record_type)
+        timer.add("normalize", rows=len(normalized))
+
+        with timer.measure("validate"):
+            valid_rows, errors = validate_rows(normalized, record_type, start_index=processed + start_index)
+        timer.add("validate", rows=len(normalized))
+
+        processed += len(normalized)
+        yield len(normalized), valid_rows, errors
 
-    logger.info(
-        "pipeline.start",
-        extra={
-            "run_id": run_id,
-            "supplier_id": supplier_id,
-            "record_type": record_type,
-            "file_path": str(path),
-        },
-    )
 
+def _iter_timed(chunks: Iterator, timer: StageTimer, stage: str) -> Iterator:
+    while True:
+        with timer.measure(stage):
+            item = next(chunks, None)
+        if item is None:
+            return
+        timer.add(stage, rows=item[0])
+        yield item
+
+
+def check_options(record_type: str, persist_mode: str | None) -> str:
     if record_type not in {"product", "order"}:
         raise ValueError("record_type must be 'product' or 'order'")
+    persist_mode = persist_mode or settings.persist_mode
+    if persist_mode not in PERSIST_MODES:
+        raise ValueError("persist_mode must be 'upsert' or 'copy'")
+    return persist_mode
 
-    file_hash = cache.file_hash(path)
-    cache_key = cache.build_key(supplier_id, record_type, path, file_hash)
-    if cache.exists(cache_key):
-        logger.info("pipeline.cached_skip", extra={"run_id": run_id, "file_path": str(path)})
-        return RunSummary(
-            run_id=run_id,
-            status="completed",
-            processed=0,
-            inserted=0,
-            rejected=0,
-            skipped_cached=True,
-            errors=[],
-        )
-
-    raw_records = load_records(path)
-    normalized = normalize_records(raw_records, supplier_id=supplier_id, record_type=record_type)
 
-    valid_rows: list[dict] = []
+def ingest_chunks(
+    session: Session,
+    chunks: Iterable[tuple[int, list[dict], list[dict]]],
+    record_type: str,
+    persist_mode: str,
+    run_id: str,
+    timer: StageTimer,
+    on_progress: Callable[[int], None] | None = None,
+    on_committed: Callable[[int, int, int], None] | None = None,
+    commit_mode: str | None = None,
+) -> tuple[int, int, int, int, list[dict]]:
+    processed = 0
+    inserted = 0
+    valid_count = 0
+    unchanged = 0
     errors: list[dict] = []
 
-    for index, row in enumerate(normalized, start=1):
-        try:
-            validated = ProductIn(**row) if record_type == "product" else OrderIn(**row)
-            valid_rows.append(validated.model_dump())
-        except (ValidationError, ValueError, TypeError) as exc:
-            error = {"index": index, "error": str(exc)}
+    for count, valid_rows, chunk_errors in chunks:
+        processed += count
+        for error in chunk_errors:
             logger.warning("pipeline.validation_error", extra={"run_id": run_id, **error})
-            errors.append(error)
+        errors.extend(chunk_errors)
+        if on_progress:
+            on_progress(processed)
 
-    inserted = 0
-    if valid_rows:
-        with get_db_session() as session:
-            if record_type == "product":
-                inserted = upsert_products(session, valid_rows)
-            else:
-                inserted = upsert_orders(session, valid_rows)
+        if valid_rows:
+            valid_count += len(valid_rows)
+            with timer.measure("persist"):
+                written = _persist_rows(session, record_type, valid_rows, persist_mode, commit_mode)
+            timer.add("persist", rows=written)
+            inserted += written
+            # The upserts drop rows whose stored content hash already matches.
+            unchanged += len(valid_rows) - written
+        # Unless the caller owns the commit, every persist path has committed by now,
+        # so a rerun can start after this chunk.
+        if on_committed:
+            on_committed(processed, valid_count, len(errors))
+    return processed, inserted, valid_count, unchanged, errors
 
-    if valid_rows or (not normalized and not errors):
-        cache.set(cache_key)
+
+def complete_run(
+    run_id: str,
+    supplier_id: str,
+    record_type: str,
+    source: str,
+    start: float,
+    timer: StageTimer,
+    processed: int,
+    inserted: int,
+    unchanged: int,
+    errors: list[dict],
+    resume_from: int = 0,
+    rejected_before: int = 0,
+) -> RunSummary:
+    labels = {"supplier_id": supplier_id, "record_type": record_type}
+    # Errors from before a resume are only known by count; their details went with the interrupted run.
+    rejected = rejected_before + len(errors)
+    timer.observe(supplier_id, record_type)
+    ROWS_REJECTED.inc(rejected, **labels)
+    ROWS_SKIPPED_UNCHANGED.inc(unchanged, **labels)
+    DB_ROWS_WRITTEN.inc(inserted, **labels)
 
     elapsed_ms = int((time.time() - start) * 1000)
     logger.info(
@@ -96,20 +176,142 @@ def run_pipeline(file_path: str, supplier_id: str, record_type: str, cache: Redi
             "run_id": run_id,
             "supplier_id": supplier_id,
             "record_type": record_type,
-            "file_path": str(path),
-            "processed": len(normalized),
+            "file_path": source,
+            "processed": processed,
             "inserted": inserted,
-            "rejected": len(errors),
+            "rejected": rejected,
+            "skipped_unchanged": unchanged,
+            "resumed_from": resume_from,
             "elapsed_ms": elapsed_ms,
+            "stage_ms": timer.elapsed_ms(),
         },
     )
 
     return RunSummary(
         run_id=run_id,
         status="completed",
-        processed=len(normalized),
+        processed=processed,
         inserted=inserted,
-        rejected=len(errors),
+        rejected=rejected,
         skipped_cached=False,
+        skipped_unchanged=unchanged,
+        resumed_from=resume_from,
         errors=errors,
-    )
\ No newline at end of file
+    )
+
+
+def cached_summary(run_id: str) -> RunSummary:
+    return RunSummary(
+        run_id=run_id,
+        status="completed",
+        processed=0,
+        inserted=0,
+        rejected=0,
+        skipped_cached=True,
+        errors=[],
+    )
+
+
+def run_pipeline(
+    file_path: str,
+    supplier_id: str,
+    record_type: str,
+    cache: RedisCache,
+    chunk_size: int | None = None,
+    persist_mode: str | None = None,
+    parse_workers: int | None = None,
+    run_id: str | None = None,
+    on_progress: Callable[[int], None] | None = None,
+    session: Session | None = None,
+) -> RunSummary:
+    run_id = run_id or str(uuid.uuid4())
+    start = time.time()
+    path = resolve_ingest_path(file_path)
+
+    logger.info(
+        "pipeline.start",
+        extra={
+            "run_id": run_id,
+            "supplier_id": supplier_id,
+            "record_type": record_type,
+            "file_path": str(path),
+        },
+    )
+
+    persist_mode = check_options(record_type, persist_mode)
+
+    labels = {"supplier_id": supplier_id, "record_type": record_type}
+    timer = StageTimer()
+    file_size = path.stat().st_size
+    with timer.measure("hash"):
+        file_hash = cache.file_hash(path)
+    timer.add("hash", nbytes=file_size)
+
+    cache_key = cache.build_key(supplier_id, record_type, path, file_hash)
+    with timer.measure("cache"):
+        cached = cache.exists(cache_key)
+    CACHE_EVENTS.inc(event="hit" if cached else "miss", **labels)
+    if cached:
+        timer.observe(supplier_id, record_type)
+        logger.info("pipeline.cached_skip", extra={"run_id": run_id, "file_path": str(path)})
+        return cached_summary(run_id)
+
+    checkpoint = cache.get_checkpoint(cache_key) or {}
+    resume_from = int(checkpoint.get("records", 0))
+    valid_before = int(checkpoint.get("valid", 0))
+    rejected_before = int(checkpoint.get("rejected", 0))
+    if resume_from:
+        logger.info("pipeline.resume", extra={"run_id": run_id, "file_path": str(path), "resume_from": resume_from})
+
+    chunk_size = chunk_size or settings.pipeline_chunk_size
+    parse_workers = settings.parse_workers if parse_workers is None else parse_workers
+    # Byte ranges cannot start at a record index, so resumed runs always take the serial path.
+    if parse_workers > 1 and supports_parallel_parse(path) and not resume_from:
+        chunks = _iter_timed(
+            iter_parallel_chunks(path, supplier_id, record_type, parse_workers, settings.parse_range_bytes),
+            timer,
+            "parallel_parse",
+        )
+        timer.add("parallel_parse", nbytes=file_size)
+    else:
+        if split_feed_suffix(path)[0] in JSON_FEED_EXTENSIONS:
+            # A bad JSON tail or NDJSON line only shows up after earlier chunks commit; reject it up front.
+            # Resumed runs check too, or a checkpoint saved before the bad line would be retried forever.
+            with timer.measure("precheck"):
+                check_json_feed(path)
+            timer.add("precheck", nbytes=file_size)
+        records = iter_records(path)
+        if resume_from:
+            records = islice(records, resume_from, None)
+        chunks = iter_validated_chunks(records, supplier_id, record_type, chunk_size, timer, resume_from + 1)
+        timer.add("load", nbytes=file_size)
+
+    def save_checkpoint(processed: int, valid: int, rejected: int) -> None:
+        cache.save_checkpoint(cache_key, resume_from + processed, valid_before + valid, rejected_before + rejected)
+
+    # Records flow through in fixed-size chunks so peak memory tracks chunk_size, not file size.
+    # A caller-provided session (see run_batch) is reused as is and left open.
+    with nullcontext(session) if session is not None else get_db_session() as session:
+        processed, inserted, valid_count, unchanged, errors = ingest_chunks(
+            session, chunks, record_type, persist_mode, run_id, timer, on_progress, save_checkpoint
+        )
+
+    with timer.measure("cache"):
+        if valid_before + valid_count or not resume_from + processed:
+            cache.set(cache_key)
+        cache.clear_checkpoint(cache_key)
+
+    return complete_run(
+        run_id,
+        supplier_id,
+        record_type,
+        str(path),
+        start,
+        timer,
+        processed,
+        inserted,
+        unchanged,
+        errors,
+        resume_from,
+        rejected_before,
+    )
@@ -0,0 +1,108 @@
+import logging
+import queue
+import threading
+import uuid
+from collections import OrderedDict
+
+from app.ingestion.cache import RedisCache
+from app.ingestion.pipeline import run_pipeline
+from app.models.pydantic_models import IngestRequest, RunStatus
+
+
+logger = logging.getLogger(__name__)
+_STOP = object()
+
+
+class RunQueueFullError(RuntimeError):
+    pass
+
+
+class IngestRunManager:
+    def __init__(self, cache: RedisCache, workers: int, queue_size: int, retention: int = 1000):
+        self.cache = cache
+        self.workers = max(1, workers)
+        self.retention = max(1, retention)
+        self._queue: queue.Queue = queue.Queue(maxsize=max(1, queue_size))
+        self._runs: OrderedDict[str, RunStatus] = OrderedDict()
+        self._lock = threading.Lock()
+        self._threads: list[threading.Thread] = []
+
+    def start(self) -> None:
+        if self._threads:
+            return
+        for number in range(self.workers):
+            thread = threading.Thread(target=self._work, name=f"ingest-run-{number}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def shutdown(self, timeout: float = 5.0) -> None:
+        for _ in self._threads:
+            try:
+                self._queue.put(_STOP, timeout=timeout)
+            except queue.Full:
+                break
+        for thread in self._threads:
+            thread.join(timeout=timeout)
+        self._threads.clear()
+
+    def submit(self, request: IngestRequest) -> RunStatus:
+        run_id = str(uuid.uuid4())
+        status = RunStatus(
+            run_id=run_id,
+            status="queued",
+            file_path=request.file_path,
+            supplier_id=request.supplier_id,
+            record_type=request.record_type,
+        )
+        with self._lock:
+            try:
+                self._queue.put_nowait((run_id, request))
+            except queue.Full as exc:
+                raise RunQueueFullError("Ingest queue is full") from exc
+            self._runs[run_id] = status
+            self._evict_finished()
+        logger.info("ingest_run.queued", extra={"run_id": run_id, "file_path": request.file_path})
+        return status.model_copy()
+
+    def get(self, run_id: str) -> RunStatus | None:
+        with self._lock:
+            status = self._runs.get(run_id)
+            return status.model_copy() if status else None
+
+    def _evict_finished(self) -> None:
+        # Bounded history: the oldest finished runs go first; queued/running runs are never evicted.
+        overflow = len(self._runs) - self.retention
+        for run_id in [run_id for run_id, run in self._runs.items() if run.status in {"completed", "failed"}]:
+            if overflow <= 0:
+                break
+            del self._runs[run_id]
+            overflow -= 1
+
+    def _update(self, run_id: str, **changes) -> None:
+        with self._lock:
+            status = self._runs.get(run_id)
+            if status is not None:
+                self._runs[run_id] = status.model_copy(update=changes)
+
+    def _work(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                return
+            run_id, request = item
+            self._update(run_id, status="running")
+            try:
+                summary = run_pipeline(
+                    request.file_path,
+                    request.supplier_id,
+                    request.record_type,
+                    self.cache,
+                    run_id=run_id,
+                    on_progress=lambda processed, run_id=run_id: self._update(run_id, processed=processed),
+                )
+                self._update(run_id, status="completed", processed=summary.processed, summary=summary)
+            except (ValueError, FileNotFoundError) as exc:
+                self._update(run_id, status="failed", error=str(exc))
+            except Exception:
+                logger.exception("ingest_run.failed", extra={"run_id": run_id})
+                self._update(run_id, status="failed", error="Ingestion failed")
@@ -0,0 +1,167 @@
+import hashlib
+import io
+import logging
+import queue
+import tempfile
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import BinaryIO
+
+from app.config import settings
+from app.db.session import get_db_session
+from app.ingestion.cache import RedisCache
+from app.ingestion.loaders import (
+    JSON_FEED_EXTENSIONS,
+    check_json_feed,
+    compression_available,
+    iter_records,
+    split_feed_suffix,
+    stream_parser,
+)
+from app.ingestion.pipeline import cached_summary, check_options, complete_run, ingest_chunks, iter_validated_chunks
+from app.metrics import CACHE_EVENTS, StageTimer
+from app.models.pydantic_models import RunSummary
+
+
+logger = logging.getLogger(__name__)
+_EOF = object()
+_FAILED = object()
+DRAIN_SIZE = 1 << 20
+
+
+class UploadInterruptedError(RuntimeError):
+    pass
+
+
+# Blocking reader over body chunks pushed from the event loop; hashes every byte as it is consumed.
+class UploadBodyStream(io.RawIOBase):
+    def __init__(self, max_chunks: int = 16):
+        self._chunks: queue.Queue = queue.Queue(maxsize=max(1, max_chunks))
+        self._pending = memoryview(b"")
+        self._eof = False
+        self._stopped = threading.Event()
+        self.hasher = hashlib.sha256()
+        self.size = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def _put(self, item) -> bool:
+        # Bounded queue: the producer waits for the parser, but gives up once the reader has stopped.
+        while not self._stopped.is_set():
+            try:
+                self._chunks.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def feed(self, chunk: bytes) -> bool:
+        return self._put(chunk) if chunk else not self._stopped.is_set()
+
+    def finish(self, failed: bool = False) -> None:
+        self._put(_FAILED if failed else _EOF)
+
+    def readinto(self, buffer) -> int:
+        while not self._pending:
+            if self._eof:
+                return 0
+            item = self._chunks.get()
+            if item is _FAILED:
+                raise UploadInterruptedError("Upload was interrupted")
+            if item is _EOF:
+                self._eof = True
+                return 0
+            self._pending = memoryview(item)
+        size = min(len(buffer), len(self._pending))
+        buffer[:size] = self._pending[:size]
+        self.hasher.update(self._pending[:size])
+        self.size += size
+        self._pending = self._pending[size:]
+        return size
+
+    def drain(self, sink: BinaryIO | None = None) -> str:
+        # Reads whatever is left, copying it to sink if given; the digest always covers the whole body.
+        buffer = bytearray(DRAIN_SIZE)
+        while size := self.readinto(buffer):
+            if sink is not None:
+                sink.write(memoryview(buffer)[:size])
+        return self.hasher.hexdigest()
+
+    def close(self) -> None:
+        self._stopped.set()
+        super().close()
+
+
+def run_upload_pipeline(
+    body: UploadBodyStream,
+    filename: str,
+    supplier_id: str,
+    record_type: str,
+    cache: RedisCache,
+    expected_sha256: str | None = None,
+    chunk_size: int | None = None,
+    persist_mode: str | None = None,
+) -> RunSummary:
+    run_id = str(uuid.uuid4())
+    start = time.time()
+    source = f"upload:{Path(filename).name}"
+    labels = {"supplier_id": supplier_id, "record_type": record_type}
+    logger.info(
+        "pipeline.start",
+        extra={"run_id": run_id, "supplier_id": supplier_id, "record_type": record_type, "file_path": source},
+    )
+
+    try:
+        persist_mode = check_options(record_type, persist_mode)
+        ext, compression = split_feed_suffix(Path(filename))
+        # Fail on an unsupported name or a missing decompressor before reading the body.
+        stream_parser(ext)
+        if not compression_available(compression):
+            raise ValueError("Reading .zst feeds requires the zstandard package")
+
+        timer = StageTimer()
+        if expected_sha256:
+            # A declared digest is the only way to skip a known body before reading it.
+            with timer.measure("cache"):
+                cached = cache.exists(cache.build_upload_key(supplier_id, record_type, expected_sha256.lower()))
+            if cached:
+                CACHE_EVENTS.inc(event="hit", **labels)
+                timer.observe(supplier_id, record_type)
+                logger.info("pipeline.cached_skip", extra={"run_id": run_id, "file_path": source})
+                return cached_summary(run_id)
+        CACHE_EVENTS.inc(event="miss", **labels)
+
+        # The body is spooled to a temporary file before any row is written. An interrupted body or a digest
+        # mismatch then leaves the database untouched, and rows commit per batch like /ingest, so product
+        # locks are never held while the client is still sending.
+        with tempfile.NamedTemporaryFile(prefix="upload-", suffix=ext + (compression or "")) as spool:
+            with timer.measure("spool"):
+                digest = body.drain(spool)
+                spool.flush()
+            timer.add("spool", nbytes=body.size)
+            if expected_sha256 and digest != expected_sha256.lower():
+                raise ValueError("Upload does not match the declared sha256")
+
+            path = Path(spool.name)
+            if ext in JSON_FEED_EXTENSIONS:
+                with timer.measure("precheck"):
+                    check_json_feed(path)
+                timer.add("precheck", nbytes=body.size)
+            chunk_size = chunk_size or settings.pipeline_chunk_size
+            chunks = iter_validated_chunks(iter_records(path), supplier_id, record_type, chunk_size, timer)
+            timer.add("load", nbytes=body.size)
+            with get_db_session() as session:
+                processed, inserted, _, unchanged, errors = ingest_chunks(
+                    session, chunks, record_type, persist_mode, run_id, timer
+                )
+
+        # Content-addressed, so the same bytes uploaded again under any filename are recognised.
+        with timer.measure("cache"):
+            cache.set(cache.build_upload_key(supplier_id, record_type, digest))
+    finally:
+        body.close()
+
+    return complete_run(run_id, supplier_id, record_type, source, start, timer, processed, inserted, unchanged, errors)
@@ -0,0 +1,39 @@
+from pydantic import TypeAdapter, ValidationError
+
+from app.models.pydantic_models import OrderIn, OrderRow, ProductIn, ProductRow
+
+
+MODELS = {"product": ProductIn, "order": OrderIn}
+BATCH_ADAPTERS = {
+    "product": TypeAdapter(list[ProductRow]),
+    "order": TypeAdapter(list[OrderRow]),
+}
+
+
+def _model_error(record_type: str, row: dict) -> str | None:
+    try:
+        MODELS[record_type](**row)
+    except (ValidationError, ValueError, TypeError) as exc:
+        return str(exc)
+    return None
+
+
+def validate_rows(rows: list[dict], record_type: str, start_index: int = 1) -> tuple[list[dict], list[dict]]:
+    adapter = BATCH_ADAPTERS[record_type]
+    try:
+        valid_rows = adapter.validate_python(rows)
+        failed: set[int] = set()
+    except ValidationError as exc:
+        failed = {error["loc"][0] for error in exc.errors() if error["loc"] and isinstance(error["loc"][0], int)}
+        valid_rows = adapter.validate_python([row for position, row in enumerate(rows) if position not in failed])
+
+    if record_type == "order":
+        for row in valid_rows:
+            row.setdefault("price", None)
+
+    # Rejected rows are rare; rebuilding the model keeps error text identical to per-row validation.
+    errors: list[dict] = []
+    for position in sorted(failed):
+        error = _model_error(record_type, rows[position]) or "validation failed"
+        errors.append({"index": start_index + position, "error": error})
+    return valid_rows, errors
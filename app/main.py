@@ -1,30 +1,66 @@
 ﻿from contextlib import asynccontextmanager
+from pathlib import Path
 
 from fastapi import FastAPI
 
 from app.api import routes
 from app.config import settings
 from app.db.base import Base
-from app.db.session import engine
+from app.db.partitions import prepare_partitioned_orders
+from app.db.repository import backfill_inventory_summary
+from app.db.schema import add_missing_columns
+from app.db.session import dispose_engine, get_db_session, get_engine
 from app.ingestion.cache import RedisCache
+from app.ingestion.runs import IngestRunManager
 from app.logging_config import configure_logging
 from app.scheduler.jobs import SupplierSyncScheduler
 
 
 configure_logging()
-cache = RedisCache(settings.redis_url, settings.cache_ttl_seconds)
+cache = RedisCache(
+    settings.redis_url,
+    settings.cache_ttl_seconds,
+    max_connections=settings.redis_max_connections,
+    socket_timeout=settings.redis_socket_timeout,
+    socket_connect_timeout=settings.redis_connect_timeout,
+    local_max_entries=settings.cache_local_max_entries,
+    local_path=Path(settings.cache_local_path) if settings.cache_local_path else None,
+    reconnect_interval=settings.redis_reconnect_seconds,
+)
 routes.cache_instance = cache
+run_manager = IngestRunManager(
+    cache,
+    workers=settings.ingest_workers,
+    queue_size=settings.ingest_queue_size,
+    retention=settings.ingest_run_retention,
+)
+routes.run_manager = run_manager
 scheduler = SupplierSyncScheduler(cache)
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    Base.metadata.create_all(bind=engine)
+    if settings.db_create_schema:
+        # Deployments that migrate the schema out of band skip this and the connection it needs at boot.
+        engine = get_engine()
+        if settings.orders_partitioned and engine.dialect.name == "postgresql":
+            # Must run before create_all, which would otherwise create orders as a plain table.
+            if not prepare_partitioned_orders(engine, settings.orders_partition_months_ahead):
+                # Every order write and the partition maintenance job would fail against the plain table.
+                raise RuntimeError("ORDERS_PARTITIONED is set but orders is an unpartitioned table")
+        Base.metadata.create_all(bind=engine)
+        add_missing_columns(engine)
+        with get_db_session() as session:
+            backfill_inventory_summary(session)
+    run_manager.start()
     scheduler.start()
     try:
         yield
     finally:
         scheduler.shutdown()
+        run_manager.shutdown()
+        cache.close()
+        dispose_engine()
 
 
 app = FastAPI(title=settings.app_name, lifespan=lifespan)
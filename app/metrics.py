@@ -0,0 +1,169 @@
+import math
+import threading
+import time
+from collections import defaultdict
+from collections.abc import Iterator
+from contextlib import contextmanager
+
+
+DURATION_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0, 900.0)
+ROW_BUCKETS = (0, 10, 100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+BYTE_BUCKETS = (1_024, 65_536, 1_048_576, 16_777_216, 134_217_728, 1_073_741_824, 8_589_934_592)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labelnames: tuple[str, ...], values: tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(labelnames, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Counter:
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._values: dict[tuple[str, ...], float] = defaultdict(float)
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            self._values[key] += amount
+
+    def value(self, **labels: str) -> float:
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            return self._values.get(key, 0.0)
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...], buckets: tuple[float, ...]):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.buckets = tuple(buckets) + (math.inf,)
+        self._counts: dict[tuple[str, ...], list[int]] = {}
+        self._sums: dict[tuple[str, ...], float] = defaultdict(float)
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            counts = self._counts.setdefault(key, [0] * len(self.buckets))
+            for position, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[position] += 1
+            self._sums[key] += value
+
+    def count(self, **labels: str) -> int:
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            counts = self._counts.get(key)
+            return counts[-1] if counts else 0
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, counts in sorted(self._counts.items()):
+                for bound, count in zip(self.buckets, counts):
+                    labels = _format_labels(self.labelnames, key, f'le="{_format_value(bound)}"')
+                    lines.append(f"{self.name}_bucket{labels} {count}")
+                labels = _format_labels(self.labelnames, key)
+                lines.append(f"{self.name}_sum{labels} {_format_value(self._sums[key])}")
+                lines.append(f"{self.name}_count{labels} {counts[-1]}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: list[Counter | Histogram] = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines: list[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+RUN_LABELS = ("supplier_id", "record_type")
+STAGE_LABELS = ("stage", "supplier_id", "record_type")
+
+STAGE_DURATION = REGISTRY.register(
+    Histogram("ingest_stage_duration_seconds", "Time spent per pipeline stage per run.", STAGE_LABELS, DURATION_BUCKETS)
+)
+STAGE_ROWS = REGISTRY.register(
+    Histogram("ingest_stage_rows", "Rows handled per pipeline stage per run.", STAGE_LABELS, ROW_BUCKETS)
+)
+STAGE_BYTES = REGISTRY.register(
+    Histogram("ingest_stage_bytes", "Bytes read per pipeline stage per run.", STAGE_LABELS, BYTE_BUCKETS)
+)
+CACHE_EVENTS = REGISTRY.register(
+    Counter("ingest_cache_events_total", "File-level cache lookups by result (hit or miss).", ("event", *RUN_LABELS))
+)
+ROWS_REJECTED = REGISTRY.register(
+    Counter("ingest_rows_rejected_total", "Rows rejected by validation.", RUN_LABELS)
+)
+ROWS_SKIPPED_UNCHANGED = REGISTRY.register(
+    Counter("ingest_rows_skipped_unchanged_total", "Valid rows skipped as unchanged.", RUN_LABELS)
+)
+DB_ROWS_WRITTEN = REGISTRY.register(
+    Counter("ingest_db_rows_written_total", "Rows written to the database.", RUN_LABELS)
+)
+
+
+class StageTimer:
+    def __init__(self):
+        self.seconds: dict[str, float] = defaultdict(float)
+        self.rows: dict[str, int] = defaultdict(int)
+        self.bytes: dict[str, int] = defaultdict(int)
+
+    @contextmanager
+    def measure(self, stage: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.seconds[stage] += time.perf_counter() - started
+
+    def add(self, stage: str, rows: int = 0, nbytes: int = 0) -> None:
+        self.rows[stage] += rows
+        if nbytes:
+            self.bytes[stage] += nbytes
+
+    def elapsed_ms(self) -> dict[str, int]:
+        return {stage: int(seconds * 1000) for stage, seconds in self.seconds.items()}
+
+    def observe(self, supplier_id: str, record_type: str) -> None:
+        for stage, seconds in self.seconds.items():
+            labels = {"stage": stage, "supplier_id": supplier_id, "record_type": record_type}
+            STAGE_DURATION.observe(seconds, **labels)
+            STAGE_ROWS.observe(self.rows.get(stage, 0), **labels)
+            if stage in self.bytes:
+                STAGE_BYTES.observe(self.bytes[stage], **labels)
+
+
+def render_metrics() -> str:
+    return REGISTRY.render()
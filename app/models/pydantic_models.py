@@ -1,10 +1,21 @@
-﻿from decimal import Decimal
-from typing import Literal, Optional
+﻿from datetime import datetime
+from decimal import Decimal
+from typing import Annotated, Literal, Optional
 
-from pydantic import BaseModel, ConfigDict, Field, ValidationError, field_validator
+from pydantic import AfterValidator, BaseModel, ConfigDict, Field, ValidationError, field_validator, with_config
+from typing_extensions import NotRequired, TypedDict
 
 SKU_PATTERN = r"^[A-Za-z0-9_-]{3,40}$"
 
+ProductStatus = Literal["active", "inactive", "backorder", "discontinued"]
+OrderStatus = Literal["pending", "processing", "shipped", "cancelled", "returned"]
+
+
+def _check_order_price(value: Optional[Decimal]) -> Optional[Decimal]:
+    if value is not None and value <= 0:
+        raise ValueError("price must be greater than 0 when provided")
+    return value
+
 
 class ProductIn(BaseModel):
     model_config = ConfigDict(str_strip_whitespace=True)
@@ -13,7 +24,7 @@ class ProductIn(BaseModel):
     price: Decimal = Field(..., gt=0)
     quantity: int = Field(..., ge=0)
     supplier_id: str = Field(..., min_length=1)
-    status: Literal["active", "inactive", "backorder", "discontinued"]
+    status: ProductStatus
 
 
 class OrderIn(BaseModel):
@@ -23,15 +34,33 @@ class OrderIn(BaseModel):
     sku: str = Field(..., pattern=SKU_PATTERN)
     quantity: int = Field(..., gt=0)
     supplier_id: str = Field(..., min_length=1)
-    status: Literal["pending", "processing", "shipped", "cancelled", "returned"]
+    status: OrderStatus
     price: Optional[Decimal] = None
 
     @field_validator("price")
     @classmethod
     def validate_price(cls, value: Optional[Decimal]) -> Optional[Decimal]:
-        if value is not None and value <= 0:
-            raise ValueError("price must be greater than 0 when provided")
-        return value
+        return _check_order_price(value)
+
+
+# Row schemas mirror ProductIn/OrderIn field for field; TypeAdapters validate them straight to dicts.
+@with_config(ConfigDict(str_strip_whitespace=True))
+class ProductRow(TypedDict):
+    sku: Annotated[str, Field(pattern=SKU_PATTERN)]
+    price: Annotated[Decimal, Field(gt=0)]
+    quantity: Annotated[int, Field(ge=0)]
+    supplier_id: Annotated[str, Field(min_length=1)]
+    status: ProductStatus
+
+
+@with_config(ConfigDict(str_strip_whitespace=True))
+class OrderRow(TypedDict):
+    order_id: Annotated[str, Field(min_length=1)]
+    sku: Annotated[str, Field(pattern=SKU_PATTERN)]
+    quantity: Annotated[int, Field(gt=0)]
+    supplier_id: Annotated[str, Field(min_length=1)]
+    status: OrderStatus
+    price: NotRequired[Annotated[Optional[Decimal], AfterValidator(_check_order_price)]]
 
 
 class IngestRequest(BaseModel):
@@ -47,9 +76,86 @@ class RunSummary(BaseModel):
     inserted: int
     rejected: int
     skipped_cached: bool
+    skipped_unchanged: int = 0
+    # Records skipped because a previous attempt on the same file had already committed them.
+    resumed_from: int = 0
     errors: list[dict]
 
 
+class IngestBatchRequest(BaseModel):
+    items: list[IngestRequest] = Field(..., min_length=1)
+
+
+class IngestBatchTotals(BaseModel):
+    items: int
+    completed: int
+    failed: int
+    skipped_cached: int
+    processed: int
+    inserted: int
+    rejected: int
+    skipped_unchanged: int
+    duration_ms: int
+
+
+class IngestBatchSummary(BaseModel):
+    items: list[RunSummary]
+    totals: IngestBatchTotals
+
+
+class RunHandle(BaseModel):
+    run_id: str
+    status: str
+
+
+class RunStatus(BaseModel):
+    run_id: str
+    status: Literal["queued", "running", "completed", "failed"]
+    file_path: str
+    supplier_id: str
+    record_type: str
+    processed: int = 0
+    summary: Optional[RunSummary] = None
+    error: Optional[str] = None
+
+
+class ProductOut(BaseModel):
+    sku: str
+    price: Decimal
+    quantity: int
+    supplier_id: str
+    status: str
+    updated_at: datetime
+
+
+class OrderOut(BaseModel):
+    order_id: str
+    sku: str
+    quantity: int
+    supplier_id: str
+    status: str
+    price: Optional[Decimal] = None
+    created_at: datetime
+
+
+class ProductPage(BaseModel):
+    items: list[ProductOut]
+    next_cursor: Optional[str] = None
+
+
+class OrderPage(BaseModel):
+    items: list[OrderOut]
+    next_cursor: Optional[str] = None
+
+
+class InventoryOut(BaseModel):
+    sku: str
+    total_quantity: int
+    available_quantity: int
+    supplier_count: int
+    updated_at: datetime
+
+
 class HealthStatus(BaseModel):
     status: str
     db: str
@@ -58,9 +164,23 @@ class HealthStatus(BaseModel):
 
 __all__ = [
     "HealthStatus",
+    "IngestBatchRequest",
+    "IngestBatchSummary",
+    "IngestBatchTotals",
     "IngestRequest",
+    "InventoryOut",
     "OrderIn",
+    "OrderOut",
+    "OrderPage",
+    "OrderRow",
+    "OrderStatus",
     "ProductIn",
+    "ProductOut",
+    "ProductPage",
+    "ProductRow",
+    "ProductStatus",
+    "RunHandle",
+    "RunStatus",
     "RunSummary",
     "SKU_PATTERN",
     "ValidationError",
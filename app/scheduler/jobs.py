@@ -1,20 +1,36 @@
 import logging
+import multiprocessing
+import threading
+import time
+from collections import Counter
+from collections.abc import Callable, Iterable
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
 from pathlib import Path
 
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.cron import CronTrigger
 
 from app.config import settings
+from app.db.partitions import maintain_order_partitions
+from app.db.session import get_engine
 from app.ingestion.cache import RedisCache
+from app.ingestion.loaders import compression_available, feed_stem, split_feed_suffix
 from app.ingestion.pipeline import run_pipeline
+from app.metrics import CACHE_EVENTS
+from app.scheduler.watcher import DirectoryWatcher
 
 
 logger = logging.getLogger(__name__)
-SUPPORTED_EXTENSIONS = {".csv", ".json", ".txt"}
+SUPPORTED_EXTENSIONS = {".csv", ".json", ".jsonl", ".ndjson", ".txt"}
+INCOMING_DIR = Path("data/incoming")
+EXECUTOR_KINDS = {"thread", "process"}
+_worker_cache: RedisCache | None = None
+# (file_path, supplier_id, record_type)
+Feed = tuple[Path, str, str]
 
 
 def _resolve_feed_metadata(file_path: Path) -> tuple[str, str] | None:
-    stem = file_path.stem.lower()
+    stem = feed_stem(file_path).lower()
     suffix_map = {
         "_order": "order",
         "_orders": "order",
@@ -32,22 +48,200 @@ def _resolve_feed_metadata(file_path: Path) -> tuple[str, str] | None:
     return None
 
 
+def _file_size(file_path: Path) -> int:
+    try:
+        return file_path.stat().st_size
+    except OSError:
+        return 0
+
+
+def _process_worker_cache() -> RedisCache:
+    # Redis clients cannot cross process boundaries, so each process worker builds its own once.
+    # Its local tier is memory-only; the scheduler process owns the persisted file.
+    global _worker_cache
+    if _worker_cache is None:
+        _worker_cache = RedisCache(
+            settings.redis_url,
+            settings.cache_ttl_seconds,
+            max_connections=settings.redis_max_connections,
+            socket_timeout=settings.redis_socket_timeout,
+            socket_connect_timeout=settings.redis_connect_timeout,
+            local_max_entries=settings.cache_local_max_entries,
+            reconnect_interval=settings.redis_reconnect_seconds,
+        )
+    return _worker_cache
+
+
+def _ingest_file(file_path: str, supplier_id: str, record_type: str, cache: RedisCache | None) -> dict:
+    started = time.perf_counter()
+    result = {"file_path": file_path, "supplier_id": supplier_id, "record_type": record_type}
+    try:
+        in_worker_process = cache is None
+        if in_worker_process:
+            cache = _process_worker_cache()
+        summary = run_pipeline(file_path, supplier_id, record_type, cache)
+        if in_worker_process:
+            # Hand the worker's digest back so the scheduler can precheck this file without reading it.
+            resolved = Path(file_path).resolve()
+            hash_entry = cache.hash_entry(resolved)
+            if hash_entry:
+                result["hash_entry"] = hash_entry
+                cache_key = cache.build_key(supplier_id, record_type, resolved, hash_entry[1])
+                if cache.local.contains(cache_key):
+                    result["cache_key"] = cache_key
+        result.update(
+            status="completed",
+            run_id=summary.run_id,
+            processed=summary.processed,
+            inserted=summary.inserted,
+            rejected=summary.rejected,
+            skipped_cached=summary.skipped_cached,
+            skipped_unchanged=summary.skipped_unchanged,
+        )
+    except Exception as exc:
+        logger.exception("pipeline.failed", extra={"file_path": file_path, "error": str(exc)})
+        result.update(status="failed", error=str(exc))
+    result["duration_ms"] = int((time.perf_counter() - started) * 1000)
+    return result
+
+
 class SupplierSyncScheduler:
     def __init__(self, cache: RedisCache):
         self.cache = cache
         self.scheduler = BackgroundScheduler()
+        self.watcher: DirectoryWatcher | None = None
+        self._active_files: set[Path] = set()
+        self._dirty_files: set[Path] = set()
+        self._active_lock = threading.Lock()
+        # Cron sweeps, watcher batches and reruns dispatch concurrently; they share one pool and one set of
+        # slots so SCHEDULER_WORKERS and SCHEDULER_PER_SUPPLIER_LIMIT hold across all of them.
+        self._executor: Executor | None = None
+        self._slots = threading.Condition()
+        self._running = 0
+        self._running_per_supplier: Counter[str] = Counter()
+
+    def _make_executor(self) -> Executor:
+        if settings.scheduler_executor not in EXECUTOR_KINDS:
+            raise ValueError("scheduler_executor must be 'thread' or 'process'")
+        workers = max(1, settings.scheduler_workers)
+        if settings.scheduler_executor == "process":
+            return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+        return ThreadPoolExecutor(max_workers=workers, thread_name_prefix="supplier-sync")
+
+    def _shared_executor(self) -> Executor:
+        with self._slots:
+            if self._executor is None:
+                self._executor = self._make_executor()
+            return self._executor
+
+    def _free_slot(self, supplier_id: str) -> Callable[[Future], None]:
+        def free(_: Future) -> None:
+            with self._slots:
+                self._running -= 1
+                self._running_per_supplier[supplier_id] -= 1
+                self._slots.notify_all()
+
+        return free
+
+    def _precheck_cache(self, feeds: list[Feed]) -> tuple[list[dict], list[Feed]]:
+        # Only digests already indexed for a file's current stat() are looked up, in one pipelined EXISTS.
+        # Anything else is hashed by its worker right before the run, so this thread never reads a feed
+        # and no worker is handed a key computed from older bytes.
+        keyed: list[tuple[Feed, str | None]] = []
+        for feed in feeds:
+            file_path, supplier_id, record_type = feed
+            resolved = file_path.resolve()
+            file_hash = self.cache.indexed_hash(resolved)
+            cache_key = self.cache.build_key(supplier_id, record_type, resolved, file_hash) if file_hash else None
+            keyed.append((feed, cache_key))
+
+        found = self.cache.exists_many([cache_key for _, cache_key in keyed if cache_key])
+        cached: list[dict] = []
+        pending: list[Feed] = []
+        for feed, cache_key in keyed:
+            file_path, supplier_id, record_type = feed
+            if not (cache_key and found.get(cache_key)):
+                pending.append(feed)
+                continue
+            CACHE_EVENTS.inc(event="hit", supplier_id=supplier_id, record_type=record_type)
+            logger.info("pipeline.cached_skip", extra={"file_path": str(file_path)})
+            cached.append(
+                {
+                    "file_path": str(file_path),
+                    "supplier_id": supplier_id,
+                    "record_type": record_type,
+                    "status": "completed",
+                    "processed": 0,
+                    "inserted": 0,
+                    "rejected": 0,
+                    "skipped_cached": True,
+                    "skipped_unchanged": 0,
+                    "duration_ms": 0,
+                }
+            )
+        return cached, pending
 
-    def _run_sync(self) -> None:
-        logger.info("scheduler.run_start")
-        incoming_dir = Path("data/incoming")
-        if not incoming_dir.exists():
-            logger.info("scheduler.run_end", extra={"processed_files": 0, "skipped_files": 0})
-            return
+    def _dispatch(self, feeds: list[Feed]) -> list[dict]:
+        workers = max(1, settings.scheduler_workers)
+        supplier_limit = max(1, settings.scheduler_per_supplier_limit)
+        worker_cache = None if settings.scheduler_executor == "process" else self.cache
+        executor = self._shared_executor()
 
-        processed = 0
+        # Largest files first so the longest runs start early and do not trail the batch.
+        pending = sorted(feeds, key=lambda feed: _file_size(feed[0]), reverse=True)
+        in_flight: set[Future] = set()
+        finished: list[Future] = []
+
+        with self._slots:
+            while pending or in_flight:
+                for feed in list(pending):
+                    if self._running >= workers:
+                        break
+                    file_path, supplier_id, record_type = feed
+                    if self._running_per_supplier[supplier_id] >= supplier_limit:
+                        continue
+                    pending.remove(feed)
+                    self._running += 1
+                    self._running_per_supplier[supplier_id] += 1
+                    future = executor.submit(_ingest_file, str(file_path), supplier_id, record_type, worker_cache)
+                    future.add_done_callback(self._free_slot(supplier_id))
+                    in_flight.add(future)
+
+                done = {future for future in in_flight if future.done()}
+                if done:
+                    in_flight -= done
+                    finished.extend(done)
+                else:
+                    # Woken whenever any dispatch's run finishes, since that may free a slot for this one too.
+                    self._slots.wait()
+
+        results: list[dict] = []
+        for future in finished:
+            result = future.result()
+            hash_entry = result.pop("hash_entry", None)
+            if hash_entry:
+                self.cache.restore_hash_entry(Path(result["file_path"]).resolve(), hash_entry)
+            cache_key = result.pop("cache_key", None)
+            if cache_key:
+                # Mirror marks made in worker processes so the local tier covers them during Redis outages.
+                self.cache.local.add_many([cache_key])
+            results.append(result)
+        return results
+
+    def _candidate_feeds(self, paths: Iterable[Path]) -> tuple[list[Feed], int]:
+        feeds: list[Feed] = []
         skipped = 0
-        for file_path in incoming_dir.iterdir():
-            if file_path.suffix.lower() not in SUPPORTED_EXTENSIONS:
+        for file_path in paths:
+            extension, compression = split_feed_suffix(file_path)
+            if extension not in SUPPORTED_EXTENSIONS:
+                continue
+            if not compression_available(compression):
+                # Left in place, so the feed is picked up once zstandard is installed.
+                skipped += 1
+                logger.warning(
+                    "scheduler.file_skipped",
+                    extra={"file_path": str(file_path), "reason": "reading .zst feeds requires the zstandard package"},
+                )
                 continue
 
             metadata = _resolve_feed_metadata(file_path)
@@ -63,13 +257,62 @@ class SupplierSyncScheduler:
                 continue
 
             supplier_id, record_type = metadata
-            try:
-                run_pipeline(str(file_path), supplier_id, record_type, self.cache)
-            except Exception as exc:
-                logger.exception("pipeline.failed", extra={"file_path": str(file_path), "error": str(exc)})
-            processed += 1
+            feeds.append((file_path, supplier_id, record_type))
+        return feeds, skipped
+
+    def _claim(self, feeds: list[Feed]) -> list[Feed]:
+        # The cron sweep and watcher batches can overlap; a file is only ever ingested by one of them at a time.
+        with self._active_lock:
+            busy = {feed[0] for feed in feeds if feed[0] in self._active_files}
+            # An event for a file mid-ingest may mean it changed again; rerun it once the current run releases it.
+            self._dirty_files.update(busy)
+            claimed = [feed for feed in feeds if feed[0] not in busy]
+            self._active_files.update(feed[0] for feed in claimed)
+        return claimed
+
+    def _release(self, feeds: list[Feed]) -> list[Path]:
+        released = {feed[0] for feed in feeds}
+        with self._active_lock:
+            self._active_files.difference_update(released)
+            rerun = sorted(self._dirty_files & released)
+            self._dirty_files.difference_update(rerun)
+        return rerun
+
+    def _sync_paths(self, paths: Iterable[Path], trigger: str) -> list[dict]:
+        logger.info("scheduler.run_start", extra={"trigger": trigger})
+        started = time.perf_counter()
+        feeds, skipped = self._candidate_feeds(paths)
+        feeds = self._claim(feeds)
+        try:
+            results, pending = self._precheck_cache(feeds) if feeds else ([], [])
+            if pending:
+                results.extend(self._dispatch(pending))
+        finally:
+            rerun = self._release(feeds)
+            if rerun:
+                self.scheduler.add_job(self._sync_paths, args=[rerun, "watch"])
+        logger.info(
+            "scheduler.run_end",
+            extra={
+                "trigger": trigger,
+                "processed_files": len(results),
+                "skipped_files": skipped,
+                "failed_files": sum(1 for result in results if result["status"] == "failed"),
+                "elapsed_ms": int((time.perf_counter() - started) * 1000),
+                "files": results,
+            },
+        )
+        return results
+
+    def _run_sync(self) -> list[dict]:
+        if not INCOMING_DIR.exists():
+            logger.info("scheduler.run_end", extra={"trigger": "cron", "processed_files": 0, "skipped_files": 0})
+            return []
+        return self._sync_paths(INCOMING_DIR.iterdir(), trigger="cron")
 
-        logger.info("scheduler.run_end", extra={"processed_files": processed, "skipped_files": skipped})
+    def _on_files_ready(self, paths: list[Path]) -> None:
+        # Runs on the watcher thread; hand the batch to the scheduler pool so the watcher keeps draining events.
+        self.scheduler.add_job(self._sync_paths, args=[paths, "watch"])
 
     def start(self) -> None:
         self.scheduler.add_job(
@@ -78,7 +321,36 @@ class SupplierSyncScheduler:
             id="daily_supplier_sync",
             replace_existing=True,
         )
+        if settings.orders_partitioned and get_engine().dialect.name == "postgresql":
+            self.scheduler.add_job(
+                maintain_order_partitions,
+                CronTrigger.from_crontab(settings.partition_maintenance_cron),
+                args=[
+                    get_engine(),
+                    settings.orders_partition_months_ahead,
+                    settings.orders_retention_months,
+                    settings.orders_retention_action,
+                ],
+                id="orders_partition_maintenance",
+                replace_existing=True,
+            )
         self.scheduler.start()
+        if settings.scheduler_watch:
+            self.watcher = DirectoryWatcher(
+                INCOMING_DIR,
+                self._on_files_ready,
+                debounce_seconds=settings.watch_debounce_seconds,
+                poll_interval=settings.watch_poll_seconds,
+                backend=settings.watch_backend,
+            )
+            self.watcher.start()
 
     def shutdown(self) -> None:
-        self.scheduler.shutdown(wait=False)
\ No newline at end of file
+        if self.watcher is not None:
+            self.watcher.stop()
+            self.watcher = None
+        self.scheduler.shutdown(wait=False)
+        with self._slots:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
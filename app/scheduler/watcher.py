@@ -0,0 +1,194 @@
+import ctypes
+import ctypes.util
+import logging
+import os
+import select
+import struct
+import threading
+import time
+from collections.abc import Callable, Iterator
+from pathlib import Path
+
+
+logger = logging.getLogger(__name__)
+WATCH_BACKENDS = {"auto", "inotify", "poll"}
+
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_Q_OVERFLOW = 0x00004000
+IN_ISDIR = 0x40000000
+WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+_EVENT_HEADER = struct.Struct("iIII")
+_READ_SIZE = 64 * 1024
+# Upper bound on how long stop() waits for the loop to notice.
+_MAX_WAIT_SECONDS = 1.0
+
+
+def _load_libc():
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+    except OSError:
+        return None
+    return libc if hasattr(libc, "inotify_init1") else None
+
+
+def _parse_events(data: bytes) -> Iterator[tuple[int, str]]:
+    offset = 0
+    while offset + _EVENT_HEADER.size <= len(data):
+        _, mask, _, name_len = _EVENT_HEADER.unpack_from(data, offset)
+        offset += _EVENT_HEADER.size
+        name = data[offset : offset + name_len].split(b"\0", 1)[0].decode("utf-8", "surrogateescape")
+        offset += name_len
+        yield mask, name
+
+
+def _fingerprint(path: Path) -> tuple[int, int] | None:
+    try:
+        stat = path.stat()
+    except OSError:
+        return None
+    return stat.st_size, stat.st_mtime_ns
+
+
+# Reports files in one directory once they have stopped changing for `debounce_seconds`.
+class DirectoryWatcher:
+    def __init__(
+        self,
+        directory: Path,
+        on_ready: Callable[[list[Path]], None],
+        debounce_seconds: float = 2.0,
+        poll_interval: float = 5.0,
+        backend: str = "auto",
+    ):
+        if backend not in WATCH_BACKENDS:
+            raise ValueError("watch backend must be 'auto', 'inotify' or 'poll'")
+        self.directory = directory
+        self.on_ready = on_ready
+        self.debounce_seconds = debounce_seconds
+        self.poll_interval = poll_interval
+        self.backend = backend
+        # path -> (monotonic time of the last change, fingerprint seen then)
+        self._pending: dict[Path, tuple[float, tuple[int, int] | None]] = {}
+        self._snapshot: dict[Path, tuple[int, int]] = {}
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._inotify_fd: int | None = None
+        self.active_backend: str | None = None
+
+    def start(self) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        if self.backend != "poll":
+            self._inotify_fd = self._open_inotify()
+            if self._inotify_fd is None and self.backend == "inotify":
+                raise RuntimeError("inotify is not available on this platform")
+        if self._inotify_fd is None:
+            self._snapshot = self._scan()
+        self.active_backend = "inotify" if self._inotify_fd is not None else "poll"
+
+        self._stop.clear()
+        target = self._inotify_loop if self._inotify_fd is not None else self._poll_loop
+        self._thread = threading.Thread(target=target, name="incoming-watcher", daemon=True)
+        self._thread.start()
+        logger.info("watcher.started", extra={"directory": str(self.directory), "backend": self.active_backend})
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        if self._inotify_fd is not None:
+            os.close(self._inotify_fd)
+            self._inotify_fd = None
+
+    def _open_inotify(self) -> int | None:
+        libc = _load_libc()
+        if libc is None:
+            return None
+        fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if fd < 0:
+            logger.warning("watcher.inotify_unavailable", extra={"errno": ctypes.get_errno()})
+            return None
+        if libc.inotify_add_watch(fd, os.fsencode(self.directory), WATCH_MASK) < 0:
+            logger.warning("watcher.inotify_unavailable", extra={"errno": ctypes.get_errno()})
+            os.close(fd)
+            return None
+        return fd
+
+    def _scan(self) -> dict[Path, tuple[int, int]]:
+        snapshot: dict[Path, tuple[int, int]] = {}
+        try:
+            entries = list(os.scandir(self.directory))
+        except OSError:
+            return snapshot
+        for entry in entries:
+            try:
+                if entry.is_file():
+                    stat = entry.stat()
+                    snapshot[Path(entry.path)] = (stat.st_size, stat.st_mtime_ns)
+            except OSError:
+                continue
+        return snapshot
+
+    def _touch(self, path: Path) -> None:
+        self._pending[path] = (time.monotonic(), _fingerprint(path))
+
+    def _wait_seconds(self, idle: float) -> float:
+        if not self._pending:
+            return min(idle, _MAX_WAIT_SECONDS)
+        oldest = min(changed_at for changed_at, _ in self._pending.values())
+        due = oldest + self.debounce_seconds - time.monotonic()
+        return max(0.0, min(idle, due, _MAX_WAIT_SECONDS))
+
+    def _flush_ready(self) -> None:
+        now = time.monotonic()
+        ready: list[Path] = []
+        for path, (changed_at, fingerprint) in list(self._pending.items()):
+            if now - changed_at < self.debounce_seconds:
+                continue
+            current = _fingerprint(path)
+            if current is None:
+                del self._pending[path]
+            elif current != fingerprint:
+                # Still being written; restart the quiet period.
+                self._pending[path] = (now, current)
+            else:
+                del self._pending[path]
+                ready.append(path)
+        if not ready:
+            return
+        try:
+            self.on_ready(sorted(ready))
+        except Exception:
+            logger.exception("watcher.dispatch_failed", extra={"files": [str(path) for path in ready]})
+
+    def _inotify_loop(self) -> None:
+        fd = self._inotify_fd
+        while not self._stop.is_set():
+            readable, _, _ = select.select([fd], [], [], self._wait_seconds(_MAX_WAIT_SECONDS))
+            if readable:
+                try:
+                    data = os.read(fd, _READ_SIZE)
+                except BlockingIOError:
+                    data = b""
+                for mask, name in _parse_events(data):
+                    if mask & IN_Q_OVERFLOW:
+                        # Events were dropped by the kernel; treat everything present as changed.
+                        for path in self._scan():
+                            self._touch(path)
+                    elif name and not mask & IN_ISDIR:
+                        self._touch(self.directory / name)
+            self._flush_ready()
+
+    def _poll_loop(self) -> None:
+        next_scan = time.monotonic() + self.poll_interval
+        while not self._stop.wait(self._wait_seconds(max(0.0, next_scan - time.monotonic()))):
+            if time.monotonic() >= next_scan:
+                current = self._scan()
+                for path, fingerprint in current.items():
+                    if self._snapshot.get(path) != fingerprint:
+                        self._touch(path)
+                self._snapshot = current
+                next_scan = time.monotonic() + self.poll_interval
+            self._flush_ready()
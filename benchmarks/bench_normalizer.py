@@ -0,0 +1,53 @@
+import argparse
+import json
+import time
+
+from app.ingestion.normalizer import normalize_record, normalize_records
+
+
+def _rows(count: int) -> list[dict]:
+    return [
+        {
+            "Item_SKU": f"SKU-{n}",
+            "Qty": str(n % 500),
+            "Vendor": "supplier_bench",
+            "State": "ACTIVE",
+            "Unit_Price": f"{n % 90 + 1}.99",
+        }
+        for n in range(count)
+    ]
+
+
+def _best_of(repeats: int, func) -> float:
+    timings = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare per-record and header-compiled normalization.")
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    rows = _rows(args.rows)
+    per_record = _best_of(args.repeats, lambda: [normalize_record(row, "fallback", "product") for row in rows])
+    compiled = _best_of(args.repeats, lambda: normalize_records(rows, "fallback", "product"))
+
+    print(
+        json.dumps(
+            {
+                "rows": args.rows,
+                "per_record_rows_per_sec": round(args.rows / per_record),
+                "compiled_rows_per_sec": round(args.rows / compiled),
+                "per_row_speedup": round(per_record / compiled, 2),
+            }
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+import argparse
+import csv
+import json
+import random
+from collections.abc import Iterator
+from pathlib import Path
+
+from app.ingestion.normalizer import KEY_ALIASES
+
+
+FORMATS = ("csv", "json", "txt")
+PRODUCT_STATUSES = ("active", "inactive", "backorder", "discontinued")
+ORDER_STATUSES = ("pending", "processing", "shipped", "cancelled", "returned")
+PRODUCT_FIELDS = ("sku", "price", "quantity", "supplier_id", "status")
+ORDER_FIELDS = ("order_id", "sku", "quantity", "supplier_id", "status", "price")
+# Every corruption breaks exactly one validation rule.
+CORRUPTIONS = {
+    "sku": "bad sku!",
+    "quantity": "lots",
+    "price": "-1.00",
+    "status": "unknown",
+}
+
+
+def _canonical_rows(
+    rng: random.Random,
+    record_type: str,
+    rows: int,
+    supplier_id: str,
+    error_rate: float,
+    duplicate_rate: float,
+) -> Iterator[dict]:
+    statuses = PRODUCT_STATUSES if record_type == "product" else ORDER_STATUSES
+    for n in range(rows):
+        # Duplicates reuse an earlier key so upserts hit the conflict path.
+        key_number = rng.randrange(n) if n and rng.random() < duplicate_rate else n
+        row = {
+            "sku": f"SKU-{key_number:08d}",
+            "quantity": str(rng.randint(1, 500)),
+            "supplier_id": supplier_id,
+            "status": rng.choice(statuses),
+            "price": f"{rng.randint(1, 50_000) / 100:.2f}",
+        }
+        if record_type == "order":
+            row["order_id"] = f"ORD-{key_number:010d}"
+        if rng.random() < error_rate:
+            field = rng.choice(tuple(CORRUPTIONS))
+            row[field] = CORRUPTIONS[field]
+        yield row
+
+
+def _aliased(row: dict, aliases: dict[str, str]) -> dict:
+    return {aliases[field]: value for field, value in row.items()}
+
+
+def _random_aliases(rng: random.Random, fields: tuple[str, ...]) -> dict[str, str]:
+    return {field: rng.choice(KEY_ALIASES[field]) for field in fields}
+
+
+def generate_feed(
+    path: Path,
+    record_type: str = "product",
+    rows: int = 1_000,
+    seed: int = 0,
+    error_rate: float = 0.01,
+    duplicate_rate: float = 0.01,
+    supplier_id: str = "bench_supplier",
+) -> Path:
+    fmt = path.suffix.lower().lstrip(".")
+    if fmt not in FORMATS:
+        raise ValueError(f"Unsupported benchmark format: {fmt}")
+    if record_type not in {"product", "order"}:
+        raise ValueError("record_type must be 'product' or 'order'")
+
+    rng = random.Random(seed)
+    fields = PRODUCT_FIELDS if record_type == "product" else ORDER_FIELDS
+    canonical = _canonical_rows(rng, record_type, rows, supplier_id, error_rate, duplicate_rate)
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    with path.open("w", encoding="utf-8", newline="") as file:
+        if fmt == "csv":
+            # A CSV header is fixed per file, so the seed picks one alias layout for the whole feed.
+            aliases = _random_aliases(rng, fields)
+            writer = csv.writer(file)
+            writer.writerow(aliases[field] for field in fields)
+            for row in canonical:
+                writer.writerow(row[field] for field in fields)
+        elif fmt == "json":
+            file.write("[")
+            for position, row in enumerate(canonical):
+                if position:
+                    file.write(",\n")
+                json.dump(_aliased(row, _random_aliases(rng, fields)), file)
+            file.write("]\n")
+        else:
+            for row in canonical:
+                aliased = _aliased(row, _random_aliases(rng, fields))
+                file.write(",".join(f"{key}:{value}" for key, value in aliased.items()) + "\n")
+    return path
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Generate a seeded synthetic supplier feed.")
+    parser.add_argument("path", type=Path, help="Output file; the suffix (.csv/.json/.txt) selects the format.")
+    parser.add_argument("--record-type", choices=("product", "order"), default="product")
+    parser.add_argument("--rows", type=int, default=1_000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--error-rate", type=float, default=0.01)
+    parser.add_argument("--duplicate-rate", type=float, default=0.01)
+    args = parser.parse_args()
+
+    generate_feed(args.path, args.record_type, args.rows, args.seed, args.error_rate, args.duplicate_rate)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,246 @@
+import argparse
+import json
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import defaultdict
+from collections.abc import Iterator
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.db.base import Base
+from app.db.repository import upsert_orders, upsert_products
+from app.ingestion import pipeline
+from app.ingestion.cache import RedisCache
+from app.ingestion.loaders import iter_chunks, iter_records
+from app.ingestion.normalizer import normalize_records
+from app.ingestion.validation import validate_rows
+from benchmarks.generator import FORMATS, generate_feed
+
+
+class FakeRedis:
+    def __init__(self):
+        self.keys: dict[str, str] = {}
+
+    def ping(self) -> bool:
+        return True
+
+    def exists(self, key: str) -> int:
+        return int(key in self.keys)
+
+    def get(self, key: str) -> str | None:
+        return self.keys.get(key)
+
+    def setex(self, key: str, ttl: int, value: str) -> None:
+        self.keys[key] = value
+
+    def delete(self, key: str) -> None:
+        self.keys.pop(key, None)
+
+
+class StageStats:
+    def __init__(self, trace_memory: bool):
+        self.trace_memory = trace_memory
+        self.seconds: dict[str, float] = defaultdict(float)
+        self.rows: dict[str, int] = defaultdict(int)
+        self.peak_bytes: dict[str, int] = defaultdict(int)
+
+    @contextmanager
+    def measure(self, stage: str, rows: int = 0) -> Iterator[None]:
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+            baseline = tracemalloc.get_traced_memory()[0]
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.seconds[stage] += time.perf_counter() - started
+            self.rows[stage] += rows
+            if self.trace_memory:
+                peak = tracemalloc.get_traced_memory()[1] - baseline
+                self.peak_bytes[stage] = max(self.peak_bytes[stage], peak)
+
+    def report(self) -> dict:
+        return {
+            stage: {
+                "seconds": round(seconds, 6),
+                "rows": self.rows[stage],
+                "rows_per_sec": round(self.rows[stage] / seconds, 1) if seconds > 0 else None,
+                **({"peak_bytes": self.peak_bytes[stage]} if self.trace_memory else {}),
+            }
+            for stage, seconds in self.seconds.items()
+        }
+
+
+def _session_factory(workdir: Path, name: str) -> sessionmaker:
+    engine = create_engine(f"sqlite:///{workdir / name}")
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    return sessionmaker(bind=engine, autoflush=False, autocommit=False)
+
+
+def _run_stages(path: Path, record_type: str, chunk_size: int, sessions: sessionmaker, trace_memory: bool) -> dict:
+    stats = StageStats(trace_memory)
+    upsert = upsert_products if record_type == "product" else upsert_orders
+    records = iter_records(path)
+    chunks = iter_chunks(records, chunk_size)
+    processed = 0
+
+    with sessions() as session:
+        while True:
+            with stats.measure("load_records"):
+                chunk = next(chunks, None)
+            if chunk is None:
+                break
+            stats.rows["load_records"] += len(chunk)
+
+            with stats.measure("normalize_records", rows=len(chunk)):
+                normalized = normalize_records(chunk, supplier_id="bench_supplier", record_type=record_type)
+            with stats.measure("validation", rows=len(normalized)):
+                valid_rows, _ = validate_rows(normalized, record_type, start_index=processed + 1)
+            processed += len(normalized)
+            with stats.measure(upsert.__name__, rows=len(valid_rows)):
+                upsert(session, valid_rows)
+
+    return stats.report()
+
+
+@contextmanager
+def _pipeline_sandbox(workdir: Path, sessions: sessionmaker) -> Iterator[None]:
+    original_root, original_session = pipeline.ALLOWED_INGEST_ROOT, pipeline.get_db_session
+
+    @contextmanager
+    def bench_session():
+        with sessions() as session:
+            yield session
+
+    pipeline.ALLOWED_INGEST_ROOT = workdir.resolve()
+    pipeline.get_db_session = bench_session
+    try:
+        yield
+    finally:
+        pipeline.ALLOWED_INGEST_ROOT, pipeline.get_db_session = original_root, original_session
+
+
+def _run_end_to_end(path: Path, record_type: str, chunk_size: int, sessions: sessionmaker, trace_memory: bool) -> dict:
+    cache = RedisCache("redis://127.0.0.1:1/0", ttl_seconds=3600, reconnect_interval=0)
+    cache.client = FakeRedis()
+    stats = StageStats(trace_memory)
+
+    with _pipeline_sandbox(path.parent, sessions):
+        with stats.measure("run_pipeline"):
+            summary = pipeline.run_pipeline(
+                str(path), "bench_supplier", record_type, cache, chunk_size=chunk_size, parse_workers=0
+            )
+    stats.rows["run_pipeline"] = summary.processed
+
+    report = stats.report()["run_pipeline"]
+    report.update(inserted=summary.inserted, rejected=summary.rejected, skipped_unchanged=summary.skipped_unchanged)
+    return report
+
+
+def run_benchmarks(
+    sizes: list[int],
+    formats: list[str],
+    record_types: list[str],
+    seed: int = 0,
+    error_rate: float = 0.01,
+    duplicate_rate: float = 0.01,
+    chunk_size: int = 5_000,
+    trace_memory: bool = True,
+    workdir: Path | None = None,
+) -> dict:
+    results: list[dict] = []
+    with tempfile.TemporaryDirectory(dir=workdir) as tmp:
+        tmpdir = Path(tmp)
+        for record_type in record_types:
+            for fmt in formats:
+                for rows in sizes:
+                    feed = generate_feed(
+                        tmpdir / f"bench_{record_type}s_{rows}.{fmt}",
+                        record_type=record_type,
+                        rows=rows,
+                        seed=seed,
+                        error_rate=error_rate,
+                        duplicate_rate=duplicate_rate,
+                    )
+                    if trace_memory:
+                        tracemalloc.start()
+                    try:
+                        stages = _run_stages(feed, record_type, chunk_size, _session_factory(tmpdir, "stages.db"), trace_memory)
+                        end_to_end = _run_end_to_end(
+                            feed, record_type, chunk_size, _session_factory(tmpdir, "e2e.db"), trace_memory
+                        )
+                    finally:
+                        if trace_memory:
+                            tracemalloc.stop()
+                    results.append(
+                        {
+                            "record_type": record_type,
+                            "format": fmt,
+                            "rows": rows,
+                            "file_bytes": feed.stat().st_size,
+                            "stages": stages,
+                            "end_to_end": end_to_end,
+                        }
+                    )
+                    feed.unlink()
+
+    return {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "seed": seed,
+            "error_rate": error_rate,
+            "duplicate_rate": duplicate_rate,
+            "chunk_size": chunk_size,
+            "trace_memory": trace_memory,
+        },
+        "results": results,
+    }
+
+
+def _csv_list(value: str) -> list[str]:
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Measure ingestion throughput per stage and end to end.")
+    parser.add_argument("--sizes", default="1000,10000,100000", help="Comma-separated row counts (1k to 5M).")
+    parser.add_argument("--formats", default=",".join(FORMATS))
+    parser.add_argument("--record-types", default="product,order")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--error-rate", type=float, default=0.01)
+    parser.add_argument("--duplicate-rate", type=float, default=0.01)
+    parser.add_argument("--chunk-size", type=int, default=5_000)
+    parser.add_argument("--no-memory", action="store_true", help="Skip tracemalloc; timings are then undistorted.")
+    parser.add_argument("--output", type=Path, help="Write JSON results here instead of stdout.")
+    args = parser.parse_args()
+
+    report = run_benchmarks(
+        sizes=[int(size) for size in _csv_list(args.sizes)],
+        formats=_csv_list(args.formats),
+        record_types=_csv_list(args.record_types),
+        seed=args.seed,
+        error_rate=args.error_rate,
+        duplicate_rate=args.duplicate_rate,
+        chunk_size=args.chunk_size,
+        trace_memory=not args.no_memory,
+    )
+    payload = json.dumps(report, indent=2)
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(payload + "\n", encoding="utf-8")
+    else:
+        print(payload)
+
+
+if __name__ == "__main__":
+    main()
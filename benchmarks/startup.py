@@ -0,0 +1,101 @@
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+from datetime import datetime, timezone
+from pathlib import Path
+
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+# Nothing listens on port 1, so the probe also shows that startup no longer waits on Redis.
+UNREACHABLE_REDIS_URL = "redis://127.0.0.1:1/0"
+
+# Runs in a fresh interpreter so every sample pays the full cold import.
+_PROBE = """
+import asyncio
+import json
+import time
+
+started = time.perf_counter()
+import app.main
+imported = time.perf_counter()
+
+
+async def cycle():
+    async with app.main.lifespan(app.main.app):
+        ready = time.perf_counter()
+    return ready
+
+
+ready = asyncio.run(cycle())
+print(json.dumps({"import_seconds": imported - started, "startup_seconds": ready - imported}))
+"""
+
+
+def _probe(workdir: Path, create_schema: bool) -> dict:
+    env = {
+        **os.environ,
+        "PYTHONPATH": os.pathsep.join(filter(None, [str(REPO_ROOT), os.environ.get("PYTHONPATH")])),
+        "DATABASE_URL": f"sqlite:///{workdir / 'startup.db'}",
+        "REDIS_URL": UNREACHABLE_REDIS_URL,
+        "DB_CREATE_SCHEMA": "true" if create_schema else "false",
+        "SCHEDULER_WATCH": "false",
+        "CACHE_LOCAL_PATH": "",
+        "LOG_LEVEL": "WARNING",
+    }
+    result = subprocess.run(
+        [sys.executable, "-c", _PROBE], cwd=workdir, env=env, capture_output=True, text=True, check=True
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def _summarize(samples: list[float]) -> dict:
+    return {
+        "min": round(min(samples), 6),
+        "median": round(statistics.median(samples), 6),
+        "max": round(max(samples), 6),
+    }
+
+
+def run_startup_benchmark(repeats: int = 5, workdir: Path | None = None) -> dict:
+    results: dict[str, dict] = {}
+    with tempfile.TemporaryDirectory(dir=workdir) as tmp:
+        tmpdir = Path(tmp)
+        for mode, create_schema in (("create_schema", True), ("skip_schema", False)):
+            samples = [_probe(tmpdir, create_schema) for _ in range(repeats)]
+            results[mode] = {
+                "import_seconds": _summarize([sample["import_seconds"] for sample in samples]),
+                "startup_seconds": _summarize([sample["startup_seconds"] for sample in samples]),
+            }
+
+    return {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "repeats": repeats,
+        },
+        "results": results,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Measure cold import and lifespan startup time of the API.")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--output", type=Path, help="Write JSON results here instead of stdout.")
+    args = parser.parse_args()
+
+    payload = json.dumps(run_startup_benchmark(args.repeats), indent=2)
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(payload + "\n", encoding="utf-8")
+    else:
+        print(payload)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,49 @@
-﻿import sys
+﻿import hashlib
+import sys
+from contextlib import contextmanager
 from pathlib import Path
 
+import pytest
+
 ROOT = Path(__file__).resolve().parents[1]
 if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
+
+
+# In-memory RedisCache for the batch tests: marks live in a set and every file digest is already indexed.
+class FakeCache:
+    def __init__(self):
+        self.keys: set[str] = set()
+        self.lookups: list[list[str]] = []
+
+    def file_hash(self, file_path: Path) -> str:
+        return hashlib.sha256(file_path.read_bytes()).hexdigest()
+
+    def indexed_hash(self, file_path: Path) -> str | None:
+        return self.file_hash(file_path)
+
+    def build_key(self, supplier_id: str, record_type: str, file_path: Path, file_hash: str) -> str:
+        return f"ingest:{supplier_id}:{record_type}:{file_path}:{file_hash}"
+
+    def exists_many(self, keys: list[str]) -> dict[str, bool]:
+        self.lookups.append(keys)
+        return {key: key in self.keys for key in keys}
+
+
+class DummySession:
+    def rollback(self) -> None:
+        pass
+
+
+@pytest.fixture
+def fake_cache() -> FakeCache:
+    return FakeCache()
+
+
+@pytest.fixture
+def fake_get_db_session():
+    @contextmanager
+    def fake_get_db_session():
+        yield DummySession()
+
+    return fake_get_db_session
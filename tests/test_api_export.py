@@ -0,0 +1,126 @@
+import base64
+import csv
+import io
+import json
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from decimal import Decimal
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.db.base import Base
+from app.db.models import Order, Product
+from app.db.repository import backfill_inventory_summary
+from app.db.session import get_session
+from app.main import app
+
+
+@pytest.fixture
+def client(monkeypatch, tmp_path: Path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'export.db'}")
+    Base.metadata.create_all(engine)
+    sessions = sessionmaker(bind=engine, autoflush=False, autocommit=False)
+
+    started = datetime(2024, 1, 1)
+    with sessions() as session:
+        for supplier in ("beta", "acme"):
+            for n in range(3):
+                session.add(
+                    Product(sku=f"SKU-{n}", price=Decimal("1.50"), quantity=n, supplier_id=supplier, status="active")
+                )
+        for n in range(5):
+            session.add(
+                Order(
+                    order_id=f"ORD-{n}",
+                    sku="SKU-1",
+                    quantity=1,
+                    supplier_id="acme",
+                    status="pending",
+                    created_at=started + timedelta(minutes=n // 2),
+                )
+            )
+        session.commit()
+        backfill_inventory_summary(session)
+
+    def override_session():
+        with sessions() as session:
+            yield session
+
+    @contextmanager
+    def export_session():
+        with sessions() as session:
+            yield session
+
+    app.dependency_overrides[get_session] = override_session
+    monkeypatch.setattr("app.api.routes.get_db_session", export_session)
+    yield TestClient(app)
+    app.dependency_overrides.pop(get_session, None)
+
+
+def _walk_pages(client: TestClient, path: str, **params) -> list[dict]:
+    items: list[dict] = []
+    cursor = None
+    while True:
+        query = {**params, **({"cursor": cursor} if cursor else {})}
+        response = client.get(path, params=query)
+        assert response.status_code == 200
+        payload = response.json()
+        items.extend(payload["items"])
+        cursor = payload["next_cursor"]
+        if cursor is None:
+            return items
+
+
+def test_products_keyset_pages_cover_catalog_in_order(client: TestClient):
+    items = _walk_pages(client, "/products", limit=4)
+
+    assert [(item["supplier_id"], item["sku"]) for item in items] == [
+        (supplier, f"SKU-{n}") for supplier in ("acme", "beta") for n in range(3)
+    ]
+    assert items[0]["price"] == "1.50"
+
+
+def test_orders_keyset_pages_break_created_at_ties_by_order_id(client: TestClient):
+    items = _walk_pages(client, "/orders", limit=2, supplier_id="acme")
+
+    assert [item["order_id"] for item in items] == [f"ORD-{n}" for n in range(5)]
+
+
+def test_products_ndjson_export_streams_all_rows(client: TestClient):
+    response = client.get("/products", params={"format": "ndjson", "supplier_id": "beta"})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [row["sku"] for row in rows] == ["SKU-0", "SKU-1", "SKU-2"]
+
+
+def test_orders_csv_export_resumes_from_cursor(client: TestClient):
+    first_page = client.get("/orders", params={"limit": 2}).json()
+
+    response = client.get("/orders", params={"format": "csv", "cursor": first_page["next_cursor"]})
+
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert response.headers["content-type"].startswith("text/csv")
+    assert [row["order_id"] for row in rows] == ["ORD-2", "ORD-3", "ORD-4"]
+    assert rows[0]["price"] == ""
+
+
+def test_invalid_cursor_returns_400(client: TestClient):
+    bogus = base64.urlsafe_b64encode(b'{"not": "a list"}').decode()
+
+    assert client.get("/products", params={"cursor": bogus}).status_code == 400
+    assert client.get("/orders", params={"cursor": "!!!"}).status_code == 400
+
+
+def test_inventory_summary_endpoint(client):
+    response = client.get("/inventory/SKU-2")
+
+    assert response.status_code == 200
+    body = response.json()
+    assert (body["total_quantity"], body["available_quantity"], body["supplier_count"]) == (4, 4, 2)
+    assert client.get("/inventory/SKU-404").status_code == 404
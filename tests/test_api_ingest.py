@@ -1,8 +1,9 @@
 from fastapi.testclient import TestClient
 
 from app.api import routes
+from app.ingestion.runs import RunQueueFullError
 from app.main import app
-from app.models.pydantic_models import RunSummary
+from app.models.pydantic_models import IngestBatchSummary, IngestBatchTotals, RunStatus, RunSummary
 
 
 def test_ingest_endpoint_success(monkeypatch):
@@ -105,4 +106,116 @@ def test_health_returns_503_when_cache_uninitialized():
     response = client.get("/health")
 
     assert response.status_code == 503
-    assert response.json()["detail"] == "Cache is unavailable"
\ No newline at end of file
+    assert response.json()["detail"] == "Cache is unavailable"
+
+
+def test_ingest_batch_returns_item_summaries_and_totals(monkeypatch):
+    received = []
+
+    def fake_run_batch(items, cache):
+        received.extend(items)
+        summary = RunSummary(
+            run_id="1", status="completed", processed=2, inserted=2, rejected=0, skipped_cached=False, errors=[]
+        )
+        totals = IngestBatchTotals(
+            items=1,
+            completed=1,
+            failed=0,
+            skipped_cached=0,
+            processed=2,
+            inserted=2,
+            rejected=0,
+            skipped_unchanged=0,
+            duration_ms=5,
+        )
+        return IngestBatchSummary(items=[summary], totals=totals)
+
+    routes.cache_instance = object()
+    monkeypatch.setattr("app.api.routes.run_batch", fake_run_batch)
+
+    client = TestClient(app)
+    item = {"file_path": "data/incoming/a.csv", "supplier_id": "supplier_a", "record_type": "product"}
+    response = client.post("/ingest/batch", json={"items": [item]})
+
+    assert response.status_code == 200
+    assert received[0].file_path == "data/incoming/a.csv"
+    assert response.json()["totals"]["processed"] == 2
+    assert client.post("/ingest/batch", json={"items": []}).status_code == 422
+
+
+def test_ingest_batch_oversized_returns_400(monkeypatch):
+    def fake_run_batch(items, cache):
+        raise ValueError("A batch may contain at most 1 items")
+
+    routes.cache_instance = object()
+    monkeypatch.setattr("app.api.routes.run_batch", fake_run_batch)
+
+    item = {"file_path": "data/incoming/a.csv", "supplier_id": "supplier_a", "record_type": "product"}
+    response = TestClient(app).post("/ingest/batch", json={"items": [item, item]})
+
+    assert response.status_code == 400
+    assert response.json()["detail"] == "A batch may contain at most 1 items"
+
+
+def test_submit_returns_run_handle_and_status_is_pollable():
+    class StubManager:
+        def submit(self, request):
+            return RunStatus(
+                run_id="run-1",
+                status="queued",
+                file_path=request.file_path,
+                supplier_id=request.supplier_id,
+                record_type=request.record_type,
+            )
+
+        def get(self, run_id):
+            if run_id != "run-1":
+                return None
+            return RunStatus(
+                run_id="run-1",
+                status="running",
+                file_path="data/incoming/supplier_a_products.csv",
+                supplier_id="supplier_a",
+                record_type="product",
+                processed=10,
+            )
+
+    routes.run_manager = StubManager()
+    client = TestClient(app)
+
+    submitted = client.post(
+        "/ingest/submit",
+        json={
+            "file_path": "data/incoming/supplier_a_products.csv",
+            "supplier_id": "supplier_a",
+            "record_type": "product",
+        },
+    )
+    polled = client.get("/runs/run-1")
+    missing = client.get("/runs/unknown")
+
+    assert submitted.status_code == 202
+    assert submitted.json() == {"run_id": "run-1", "status": "queued"}
+    assert polled.json()["processed"] == 10
+    assert missing.status_code == 404
+
+
+def test_submit_returns_429_when_queue_is_full():
+    class FullManager:
+        def submit(self, request):
+            raise RunQueueFullError("Ingest queue is full")
+
+    routes.run_manager = FullManager()
+    client = TestClient(app)
+
+    response = client.post(
+        "/ingest/submit",
+        json={
+            "file_path": "data/incoming/supplier_a_products.csv",
+            "supplier_id": "supplier_a",
+            "record_type": "product",
+        },
+    )
+
+    assert response.status_code == 429
+    assert response.headers["retry-after"] == "5"
@@ -0,0 +1,59 @@
+from pathlib import Path
+
+import pytest
+
+from app.ingestion.loaders import load_records
+from app.ingestion.normalizer import KEY_ALIASES
+from benchmarks.generator import CORRUPTIONS, generate_feed
+from benchmarks.run import run_benchmarks
+from benchmarks.startup import run_startup_benchmark
+
+
+def test_generate_feed_is_deterministic_per_seed(tmp_path: Path):
+    first = generate_feed(tmp_path / "a" / "feed.json", rows=200, seed=3)
+    second = generate_feed(tmp_path / "b" / "feed.json", rows=200, seed=3)
+    other = generate_feed(tmp_path / "c" / "feed.json", rows=200, seed=4)
+
+    assert first.read_bytes() == second.read_bytes()
+    assert first.read_bytes() != other.read_bytes()
+
+
+def test_generate_feed_covers_aliases_and_error_rate(tmp_path: Path):
+    path = generate_feed(tmp_path / "orders.txt", record_type="order", rows=2_000, seed=1, error_rate=0.1)
+    rows = load_records(path)
+    seen_keys = {key for row in rows for key in row}
+
+    assert len(rows) == 2_000
+    for field in ("order_id", "sku", "quantity", "supplier_id", "status", "price"):
+        assert set(KEY_ALIASES[field]) <= seen_keys
+    corrupted = sum(bool(set(row.values()) & set(CORRUPTIONS.values())) for row in rows)
+    assert 100 < corrupted < 300
+
+
+def test_generate_feed_rejects_unknown_format(tmp_path: Path):
+    with pytest.raises(ValueError, match="Unsupported benchmark format"):
+        generate_feed(tmp_path / "feed.xml")
+
+
+def test_run_benchmarks_reports_every_stage(tmp_path: Path):
+    report = run_benchmarks(
+        sizes=[300], formats=["csv"], record_types=["product"], seed=2, chunk_size=100, workdir=tmp_path
+    )
+
+    (result,) = report["results"]
+    assert report["meta"]["seed"] == 2
+    assert set(result["stages"]) == {"load_records", "normalize_records", "validation", "upsert_products"}
+    assert result["stages"]["load_records"]["rows"] == 300
+    assert result["stages"]["validation"]["peak_bytes"] > 0
+    assert result["end_to_end"]["rows"] == 300
+    end_to_end = result["end_to_end"]
+    assert end_to_end["inserted"] + end_to_end["rejected"] + end_to_end["skipped_unchanged"] == 300
+
+
+def test_startup_benchmark_reports_both_schema_modes(tmp_path: Path):
+    report = run_startup_benchmark(repeats=1, workdir=tmp_path)
+
+    assert set(report["results"]) == {"create_schema", "skip_schema"}
+    for timings in report["results"].values():
+        assert timings["import_seconds"]["min"] > 0
+        assert timings["startup_seconds"]["median"] >= 0
@@ -0,0 +1,287 @@
+import hashlib
+import os
+import time
+from pathlib import Path
+
+import pytest
+import redis
+
+from app.ingestion.cache import LocalCacheTier, RedisCache
+
+
+@pytest.fixture
+def cache() -> RedisCache:
+    return RedisCache("redis://127.0.0.1:1/0", ttl_seconds=60, reconnect_interval=0)
+
+
+def _age(file_path: Path, seconds: int = 60) -> None:
+    past = time.time() - seconds
+    os.utime(file_path, (past, past))
+
+
+def test_file_hash_streams_sha256_of_file_bytes(cache: RedisCache, tmp_path: Path):
+    file_path = tmp_path / "supplier_products.csv"
+    payload = os.urandom(3 * 1024 * 1024 + 17)
+    file_path.write_bytes(payload)
+
+    assert cache.file_hash(file_path) == hashlib.sha256(payload).hexdigest()
+
+
+def test_file_hash_reuses_digest_for_unchanged_fingerprint(cache: RedisCache, tmp_path: Path, monkeypatch):
+    file_path = tmp_path / "supplier_products.csv"
+    file_path.write_text("sku,price\nSKU-1,1.00\n", encoding="utf-8")
+    _age(file_path)
+    reads: list[Path] = []
+    original = RedisCache._stream_hash
+
+    def counting_stream_hash(path: Path) -> str:
+        reads.append(path)
+        return original(path)
+
+    monkeypatch.setattr(RedisCache, "_stream_hash", staticmethod(counting_stream_hash))
+
+    first = cache.file_hash(file_path)
+    second = cache.file_hash(file_path)
+
+    assert first == second
+    assert len(reads) == 1
+
+    file_path.write_text("sku,price\nSKU-1,2.00\n", encoding="utf-8")
+    _age(file_path, seconds=30)
+
+    assert cache.file_hash(file_path) != first
+    assert len(reads) == 2
+
+
+def test_file_hash_does_not_index_recently_modified_files(cache: RedisCache, tmp_path: Path, monkeypatch):
+    file_path = tmp_path / "supplier_products.csv"
+    file_path.write_text("sku,price\nSKU-1,1.00\n", encoding="utf-8")
+    reads: list[Path] = []
+    original = RedisCache._stream_hash
+
+    def counting_stream_hash(path: Path) -> str:
+        reads.append(path)
+        return original(path)
+
+    monkeypatch.setattr(RedisCache, "_stream_hash", staticmethod(counting_stream_hash))
+
+    cache.file_hash(file_path)
+    cache.file_hash(file_path)
+
+    assert len(reads) == 2
+
+
+def test_indexed_hash_only_answers_for_an_unchanged_fingerprint(cache: RedisCache, tmp_path: Path):
+    file_path = tmp_path / "supplier_products.csv"
+    file_path.write_text("sku,price\nSKU-1,1.00\n", encoding="utf-8")
+    _age(file_path)
+
+    assert cache.indexed_hash(file_path) is None
+    digest = cache.file_hash(file_path)
+    assert cache.indexed_hash(file_path) == digest
+
+    file_path.write_text("sku,price\nSKU-1,2.00\n", encoding="utf-8")
+    assert cache.indexed_hash(file_path) is None
+
+
+def test_fingerprint_index_drops_deleted_files(cache: RedisCache, tmp_path: Path):
+    file_path = tmp_path / "supplier_products.csv"
+    file_path.write_text("sku,price\nSKU-1,1.00\n", encoding="utf-8")
+    _age(file_path)
+    cache.file_hash(file_path)
+
+    file_path.unlink()
+
+    assert cache.indexed_hash(file_path) is None
+    assert cache.hash_entry(file_path) is None
+
+
+def test_fingerprint_index_evicts_least_recently_used_paths(cache: RedisCache, tmp_path: Path, monkeypatch):
+    monkeypatch.setattr("app.ingestion.cache.FINGERPRINT_MAX_ENTRIES", 2)
+    paths = [tmp_path / f"supplier{n}_products.csv" for n in range(3)]
+    for file_path in paths:
+        file_path.write_text("sku,price\nSKU-1,1.00\n", encoding="utf-8")
+        _age(file_path)
+
+    cache.file_hash(paths[0])
+    cache.file_hash(paths[1])
+    cache.indexed_hash(paths[0])
+    cache.file_hash(paths[2])
+
+    assert [cache.hash_entry(file_path) is not None for file_path in paths] == [True, False, True]
+
+
+class FakePipeline:
+    def __init__(self, store: dict[str, str]):
+        self.store = store
+        self.commands: list[tuple] = []
+
+    def exists(self, key: str) -> None:
+        self.commands.append(("exists", key))
+
+    def setex(self, key: str, ttl: int, value: str) -> None:
+        self.commands.append(("setex", key, value))
+
+    def execute(self) -> list:
+        results = []
+        for command in self.commands:
+            if command[0] == "exists":
+                results.append(int(command[1] in self.store))
+            else:
+                self.store[command[1]] = command[2]
+                results.append(True)
+        return results
+
+
+class FakeRedis:
+    def __init__(self):
+        self.store: dict[str, str] = {}
+        self.pipelines = 0
+
+    def pipeline(self, transaction: bool = True) -> FakePipeline:
+        self.pipelines += 1
+        return FakePipeline(self.store)
+
+    def exists(self, key: str) -> int:
+        return int(key in self.store)
+
+    def get(self, key: str) -> str | None:
+        return self.store.get(key)
+
+    def setex(self, key: str, ttl: int, value: str) -> None:
+        self.store[key] = value
+
+    def delete(self, key: str) -> None:
+        self.store.pop(key, None)
+
+
+def test_exists_many_and_set_many_use_one_pipeline_each(cache: RedisCache):
+    cache.client = FakeRedis()
+
+    cache.set_many(["a", "b"])
+    found = cache.exists_many(["a", "b", "c"])
+
+    assert found == {"a": True, "b": True, "c": False}
+    assert cache.client.pipelines == 2
+
+
+def test_exists_many_reports_misses_when_redis_is_unavailable(cache: RedisCache):
+    cache.client = None
+
+    assert cache.exists_many(["a", "b"]) == {"a": False, "b": False}
+
+
+def test_local_tier_evicts_least_recently_used_and_expires(monkeypatch):
+    now = [1_000.0]
+    monkeypatch.setattr("app.ingestion.cache.time.time", lambda: now[0])
+    tier = LocalCacheTier(ttl_seconds=60, max_entries=2)
+
+    tier.add_many(["a", "b"])
+    assert tier.contains("a")
+    tier.add_many(["c"])
+
+    assert not tier.contains("b")
+    assert tier.contains("a") and tier.contains("c")
+    now[0] += 61
+    assert not tier.contains("a")
+    assert len(tier) == 1
+
+
+def test_local_tier_persists_unexpired_keys(tmp_path: Path):
+    path = tmp_path / "cache" / "keys.json"
+    LocalCacheTier(ttl_seconds=60, max_entries=10, path=path).add_many(["a", "b"])
+
+    reloaded = LocalCacheTier(ttl_seconds=60, max_entries=10, path=path)
+
+    assert reloaded.contains("a") and reloaded.contains("b")
+    assert not (tmp_path / "cache" / "keys.json.tmp").exists()
+
+
+def test_local_tier_appends_marks_and_compacts_stale_lines(tmp_path: Path):
+    path = tmp_path / "keys.json"
+    tier = LocalCacheTier(ttl_seconds=60, max_entries=10, path=path)
+
+    tier.add_many(["a", "b"])
+    tier.add_many(["a"])
+    tier.add_many(["a"])
+    assert len(path.read_text(encoding="utf-8").splitlines()) == 4
+    # One more stale line would outnumber the two live keys, so the file is rewritten instead.
+    tier.add_many(["a"])
+    assert len(path.read_text(encoding="utf-8").splitlines()) == 2
+
+    with path.open("a", encoding="utf-8") as journal:
+        journal.write('["c", ')
+    reloaded = LocalCacheTier(ttl_seconds=60, max_entries=10, path=path)
+    assert reloaded.contains("a") and reloaded.contains("b") and not reloaded.contains("c")
+
+
+def test_cache_prefers_redis_over_local_tier_when_available(cache: RedisCache):
+    cache.local.add_many(["ingest:deleted"])
+    cache.client = FakeRedis()
+
+    assert cache.exists("ingest:deleted") is False
+    assert cache.exists_many(["ingest:deleted"]) == {"ingest:deleted": False}
+
+
+def test_marks_made_while_redis_is_down_are_replayed_on_reconnect(cache: RedisCache):
+    cache.client = None
+    cache.set("ingest:key")
+    cache.client = FakeRedis()
+
+    cache._replay_unsynced()
+
+    assert cache.client.store == {"ingest:key": "1"}
+    assert cache._unsynced == set()
+
+
+def test_cache_serves_marks_from_local_tier_while_redis_is_down(cache: RedisCache):
+    assert not cache.is_available()
+
+    cache.set("ingest:key")
+
+    assert cache.exists("ingest:key")
+    assert cache.exists_many(["ingest:key", "other"]) == {"ingest:key": True, "other": False}
+
+
+class FailingRedis:
+    def exists(self, key: str) -> int:
+        raise redis.ConnectionError("down")
+
+
+def test_cache_connects_on_first_use(monkeypatch):
+    attempts = []
+    monkeypatch.setattr(RedisCache, "_connect", lambda self: attempts.append(1) and False)
+    cache = RedisCache("redis://127.0.0.1:1/0", ttl_seconds=60, reconnect_interval=0)
+
+    assert attempts == []
+    assert cache.exists("ingest:key") is False
+    assert cache.is_available() is False
+    assert attempts == [1]
+
+
+def test_connection_error_drops_client_and_reconnects(monkeypatch):
+    cache = RedisCache("redis://127.0.0.1:1/0", ttl_seconds=60, reconnect_interval=0)
+    cache.client = FailingRedis()
+    cache._reconnect_interval = 0.01
+    reconnected = FakeRedis()
+
+    def fake_connect() -> bool:
+        cache.client = reconnected
+        return True
+
+    monkeypatch.setattr(cache, "_connect", fake_connect)
+
+    assert cache.exists("ingest:key") is False
+    cache._reconnect_thread.join(timeout=2)
+    assert cache.client is reconnected
+    cache.close()
+
+
+def test_checkpoint_round_trip(cache: RedisCache):
+    cache.client = FakeRedis()
+
+    assert cache.get_checkpoint("ingest:key") is None
+    cache.save_checkpoint("ingest:key", records=10_000, valid=9_990, rejected=10)
+    assert cache.get_checkpoint("ingest:key") == {"records": 10_000, "valid": 9_990, "rejected": 10}
+    cache.clear_checkpoint("ingest:key")
+    assert cache.get_checkpoint("ingest:key") is None
@@ -0,0 +1,140 @@
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+
+import pytest
+
+from app.ingestion.batch import run_batch
+from app.models.pydantic_models import IngestRequest, RunSummary
+
+
+@pytest.fixture
+def incoming(monkeypatch, tmp_path: Path, fake_get_db_session) -> Path:
+    monkeypatch.setattr("app.ingestion.pipeline.ALLOWED_INGEST_ROOT", tmp_path.resolve())
+    monkeypatch.setattr("app.ingestion.batch.get_db_session", fake_get_db_session)
+    return tmp_path
+
+
+def _feed(directory: Path, name: str, content: str = "v1") -> str:
+    path = directory / name
+    path.write_text(content, encoding="utf-8")
+    return str(path)
+
+
+def _completed(processed: int) -> RunSummary:
+    return RunSummary(
+        run_id="run",
+        status="completed",
+        processed=processed,
+        inserted=processed,
+        rejected=0,
+        skipped_cached=False,
+        errors=[],
+    )
+
+
+def test_run_batch_prechecks_cache_once_and_runs_pending_feeds(monkeypatch, incoming: Path, fake_cache):
+    calls: list[tuple[str, object]] = []
+    lock = threading.Lock()
+
+    def fake_run_pipeline(file_path, supplier_id, record_type, cache, session=None):
+        with lock:
+            calls.append((Path(file_path).name, session))
+        return _completed(3)
+
+    monkeypatch.setattr("app.ingestion.batch.run_pipeline", fake_run_pipeline)
+    cache = fake_cache
+    cached = Path(_feed(incoming, "cached.csv"))
+    cache.keys.add(cache.build_key("acme", "product", cached.resolve(), cache.file_hash(cached)))
+    requests = [
+        IngestRequest(file_path=str(cached), supplier_id="acme", record_type="product"),
+        IngestRequest(file_path=_feed(incoming, "a.csv"), supplier_id="acme", record_type="product"),
+        IngestRequest(file_path="/etc/passwd", supplier_id="acme", record_type="product"),
+        IngestRequest(file_path=_feed(incoming, "b.csv"), supplier_id="beta", record_type="order"),
+    ]
+
+    result = run_batch(requests, cache, workers=2)
+
+    assert len(cache.lookups) == 1 and len(cache.lookups[0]) == 3
+    assert sorted(name for name, _ in calls) == ["a.csv", "b.csv"]
+    assert all(session is not None for _, session in calls)
+    assert [item.status for item in result.items] == ["completed", "completed", "failed", "completed"]
+    assert result.items[0].skipped_cached
+    assert result.items[2].errors == [{"error": "file_path must be under data/incoming"}]
+    totals = result.totals
+    assert (totals.items, totals.completed, totals.failed, totals.skipped_cached) == (4, 3, 1, 1)
+    assert (totals.processed, totals.inserted) == (6, 6)
+
+
+def test_run_batch_leaves_unindexed_feeds_to_the_workers(monkeypatch, incoming: Path, fake_cache):
+    calls: list[str] = []
+
+    def fake_run_pipeline(file_path, supplier_id, record_type, cache, session=None):
+        calls.append(Path(file_path).name)
+        return _completed(1)
+
+    monkeypatch.setattr("app.ingestion.batch.run_pipeline", fake_run_pipeline)
+    cache = fake_cache
+    cache.indexed_hash = lambda file_path: None
+    request = IngestRequest(file_path=_feed(incoming, "a.csv"), supplier_id="acme", record_type="product")
+    cache.keys.add(cache.build_key("acme", "product", Path(request.file_path).resolve(), "v1"))
+
+    result = run_batch([request], cache)
+
+    assert cache.lookups == [[]]
+    assert calls == ["a.csv"]
+    assert result.items[0].skipped_cached is False
+
+
+def test_run_batch_runs_duplicate_feeds_once(monkeypatch, incoming: Path, fake_cache):
+    calls: list[str] = []
+
+    def fake_run_pipeline(file_path, supplier_id, record_type, cache, session=None):
+        calls.append(file_path)
+        return _completed(1)
+
+    monkeypatch.setattr("app.ingestion.batch.run_pipeline", fake_run_pipeline)
+    request = IngestRequest(file_path=_feed(incoming, "a.csv"), supplier_id="acme", record_type="product")
+
+    result = run_batch([request, request], fake_cache)
+
+    assert len(calls) == 1
+    assert [item.skipped_cached for item in result.items] == [False, True]
+
+
+def test_run_batch_isolates_item_failures(monkeypatch, incoming: Path, fake_cache):
+    class RollbackSession:
+        rollbacks = 0
+
+        def rollback(self):
+            RollbackSession.rollbacks += 1
+
+    @contextmanager
+    def rollback_session():
+        yield RollbackSession()
+
+    def fake_run_pipeline(file_path, supplier_id, record_type, cache, session=None):
+        if file_path.endswith("bad.csv"):
+            raise RuntimeError("boom")
+        return _completed(2)
+
+    monkeypatch.setattr("app.ingestion.batch.get_db_session", rollback_session)
+    monkeypatch.setattr("app.ingestion.batch.run_pipeline", fake_run_pipeline)
+    requests = [
+        IngestRequest(file_path=_feed(incoming, name), supplier_id="acme", record_type="product")
+        for name in ("bad.csv", "good.csv")
+    ]
+
+    result = run_batch(requests, fake_cache, workers=1)
+
+    assert [item.status for item in result.items] == ["failed", "completed"]
+    assert result.items[0].errors == [{"error": "Ingestion failed"}]
+    assert RollbackSession.rollbacks == 1
+
+
+def test_run_batch_rejects_oversized_batches(monkeypatch, incoming: Path, fake_cache):
+    monkeypatch.setattr("app.ingestion.batch.settings.ingest_batch_max_items", 1)
+    request = IngestRequest(file_path=_feed(incoming, "a.csv"), supplier_id="acme", record_type="product")
+
+    with pytest.raises(ValueError, match="at most 1 items"):
+        run_batch([request, request], fake_cache)
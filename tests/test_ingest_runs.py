@@ -0,0 +1,85 @@
+import threading
+import time
+
+import pytest
+
+from app.ingestion.runs import IngestRunManager, RunQueueFullError
+from app.models.pydantic_models import IngestRequest, RunSummary
+
+
+REQUEST = IngestRequest(
+    file_path="data/incoming/supplier_a_products.csv",
+    supplier_id="supplier_a",
+    record_type="product",
+)
+
+
+def _wait_for(manager: IngestRunManager, run_id: str, status: str, timeout: float = 2.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        run = manager.get(run_id)
+        if run and run.status == status:
+            return run
+        time.sleep(0.01)
+    raise AssertionError(f"run {run_id} never reached {status}")
+
+
+def test_submitted_run_reports_progress_and_summary(monkeypatch):
+    release = threading.Event()
+
+    def fake_run_pipeline(file_path, supplier_id, record_type, cache, run_id=None, on_progress=None):
+        on_progress(2)
+        release.wait(timeout=2)
+        return RunSummary(
+            run_id=run_id,
+            status="completed",
+            processed=4,
+            inserted=4,
+            rejected=0,
+            skipped_cached=False,
+            errors=[],
+        )
+
+    monkeypatch.setattr("app.ingestion.runs.run_pipeline", fake_run_pipeline)
+    manager = IngestRunManager(cache=None, workers=1, queue_size=2)
+    manager.start()
+    try:
+        run = manager.submit(REQUEST)
+        assert run.status == "queued"
+
+        running = _wait_for(manager, run.run_id, "running")
+        deadline = time.monotonic() + 2
+        while running.processed != 2 and time.monotonic() < deadline:
+            running = manager.get(run.run_id)
+        assert running.processed == 2
+
+        release.set()
+        finished = _wait_for(manager, run.run_id, "completed")
+        assert finished.summary.run_id == run.run_id
+        assert finished.processed == 4
+    finally:
+        release.set()
+        manager.shutdown()
+
+
+def test_submit_applies_backpressure_when_queue_is_full():
+    manager = IngestRunManager(cache=None, workers=1, queue_size=1)
+
+    manager.submit(REQUEST)
+    with pytest.raises(RunQueueFullError):
+        manager.submit(REQUEST)
+
+
+def test_failed_runs_hide_unexpected_errors(monkeypatch):
+    def fake_run_pipeline(*args, **kwargs):
+        raise RuntimeError("sensitive backend exception")
+
+    monkeypatch.setattr("app.ingestion.runs.run_pipeline", fake_run_pipeline)
+    manager = IngestRunManager(cache=None, workers=1, queue_size=1)
+    manager.start()
+    try:
+        run = manager.submit(REQUEST)
+        failed = _wait_for(manager, run.run_id, "failed")
+        assert failed.error == "Ingestion failed"
+    finally:
+        manager.shutdown()
@@ -0,0 +1,153 @@
+import bz2
+import gzip
+import inspect
+import json
+import lzma
+from pathlib import Path
+
+import pytest
+
+from app.ingestion import loaders
+from app.ingestion.loaders import feed_stem, iter_chunks, iter_records, load_records, split_feed_suffix
+
+
+def test_iter_records_is_lazy_and_matches_load_records(tmp_path: Path):
+    file_path = tmp_path / "supplier_products.csv"
+    file_path.write_text("sku,price,quantity,status\nSKU-1,1.00,1,active\nSKU-2,2.00,2,active\n", encoding="utf-8")
+
+    records = iter_records(file_path)
+
+    assert inspect.isgenerator(records)
+    assert list(records) == load_records(file_path)
+
+
+def test_iter_records_txt_skips_blank_and_keyless_lines(tmp_path: Path):
+    file_path = tmp_path / "supplier_products.txt"
+    file_path.write_text("sku:SKU-1,qty:3\n\nnot-a-pair\nsku:SKU-2\n", encoding="utf-8")
+
+    assert list(iter_records(file_path)) == [{"sku": "SKU-1", "qty": "3"}, {"sku": "SKU-2"}]
+
+
+def test_iter_records_rejects_unknown_extension(tmp_path: Path):
+    with pytest.raises(ValueError, match="Unsupported file type: .xml"):
+        iter_records(tmp_path / "feed.xml")
+
+
+def test_iter_chunks_yields_fixed_size_chunks():
+    chunks = list(iter_chunks(({"n": n} for n in range(5)), 2))
+    assert [len(chunk) for chunk in chunks] == [2, 2, 1]
+
+
+@pytest.fixture
+def json_reads(monkeypatch) -> list[int]:
+    sizes: list[int] = []
+    original = loaders._JsonStream._fill
+
+    def counting_fill(stream) -> bool:
+        sizes.append(stream._read_size)
+        return original(stream)
+
+    monkeypatch.setattr(loaders._JsonStream, "_fill", counting_fill)
+    return sizes
+
+
+@pytest.mark.parametrize(
+    "payload",
+    [
+        '[{"sku": "SKU-1", "qty": 1}, {"sku": "SKU-2", "note": "a, [b] {c}"}]',
+        ' {"products" : [ {"sku": "SKU-1", "qty": 1} ,\n{"sku": "SKU-2", "note": "a, [b] {c}"} ] }\n',
+    ],
+)
+def test_iter_json_streams_array_and_wrapped_list(tmp_path: Path, monkeypatch, json_reads: list[int], payload: str):
+    # A tiny read window forces every token and row to straddle buffer boundaries.
+    monkeypatch.setattr("app.ingestion.loaders.JSON_READ_SIZE", 3)
+    file_path = tmp_path / "supplier_products.json"
+    file_path.write_text(payload, encoding="utf-8")
+
+    expected = json.loads(payload)
+    if isinstance(expected, dict):
+        expected = expected["products"]
+
+    assert list(iter_records(file_path)) == expected
+    assert set(json_reads) == {3}
+    assert len(json_reads) > len(payload) // 3
+
+
+def test_iter_json_does_not_truncate_numbers_at_window_edge(tmp_path: Path, monkeypatch, json_reads: list[int]):
+    monkeypatch.setattr("app.ingestion.loaders.JSON_READ_SIZE", 4)
+    file_path = tmp_path / "supplier_products.json"
+    # "123456789" starts at offset 8, so a 4-char window cuts it after "1234".
+    file_path.write_text('[{"qty": 123456789}, {"qty": 1}]', encoding="utf-8")
+
+    assert list(iter_records(file_path)) == [{"qty": 123456789}, {"qty": 1}]
+    assert set(json_reads) == {4}
+
+
+@pytest.mark.parametrize(
+    "payload",
+    ['{"a": [], "b": []}', '{"a": {"sku": "x"}}', '"rows"', '[1, 2]', '[{"sku": "x"}] []'],
+)
+def test_iter_json_rejects_unsupported_shapes(tmp_path: Path, payload: str):
+    file_path = tmp_path / "supplier_products.json"
+    file_path.write_text(payload, encoding="utf-8")
+
+    with pytest.raises(ValueError):
+        list(iter_records(file_path))
+
+
+@pytest.mark.parametrize("suffix", [".jsonl", ".ndjson"])
+def test_iter_records_reads_json_lines(tmp_path: Path, suffix: str):
+    file_path = tmp_path / f"supplier_orders{suffix}"
+    file_path.write_text('{"order": "ORD-1", "qty": 2}\n\n{"order": "ORD-2", "qty": 3}\n', encoding="utf-8")
+
+    assert list(iter_records(file_path)) == [{"order": "ORD-1", "qty": 2}, {"order": "ORD-2", "qty": 3}]
+
+
+def test_iter_ndjson_rejects_non_object_lines(tmp_path: Path):
+    file_path = tmp_path / "supplier_orders.jsonl"
+    file_path.write_text('{"order": "ORD-1"}\n[1, 2]\n', encoding="utf-8")
+
+    with pytest.raises(ValueError, match="NDJSON line 2"):
+        list(iter_records(file_path))
+
+
+def test_iter_ndjson_reports_the_file_line_of_malformed_json(tmp_path: Path):
+    file_path = tmp_path / "supplier_orders.ndjson"
+    file_path.write_text('{"order": "ORD-1"}\n\n{"order": "ORD-2"}\n{"order": \n', encoding="utf-8")
+
+    with pytest.raises(ValueError, match="NDJSON line 4 is not valid JSON"):
+        list(iter_records(file_path))
+
+
+@pytest.mark.parametrize(
+    ("suffix", "opener"),
+    [(".csv.gz", gzip.open), (".csv.bz2", bz2.open), (".csv.xz", lzma.open)],
+)
+def test_iter_records_decompresses_by_compound_suffix(tmp_path: Path, suffix: str, opener):
+    content = "sku,price,quantity,status\nSKU-1,1.00,1,active\nSKU-2,2.00,2,active\n"
+    plain = tmp_path / "supplier_products.csv"
+    plain.write_text(content, encoding="utf-8")
+    compressed = tmp_path / f"supplier_products{suffix}"
+    with opener(compressed, "wt", encoding="utf-8") as file:
+        file.write(content)
+
+    assert list(iter_records(compressed)) == load_records(plain)
+
+
+def test_iter_records_decompresses_json_lines(tmp_path: Path):
+    file_path = tmp_path / "supplier_orders.jsonl.gz"
+    with gzip.open(file_path, "wt", encoding="utf-8") as file:
+        file.write('{"order": "ORD-1"}\n{"order": "ORD-2"}\n')
+
+    assert list(iter_records(file_path)) == [{"order": "ORD-1"}, {"order": "ORD-2"}]
+
+
+def test_iter_records_rejects_compressed_unknown_format(tmp_path: Path):
+    with pytest.raises(ValueError, match="Unsupported file type: .xml"):
+        iter_records(tmp_path / "feed.xml.gz")
+
+
+def test_split_feed_suffix_and_stem():
+    assert split_feed_suffix(Path("acme_products.CSV.GZ")) == (".csv", ".gz")
+    assert split_feed_suffix(Path("acme_products.json")) == (".json", None)
+    assert feed_stem(Path("acme.v2_products.txt.xz")) == "acme.v2_products"
@@ -0,0 +1,80 @@
+from contextlib import contextmanager
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+
+from app.ingestion.pipeline import run_pipeline
+from app.main import app
+from app.metrics import DB_ROWS_WRITTEN, STAGE_DURATION, Counter, Histogram
+
+
+class FakeCache:
+    def file_hash(self, file_path: Path) -> str:
+        return "hash"
+
+    def build_key(self, supplier_id: str, record_type: str, file_path: Path, file_hash: str) -> str:
+        return f"ingest:{supplier_id}:{record_type}:{file_path}:{file_hash}"
+
+    def exists(self, key: str) -> bool:
+        return False
+
+    def set(self, key: str) -> None:
+        pass
+
+    def get_checkpoint(self, key: str) -> dict | None:
+        return None
+
+    def save_checkpoint(self, key: str, records: int, valid: int, rejected: int = 0) -> None:
+        pass
+
+    def clear_checkpoint(self, key: str) -> None:
+        pass
+
+
+def test_histogram_renders_cumulative_buckets():
+    histogram = Histogram("demo_seconds", "Demo.", ("stage",), (0.1, 1.0))
+    histogram.observe(0.05, stage="load")
+    histogram.observe(0.5, stage="load")
+
+    lines = histogram.render()
+
+    assert 'demo_seconds_bucket{stage="load",le="0.1"} 1' in lines
+    assert 'demo_seconds_bucket{stage="load",le="1"} 2' in lines
+    assert 'demo_seconds_bucket{stage="load",le="+Inf"} 2' in lines
+    assert 'demo_seconds_count{stage="load"} 2' in lines
+
+
+def test_counter_escapes_label_values():
+    counter = Counter("demo_total", "Demo.", ("supplier_id",))
+    counter.inc(2, supplier_id='a"b')
+
+    assert 'demo_total{supplier_id="a\\"b"} 2' in counter.render()
+
+
+def test_pipeline_records_stage_metrics(monkeypatch, tmp_path: Path):
+    file_path = tmp_path / "metrics_products.csv"
+    file_path.write_text("sku,price,quantity,status\nSKU-1,1.00,1,active\n", encoding="utf-8")
+
+    @contextmanager
+    def fake_get_db_session():
+        yield None
+
+    monkeypatch.setattr("app.ingestion.pipeline.ALLOWED_INGEST_ROOT", tmp_path.resolve())
+    monkeypatch.setattr("app.ingestion.pipeline.get_db_session", fake_get_db_session)
+    monkeypatch.setattr("app.ingestion.pipeline.upsert_products", lambda session, rows: len(rows))
+    written_before = DB_ROWS_WRITTEN.value(supplier_id="metrics_supplier", record_type="product")
+
+    run_pipeline(str(file_path), "metrics_supplier", "product", FakeCache())
+
+    labels = {"supplier_id": "metrics_supplier", "record_type": "product"}
+    for stage in ("hash", "cache", "load", "normalize", "validate", "persist"):
+        assert STAGE_DURATION.count(stage=stage, **labels) >= 1
+    assert DB_ROWS_WRITTEN.value(**labels) == written_before + 1
+
+
+def test_metrics_endpoint_serves_prometheus_text():
+    response = TestClient(app).get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert "# TYPE ingest_stage_duration_seconds histogram" in response.text
@@ -1,4 +1,4 @@
-from app.ingestion.normalizer import normalize_record, normalize_records
+from app.ingestion.normalizer import compile_normalizer, normalize_record, normalize_records
 
 
 def test_normalizer_maps_aliases_to_canonical_keys():
@@ -50,4 +50,30 @@ def test_normalizer_uses_deterministic_alias_precedence():
     normalized = normalize_record(row, default_supplier_id="fallback", record_type="product")
 
     assert normalized["sku"] == "PRIMARY"
-    assert normalized["supplier_id"] == "supplier_primary"
\ No newline at end of file
+    assert normalized["supplier_id"] == "supplier_primary"
+
+
+def test_compiled_normalizer_matches_per_record_normalizer():
+    rows = [
+        {"SKU": " SKU-1 ", "Qty": "3", "Vendor": "supplier_x", "STATE": "Active", "Cost": "1.5"},
+        {"item_sku": "SKU-2", "stock": "x", "status": "", "unit_price": "abc"},
+        {" sku ": "SKU-3", "sku": "SKU-3b", "inventory": "7", "supplier": "", "price": ""},
+        {"order_number": "ORD-1", "id": "ignored", "sku_code": "SKU-4", "quantity": 2, "price": 9.5},
+        {"": "blank", "   ": "spaces", "sku": "SKU-5", "qty": None, "status": None},
+        {"sku": "SKU-6", "qty": "4", "status": "active", "price": "2.00"},
+    ]
+
+    for record_type in ("product", "order"):
+        expected = [normalize_record(row, "fallback", record_type) for row in rows]
+        actual = normalize_records(rows, supplier_id="fallback", record_type=record_type)
+        assert actual == expected
+        assert [list(row) for row in actual] == [list(row) for row in expected]
+
+
+def test_compiled_normalizer_is_reused_per_key_layout():
+    compile_normalizer.cache_clear()
+    rows = [{"sku": f"SKU-{n}", "qty": str(n), "status": "active", "price": "1.00"} for n in range(50)]
+
+    normalize_records(rows, supplier_id="fallback", record_type="product")
+
+    assert compile_normalizer.cache_info().misses == 1
@@ -0,0 +1,100 @@
+from contextlib import contextmanager
+from pathlib import Path
+
+from app.ingestion.parallel import process_byte_range, split_byte_ranges, supports_parallel_parse
+from app.ingestion.pipeline import run_pipeline
+
+
+class FakeCache:
+    def file_hash(self, file_path: Path) -> str:
+        return "hash"
+
+    def build_key(self, supplier_id: str, record_type: str, file_path: Path, file_hash: str) -> str:
+        return f"ingest:{supplier_id}:{record_type}:{file_path}:{file_hash}"
+
+    def exists(self, key: str) -> bool:
+        return False
+
+    def set(self, key: str) -> None:
+        pass
+
+    def get_checkpoint(self, key: str) -> dict | None:
+        return None
+
+    def save_checkpoint(self, key: str, records: int, valid: int, rejected: int = 0) -> None:
+        pass
+
+    def clear_checkpoint(self, key: str) -> None:
+        pass
+
+
+def _write_csv(file_path: Path, rows: int) -> None:
+    lines = ["sku,price,quantity,status"]
+    for n in range(1, rows + 1):
+        sku = "BAD SKU" if n % 7 == 0 else f"SKU-{n}"
+        lines.append(f"{sku},{n}.25,{n},active")
+    file_path.write_text("\r\n".join(lines) + "\r\n", encoding="utf-8")
+
+
+def test_split_byte_ranges_are_contiguous_and_line_aligned(tmp_path: Path):
+    file_path = tmp_path / "acme_products.csv"
+    _write_csv(file_path, 100)
+    payload = file_path.read_bytes()
+
+    header, ranges = split_byte_ranges(file_path, range_bytes=256)
+
+    assert header == ["sku", "price", "quantity", "status"]
+    assert len(ranges) > 1
+    assert ranges[0][0] == payload.index(b"\n") + 1
+    assert ranges[-1][1] == len(payload)
+    for (_, end), (start, _) in zip(ranges, ranges[1:]):
+        assert end == start
+        assert payload[end - 1 : end] == b"\n"
+
+
+def test_process_byte_range_parses_txt_lines(tmp_path: Path):
+    file_path = tmp_path / "acme_products.txt"
+    file_path.write_text("sku:SKU-1,price:1.00,qty:1,status:active\n\nsku:bad sku,price:1,qty:1,status:active\n")
+
+    count, valid_rows, errors = process_byte_range(
+        str(file_path), 0, file_path.stat().st_size, None, "acme", "product"
+    )
+
+    assert count == 2
+    assert [row["sku"] for row in valid_rows] == ["SKU-1"]
+    assert [error["index"] for error in errors] == [2]
+
+
+def test_parallel_parse_matches_serial_summary(monkeypatch, tmp_path: Path):
+    file_path = tmp_path / "acme_products.csv"
+    _write_csv(file_path, 300)
+    written: dict[str, list[dict]] = {"serial": [], "parallel": []}
+    mode = ["serial"]
+
+    @contextmanager
+    def fake_get_db_session():
+        yield None
+
+    def fake_upsert(session, rows):
+        written[mode[0]].extend(rows)
+        return len(rows)
+
+    monkeypatch.setattr("app.ingestion.pipeline.ALLOWED_INGEST_ROOT", tmp_path.resolve())
+    monkeypatch.setattr("app.ingestion.pipeline.get_db_session", fake_get_db_session)
+    monkeypatch.setattr("app.ingestion.pipeline.upsert_products", fake_upsert)
+    monkeypatch.setattr("app.ingestion.pipeline.settings.parse_range_bytes", 1024)
+
+    serial = run_pipeline(str(file_path), "acme", "product", FakeCache(), chunk_size=50, parse_workers=0)
+    mode[0] = "parallel"
+    parallel = run_pipeline(str(file_path), "acme", "product", FakeCache(), parse_workers=2)
+
+    assert (parallel.processed, parallel.inserted, parallel.rejected) == (300, 258, 42)
+    assert (serial.processed, serial.inserted, serial.rejected) == (300, 258, 42)
+    assert parallel.errors == serial.errors
+    assert written["parallel"] == written["serial"]
+
+
+def test_compressed_feeds_are_not_split_for_parallel_parse():
+    assert supports_parallel_parse(Path("acme_products.csv"))
+    assert not supports_parallel_parse(Path("acme_products.csv.gz"))
+    assert not supports_parallel_parse(Path("acme_products.json"))
@@ -0,0 +1,93 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from app.db.base import Base
+from app.db.models import Order
+from app.db.partitions import (
+    add_months,
+    apply_order_retention,
+    ensure_order_partitions,
+    expired_partitions,
+    partition_name,
+)
+from app.db.repository import _assign_order_created_at
+
+
+class RecordingConnection:
+    def __init__(self, partitions: list[str] | None = None):
+        self.partitions = partitions or []
+        self.statements: list[str] = []
+
+    def execute(self, statement):
+        self.statements.append(str(statement))
+        return self
+
+    def scalars(self):
+        return iter(self.partitions)
+
+
+def test_add_months_crosses_year_boundaries():
+    assert add_months(datetime(2024, 11, 1), 3) == datetime(2025, 2, 1)
+    assert add_months(datetime(2024, 1, 1), -1) == datetime(2023, 12, 1)
+    assert partition_name(datetime(2024, 2, 1)) == "orders_p202402"
+
+
+def test_ensure_order_partitions_premakes_months_and_default():
+    connection = RecordingConnection()
+
+    created = ensure_order_partitions(connection, months_ahead=2, now=datetime(2024, 12, 17, 9, 30))
+
+    assert created == ["orders_p202412", "orders_p202501", "orders_p202502"]
+    assert "FOR VALUES FROM ('2024-12-01') TO ('2025-01-01')" in connection.statements[0]
+    assert connection.statements[-1].endswith("PARTITION OF orders DEFAULT")
+
+
+def test_expired_partitions_only_returns_months_wholly_before_cutoff():
+    names = ["orders_p202401", "orders_p202402", "orders_p202403", "orders_default", "orders_p2024"]
+
+    assert expired_partitions(names, datetime(2024, 3, 1)) == ["orders_p202401", "orders_p202402"]
+
+
+@pytest.mark.parametrize(("action", "drops"), [("detach", 0), ("drop", 1)])
+def test_apply_order_retention_detaches_old_partitions(action: str, drops: int):
+    connection = RecordingConnection(["orders_p202401", "orders_p202406", "orders_default"])
+
+    retired = apply_order_retention(connection, retention_months=3, action=action, now=datetime(2024, 6, 5))
+
+    assert retired == ["orders_p202401"]
+    assert "ALTER TABLE orders DETACH PARTITION orders_p202401" in connection.statements
+    assert sum(statement.startswith("DROP TABLE") for statement in connection.statements) == drops
+
+
+def test_apply_order_retention_is_disabled_by_default():
+    connection = RecordingConnection(["orders_p200001"])
+
+    assert apply_order_retention(connection, retention_months=0, action="detach") == []
+    assert connection.statements == []
+
+
+def test_assign_order_created_at_keeps_stored_partition_key():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    placed = datetime(2023, 5, 2, 12, 0)
+    with Session(engine) as session:
+        session.add(Order(order_id="ORD-1", sku="SKU-1", quantity=1, supplier_id="s", status="pending", created_at=placed))
+        session.commit()
+
+        rows = _assign_order_created_at(
+            session,
+            [
+                {"order_id": "ORD-1", "status": "pending"},
+                {"order_id": "ORD-2", "status": "pending"},
+                {"order_id": "ORD-1", "status": "shipped"},
+            ],
+        )
+
+    by_id = {row["order_id"]: row for row in rows}
+    assert len(rows) == 2
+    assert by_id["ORD-1"]["created_at"] == placed
+    assert by_id["ORD-1"]["status"] == "shipped"
+    assert datetime.utcnow() - by_id["ORD-2"]["created_at"] < timedelta(minutes=1)
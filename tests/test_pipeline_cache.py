@@ -2,13 +2,18 @@ from contextlib import contextmanager
 from pathlib import Path
 
 import pytest
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import Session
 
+from app.db.base import Base
+from app.db.models import Product
 from app.ingestion.pipeline import run_pipeline
 
 
 class FakeCache:
     def __init__(self):
         self.keys: set[str] = set()
+        self.checkpoints: dict[str, dict] = {}
 
     def file_hash(self, file_path: Path) -> str:
         return "same-hash"
@@ -22,6 +27,15 @@ class FakeCache:
     def set(self, key: str) -> None:
         self.keys.add(key)
 
+    def get_checkpoint(self, key: str) -> dict | None:
+        return self.checkpoints.get(key)
+
+    def save_checkpoint(self, key: str, records: int, valid: int, rejected: int = 0) -> None:
+        self.checkpoints[key] = {"records": records, "valid": valid, "rejected": rejected}
+
+    def clear_checkpoint(self, key: str) -> None:
+        self.checkpoints.pop(key, None)
+
 
 class DummySession:
     pass
@@ -118,3 +132,188 @@ def test_pipeline_rejects_file_outside_allowed_root(monkeypatch, tmp_path: Path)
 
     with pytest.raises(ValueError, match="file_path must be under data/incoming"):
         run_pipeline(str(outside_file), "supplier_a", "product", cache)
+
+
+def test_pipeline_chunked_run_keeps_totals_and_error_indices(monkeypatch, tmp_path: Path):
+    cache = FakeCache()
+    file_path = tmp_path / "supplier_products.csv"
+    file_path.write_text(
+        "sku,price,quantity,status\n"
+        "SKU-1,10.50,5,active\n"
+        "BAD SKU,10.50,5,active\n"
+        "SKU-3,10.50,5,active\n"
+        "SKU-4,-1,5,active\n"
+        "SKU-5,10.50,5,active\n",
+        encoding="utf-8",
+    )
+    batches: list[int] = []
+
+    @contextmanager
+    def fake_get_db_session():
+        yield DummySession()
+
+    def fake_upsert(session, rows):
+        batches.append(len(rows))
+        return len(rows)
+
+    monkeypatch.setattr("app.ingestion.pipeline.ALLOWED_INGEST_ROOT", file_path.parent.resolve())
+    monkeypatch.setattr("app.ingestion.pipeline.get_db_session", fake_get_db_session)
+    monkeypatch.setattr("app.ingestion.pipeline.upsert_products", fake_upsert)
+
+    summary = run_pipeline(str(file_path), "supplier_a", "product", cache, chunk_size=2)
+
+    assert batches == [1, 1, 1]
+    assert summary.processed == 5
+    assert summary.inserted == 3
+    assert summary.rejected == 2
+    assert [error["index"] for error in summary.errors] == [2, 4]
+
+
+def test_pipeline_routes_rows_to_copy_engine(monkeypatch, supplier_file: Path):
+    cache = FakeCache()
+    copied: list[int] = []
+
+    @contextmanager
+    def fake_get_db_session():
+        yield DummySession()
+
+    def fake_copy_upsert(session, rows):
+        copied.append(len(rows))
+        return len(rows)
+
+    monkeypatch.setattr("app.ingestion.pipeline.ALLOWED_INGEST_ROOT", supplier_file.parent.resolve())
+    monkeypatch.setattr("app.ingestion.pipeline.get_db_session", fake_get_db_session)
+    monkeypatch.setattr("app.ingestion.pipeline.copy_upsert_products", fake_copy_upsert)
+
+    summary = run_pipeline(str(supplier_file), "supplier_a", "product", cache, persist_mode="copy")
+
+    assert copied == [1]
+    assert summary.inserted == 1
+
+
+def test_pipeline_rejects_unknown_persist_mode(monkeypatch, supplier_file: Path):
+    monkeypatch.setattr("app.ingestion.pipeline.ALLOWED_INGEST_ROOT", supplier_file.parent.resolve())
+
+    with pytest.raises(ValueError, match="persist_mode"):
+        run_pipeline(str(supplier_file), "supplier_a", "product", FakeCache(), persist_mode="bulk")
+
+
+def test_pipeline_skips_rows_whose_content_is_unchanged(monkeypatch, tmp_path: Path):
+    class ChangingHashCache(FakeCache):
+        def file_hash(self, file_path: Path) -> str:
+            return file_path.read_text(encoding="utf-8")
+
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+
+    @contextmanager
+    def sqlite_session():
+        with Session(engine) as session:
+            yield session
+
+    monkeypatch.setattr("app.ingestion.pipeline.ALLOWED_INGEST_ROOT", tmp_path.resolve())
+    monkeypatch.setattr("app.ingestion.pipeline.get_db_session", sqlite_session)
+    cache = ChangingHashCache()
+    file_path = tmp_path / "supplier_products.csv"
+
+    file_path.write_text("sku,price,quantity,status\nSKU-1,10.50,5,active\nSKU-2,3.00,1,active\n", encoding="utf-8")
+    first = run_pipeline(str(file_path), "supplier_a", "product", cache)
+
+    file_path.write_text("sku,price,quantity,status\nSKU-1,10.50,5,active\nSKU-2,3.00,9,active\n", encoding="utf-8")
+    second = run_pipeline(str(file_path), "supplier_a", "product", cache)
+
+    assert (first.inserted, first.skipped_unchanged) == (2, 0)
+    assert (second.inserted, second.skipped_unchanged) == (1, 1)
+    with Session(engine) as session:
+        quantities = session.execute(select(Product.sku, Product.quantity).order_by(Product.sku)).all()
+    assert quantities == [("SKU-1", 5), ("SKU-2", 9)]
+
+
+@pytest.mark.parametrize(
+    "payload",
+    [
+        '{"products": [{"sku": "SKU-1", "price": "1.00", "quantity": 1, "status": "active"}], "meta": {}}',
+        '[{"sku": "SKU-1", "price": "1.00", "quantity": 1, "status": "active"}] []',
+    ],
+)
+def test_pipeline_rejects_malformed_json_before_writing(monkeypatch, tmp_path: Path, payload: str):
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+
+    @contextmanager
+    def sqlite_session():
+        with Session(engine) as session:
+            yield session
+
+    monkeypatch.setattr("app.ingestion.pipeline.ALLOWED_INGEST_ROOT", tmp_path.resolve())
+    monkeypatch.setattr("app.ingestion.pipeline.get_db_session", sqlite_session)
+    file_path = tmp_path / "supplier_products.json"
+    file_path.write_text(payload, encoding="utf-8")
+    cache = FakeCache()
+
+    with pytest.raises(ValueError):
+        run_pipeline(str(file_path), "supplier_a", "product", cache, chunk_size=1)
+
+    with Session(engine) as session:
+        assert session.execute(select(Product)).first() is None
+    assert cache.keys == set() and cache.checkpoints == {}
+
+
+def test_pipeline_rejects_malformed_ndjson_line_before_writing(monkeypatch, tmp_path: Path):
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+
+    @contextmanager
+    def sqlite_session():
+        with Session(engine) as session:
+            yield session
+
+    monkeypatch.setattr("app.ingestion.pipeline.ALLOWED_INGEST_ROOT", tmp_path.resolve())
+    monkeypatch.setattr("app.ingestion.pipeline.get_db_session", sqlite_session)
+    row = '{"sku": "SKU-%d", "price": "1.00", "quantity": 1, "status": "active"}\n'
+    file_path = tmp_path / "supplier_products.ndjson"
+    file_path.write_text(row % 1 + row % 2 + "{not json\n", encoding="utf-8")
+    cache = FakeCache()
+
+    with pytest.raises(ValueError, match="NDJSON line 3"):
+        run_pipeline(str(file_path), "supplier_a", "product", cache, chunk_size=1)
+
+    with Session(engine) as session:
+        assert session.execute(select(Product)).first() is None
+    assert cache.keys == set() and cache.checkpoints == {}
+
+
+def test_pipeline_resumes_after_last_committed_chunk(monkeypatch, tmp_path: Path):
+    cache = FakeCache()
+    file_path = tmp_path / "supplier_products.csv"
+    rows = "BAD SKU,-1,0,active\n" + "".join(f"SKU-{n},1.00,1,active\n" for n in range(1, 6)) + "BAD SKU,-1,0,active\n"
+    file_path.write_text("sku,price,quantity,status\n" + rows, encoding="utf-8")
+    persisted: list[list[str]] = []
+    crashed: list[bool] = []
+
+    def flaky_upsert(session, rows):
+        if len(persisted) == 1 and not crashed:
+            crashed.append(True)
+            raise RuntimeError("process died")
+        persisted.append([row["sku"] for row in rows])
+        return len(rows)
+
+    @contextmanager
+    def fake_get_db_session():
+        yield DummySession()
+
+    monkeypatch.setattr("app.ingestion.pipeline.ALLOWED_INGEST_ROOT", file_path.parent.resolve())
+    monkeypatch.setattr("app.ingestion.pipeline.get_db_session", fake_get_db_session)
+    monkeypatch.setattr("app.ingestion.pipeline.upsert_products", flaky_upsert)
+
+    with pytest.raises(RuntimeError):
+        run_pipeline(str(file_path), "supplier_a", "product", cache, chunk_size=2)
+    resumed = run_pipeline(str(file_path), "supplier_a", "product", cache, chunk_size=2)
+
+    assert persisted == [["SKU-1"], ["SKU-2", "SKU-3"], ["SKU-4", "SKU-5"]]
+    assert resumed.resumed_from == 2
+    assert resumed.processed == 5
+    assert resumed.rejected == 2
+    assert [error["index"] for error in resumed.errors] == [7]
+    assert cache.checkpoints == {}
+    assert run_pipeline(str(file_path), "supplier_a", "product", cache).skipped_cached is True
@@ -0,0 +1,299 @@
+from decimal import Decimal
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import create_engine, event, select
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.db.base import Base
+from app.db.models import InventorySummary, Order, Product
+from app.db.repository import (
+    CALLER_COMMIT,
+    ORDER_KEY,
+    ORDER_UPDATE_COLUMNS,
+    POSTGRES_MAX_BIND_PARAMS,
+    PRODUCT_KEY,
+    PRODUCT_UPDATE_COLUMNS,
+    _apply_inventory_deltas,
+    _batch_size_for,
+    _prefetch_upsert,
+    get_inventory,
+    product_lock_key,
+    rebuild_inventory_summary,
+    row_digest,
+    upsert_orders,
+    upsert_products,
+)
+
+
+class EmptyResult(list):
+    def all(self) -> list:
+        return []
+
+
+class RecordingPostgresSession:
+    def __init__(self):
+        self.bind = SimpleNamespace(dialect=SimpleNamespace(name="postgresql"))
+        self.batches: list[int] = []
+        self.locked: list[list[str]] = []
+        self.commits = 0
+
+    def execute(self, stmt, params=None):
+        # Only product batches and key locks are recorded; lookups find nothing stored.
+        if params is None:
+            return EmptyResult()
+        if isinstance(params, dict):
+            self.locked.append(params["keys"])
+            return EmptyResult()
+        if stmt.table.name == Product.__tablename__:
+            self.batches.append(len(params))
+
+    def commit(self):
+        self.commits += 1
+
+
+def _product(n: int) -> dict:
+    return {
+        "sku": f"SKU-{n}",
+        "price": Decimal("1.00"),
+        "quantity": n,
+        "supplier_id": "supplier_a",
+        "status": "active",
+    }
+
+
+@pytest.fixture
+def sqlite_engine():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    return engine
+
+
+@pytest.fixture
+def sqlite_session(sqlite_engine):
+    with Session(sqlite_engine) as session:
+        yield session
+
+
+def _count_statements(engine) -> list[str]:
+    statements: list[str] = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+    return statements
+
+
+def test_batch_size_is_capped_by_bind_parameter_limit():
+    columns = len(Product.__table__.columns)
+    assert _batch_size_for(Product.__table__, 0) == POSTGRES_MAX_BIND_PARAMS // columns
+    assert _batch_size_for(Product.__table__, 10**6) == POSTGRES_MAX_BIND_PARAMS // columns
+    assert _batch_size_for(Product.__table__, 500) == 500
+
+
+def test_postgres_upsert_commits_per_batch():
+    session = RecordingPostgresSession()
+
+    written = upsert_products(session, (_product(n) for n in range(5)), batch_size=2, commit_mode="batch")
+
+    assert written == 5
+    assert session.batches == [2, 2, 1]
+    assert session.commits == 3
+
+
+def test_postgres_upsert_commits_once_per_run():
+    session = RecordingPostgresSession()
+
+    written = upsert_products(session, [_product(n) for n in range(5)], batch_size=2, commit_mode="run")
+
+    assert written == 5
+    assert session.commits == 1
+
+
+def test_postgres_upsert_leaves_commit_to_caller():
+    session = RecordingPostgresSession()
+
+    written = upsert_products(session, [_product(n) for n in range(5)], batch_size=2, commit_mode=CALLER_COMMIT)
+
+    assert written == 5
+    assert session.commits == 0
+
+
+def test_postgres_upsert_sends_one_row_per_key_in_each_batch():
+    session = RecordingPostgresSession()
+    rows = [_product(1), _product(2), {**_product(1), "quantity": 9}, _product(3)]
+
+    written = upsert_products(session, rows, batch_size=3, commit_mode="run")
+
+    assert written == 3
+    assert session.batches == [2, 1]
+
+
+def test_postgres_upsert_rejects_unknown_commit_mode():
+    with pytest.raises(ValueError, match="commit_mode"):
+        upsert_products(RecordingPostgresSession(), [_product(1)], commit_mode="never")
+
+
+def test_fallback_upsert_products_updates_existing_rows(sqlite_session):
+    upsert_products(sqlite_session, [_product(1), _product(2)])
+    upsert_products(sqlite_session, [{**_product(1), "quantity": 99, "status": "inactive"}])
+
+    rows = sqlite_session.execute(select(Product).order_by(Product.sku)).scalars().all()
+    assert [(row.sku, row.quantity, row.status) for row in rows] == [
+        ("SKU-1", 99, "inactive"),
+        ("SKU-2", 2, "active"),
+    ]
+
+
+def test_fallback_upsert_orders_updates_existing_rows(sqlite_session):
+    order = {
+        "order_id": "ORD-1",
+        "sku": "SKU-1",
+        "quantity": 1,
+        "supplier_id": "supplier_a",
+        "status": "pending",
+        "price": None,
+    }
+    upsert_orders(sqlite_session, [order])
+    upsert_orders(sqlite_session, [{**order, "status": "shipped", "price": Decimal("5.00")}])
+
+    rows = sqlite_session.execute(select(Order)).scalars().all()
+    assert len(rows) == 1
+    assert rows[0].status == "shipped"
+    assert rows[0].price == Decimal("5.00")
+
+
+def test_sqlite_upsert_is_set_based_and_keeps_last_duplicate(sqlite_engine, sqlite_session):
+    statements = _count_statements(sqlite_engine)
+    rows = [_product(n) for n in range(200)] + [{**_product(7), "quantity": 700}]
+
+    assert upsert_products(sqlite_session, rows) == 200
+
+    # The only reads are one digest lookup and one inventory lookup for the batch.
+    selects = [statement for statement in statements if statement.lstrip().upper().startswith("SELECT")]
+    assert len(selects) == 2
+    stored = sqlite_session.execute(select(Product).where(Product.sku == "SKU-7")).scalar_one()
+    assert stored.quantity == 700
+
+
+def test_sqlite_upsert_bumps_updated_at(sqlite_session):
+    upsert_products(sqlite_session, [_product(1)])
+    first = sqlite_session.execute(select(Product.updated_at)).scalar_one()
+
+    upsert_products(sqlite_session, [{**_product(1), "quantity": 5}])
+
+    assert sqlite_session.execute(select(Product.updated_at)).scalar_one() > first
+
+
+def test_prefetch_upsert_uses_one_lookup_per_batch(sqlite_engine, sqlite_session):
+    upsert_products(sqlite_session, [_product(n) for n in range(3)])
+    statements = _count_statements(sqlite_engine)
+
+    rows = [{**_product(n), "quantity": 50 + n} for n in range(6)]
+    written = _prefetch_upsert(sqlite_session, Product, PRODUCT_KEY, PRODUCT_UPDATE_COLUMNS, rows, 3, "run")
+
+    selects = [statement for statement in statements if statement.lstrip().upper().startswith("SELECT")]
+    assert written == 6
+    assert len(selects) == 2
+    stored = sqlite_session.execute(select(Product.sku, Product.quantity).order_by(Product.sku)).all()
+    assert [quantity for _, quantity in stored] == [50, 51, 52, 53, 54, 55]
+
+
+def test_prefetch_upsert_orders_by_order_id(sqlite_session):
+    order = {
+        "order_id": "ORD-1",
+        "sku": "SKU-1",
+        "quantity": 1,
+        "supplier_id": "supplier_a",
+        "status": "pending",
+        "price": None,
+    }
+    _prefetch_upsert(sqlite_session, Order, ORDER_KEY, ORDER_UPDATE_COLUMNS, [order], None, "batch")
+    _prefetch_upsert(sqlite_session, Order, ORDER_KEY, ORDER_UPDATE_COLUMNS, [{**order, "status": "shipped"}], None, "batch")
+
+    assert sqlite_session.execute(select(Order.status)).scalars().all() == ["shipped"]
+
+
+def _summary(session, sku: str) -> tuple[int, int, int] | None:
+    row = get_inventory(session, sku)
+    return None if row is None else (row.total_quantity, row.available_quantity, row.supplier_count)
+
+
+def test_inventory_summary_tracks_new_suppliers_and_changes(sqlite_session):
+    upsert_products(sqlite_session, [_product(1), {**_product(1), "supplier_id": "supplier_b", "quantity": 4}])
+    assert _summary(sqlite_session, "SKU-1") == (5, 5, 2)
+
+    upsert_products(sqlite_session, [{**_product(1), "quantity": 10, "status": "inactive"}])
+    assert _summary(sqlite_session, "SKU-1") == (14, 4, 2)
+
+    upsert_products(sqlite_session, [{**_product(1), "quantity": 10, "status": "active"}])
+    assert _summary(sqlite_session, "SKU-1") == (14, 14, 2)
+
+
+def test_inventory_summary_counts_last_duplicate_in_batch(sqlite_session):
+    upsert_products(sqlite_session, [_product(3), {**_product(3), "quantity": 8}])
+
+    assert _summary(sqlite_session, "SKU-3") == (8, 8, 1)
+
+
+def test_inventory_summary_fallback_matches_native_path(sqlite_session):
+    rows = [_product(1), {**_product(1), "supplier_id": "supplier_b", "status": "inactive"}]
+    upsert_products(sqlite_session, rows)
+    native = _summary(sqlite_session, "SKU-1")
+
+    sqlite_session.execute(InventorySummary.__table__.delete())
+    sqlite_session.execute(Product.__table__.delete())
+    _prefetch_upsert(
+        sqlite_session, Product, PRODUCT_KEY, PRODUCT_UPDATE_COLUMNS, rows, None, "run", prepare=_apply_inventory_deltas
+    )
+
+    assert _summary(sqlite_session, "SKU-1") == native == (2, 1, 2)
+
+
+def test_rebuild_inventory_summary_recomputes_from_products(sqlite_session):
+    upsert_products(sqlite_session, [_product(1), {**_product(1), "supplier_id": "supplier_b", "status": "inactive"}])
+    sqlite_session.execute(InventorySummary.__table__.update().values(total_quantity=999))
+    sqlite_session.commit()
+
+    assert rebuild_inventory_summary(sqlite_session) == 1
+    assert _summary(sqlite_session, "SKU-1") == (2, 1, 2)
+
+
+def test_row_digest_normalizes_equivalent_prices():
+    columns = ("sku", "price", "quantity")
+    base = {"sku": "SKU-1", "price": Decimal("10.50"), "quantity": 5}
+
+    assert row_digest({**base, "price": "10.5"}, columns) == row_digest(base, columns)
+    assert row_digest({**base, "price": 10.5, "quantity": "5"}, columns) == row_digest(base, columns)
+    assert row_digest({**base, "price": Decimal("10.51")}, columns) != row_digest(base, columns)
+
+
+def test_upsert_skips_rows_whose_content_is_unchanged(sqlite_session):
+    upsert_products(sqlite_session, [_product(1), _product(2)])
+
+    assert upsert_products(sqlite_session, [_product(1), {**_product(2), "quantity": 9}]) == 1
+    assert upsert_products(sqlite_session, [{**_product(1), "price": "1.0"}]) == 0
+
+
+def test_upsert_keeps_last_duplicate_when_it_matches_the_stored_row(sqlite_session):
+    upsert_products(sqlite_session, [{**_product(1), "quantity": 5}])
+
+    assert upsert_products(sqlite_session, [{**_product(1), "quantity": 9}, {**_product(1), "quantity": 5}]) == 0
+    assert sqlite_session.execute(select(Product.quantity)).scalar_one() == 5
+    assert _summary(sqlite_session, "SKU-1") == (5, 5, 1)
+
+
+def test_postgres_upsert_locks_product_keys_before_reading_them():
+    session = RecordingPostgresSession()
+
+    upsert_products(session, [_product(1), _product(2)], commit_mode="run")
+
+    assert session.locked == [[product_lock_key("SKU-1", "supplier_a"), product_lock_key("SKU-2", "supplier_a")]]
+
+
+def test_partitioned_order_upsert_locks_order_ids_before_reading_them(monkeypatch):
+    monkeypatch.setattr(settings, "orders_partitioned", True)
+    session = RecordingPostgresSession()
+    order = {"order_id": "ORD-1", "sku": "SKU-1", "quantity": 1, "supplier_id": "s", "status": "pending", "price": None}
+
+    upsert_orders(session, [order, {**order, "order_id": "ORD-2"}, {**order, "status": "shipped"}], commit_mode="run")
+
+    assert session.locked == [["ORD-1", "ORD-2"]]
@@ -1,6 +1,11 @@
+import threading
+import time
+from collections import Counter
 from pathlib import Path
 
-from app.scheduler.jobs import _resolve_feed_metadata
+from app.config import settings
+from app.models.pydantic_models import RunSummary
+from app.scheduler.jobs import SupplierSyncScheduler, _resolve_feed_metadata
 
 
 def test_resolve_feed_metadata_preserves_supplier_with_underscores():
@@ -16,4 +21,230 @@ def test_resolve_feed_metadata_orders_suffix():
 
 
 def test_resolve_feed_metadata_invalid_name_returns_none():
-    assert _resolve_feed_metadata(Path("unknownfile.csv")) is None
\ No newline at end of file
+    assert _resolve_feed_metadata(Path("unknownfile.csv")) is None
+
+
+def test_resolve_feed_metadata_strips_compression_suffix():
+    assert _resolve_feed_metadata(Path("acme_products.csv.gz")) == ("acme", "product")
+    assert _resolve_feed_metadata(Path("acme_orders.ndjson.zst")) == ("acme", "order")
+
+
+class StubCache:
+    def __init__(self, cached_names: set[str] | None = None, unindexed_names: set[str] | None = None):
+        self.cached_names = cached_names or set()
+        self.unindexed_names = unindexed_names or set()
+        self.lookups: list[list[str]] = []
+
+    def indexed_hash(self, file_path: Path) -> str | None:
+        return None if file_path.name in self.unindexed_names else f"hash-{file_path.name}"
+
+    def build_key(self, supplier_id: str, record_type: str, file_path: Path, file_hash: str) -> str:
+        return f"{supplier_id}:{record_type}:{file_path.name}:{file_hash}"
+
+    def exists_many(self, keys: list[str]) -> dict[str, bool]:
+        self.lookups.append(keys)
+        return {key: key.split(":")[2] in self.cached_names for key in keys}
+
+
+def _write_feed(directory: Path, name: str, rows: int) -> Path:
+    file_path = directory / name
+    file_path.write_text("sku,price,quantity,status\n" + "SKU-1,1.00,1,active\n" * rows, encoding="utf-8")
+    return file_path
+
+
+def _fake_summary(processed: int) -> RunSummary:
+    return RunSummary(
+        run_id="run",
+        status="completed",
+        processed=processed,
+        inserted=processed,
+        rejected=0,
+        skipped_cached=False,
+        errors=[],
+    )
+
+
+def test_run_sync_orders_largest_first_and_reports_per_file(monkeypatch, tmp_path: Path):
+    _write_feed(tmp_path, "small_products.csv", 1)
+    _write_feed(tmp_path, "large_products.csv", 50)
+    _write_feed(tmp_path, "medium_orders.csv", 10)
+    (tmp_path / "unknownfile.csv").write_text("sku\n", encoding="utf-8")
+    calls: list[str] = []
+
+    def fake_run_pipeline(file_path, supplier_id, record_type, cache):
+        calls.append(Path(file_path).name)
+        if supplier_id == "medium":
+            raise RuntimeError("boom")
+        return _fake_summary(3)
+
+    monkeypatch.setattr("app.scheduler.jobs.INCOMING_DIR", tmp_path)
+    monkeypatch.setattr("app.scheduler.jobs.run_pipeline", fake_run_pipeline)
+    monkeypatch.setattr(settings, "scheduler_workers", 1)
+
+    results = SupplierSyncScheduler(cache=StubCache())._run_sync()
+
+    assert calls == ["large_products.csv", "medium_orders.csv", "small_products.csv"]
+    by_name = {Path(result["file_path"]).name: result for result in results}
+    assert by_name["large_products.csv"]["status"] == "completed"
+    assert by_name["large_products.csv"]["processed"] == 3
+    assert by_name["medium_orders.csv"]["status"] == "failed"
+    assert all("duration_ms" in result for result in results)
+
+
+def test_run_sync_caps_concurrency_per_supplier(monkeypatch, tmp_path: Path):
+    for name in ("acme_products.csv", "acme_orders.csv", "beta_products.csv", "beta_orders.csv"):
+        _write_feed(tmp_path, name, 1)
+    lock = threading.Lock()
+    running: Counter[str] = Counter()
+    peak: Counter[str] = Counter()
+    overall_peak = [0]
+
+    def fake_run_pipeline(file_path, supplier_id, record_type, cache):
+        with lock:
+            running[supplier_id] += 1
+            peak[supplier_id] = max(peak[supplier_id], running[supplier_id])
+            overall_peak[0] = max(overall_peak[0], sum(running.values()))
+        time.sleep(0.05)
+        with lock:
+            running[supplier_id] -= 1
+        return _fake_summary(1)
+
+    monkeypatch.setattr("app.scheduler.jobs.INCOMING_DIR", tmp_path)
+    monkeypatch.setattr("app.scheduler.jobs.run_pipeline", fake_run_pipeline)
+    monkeypatch.setattr(settings, "scheduler_workers", 4)
+    monkeypatch.setattr(settings, "scheduler_per_supplier_limit", 1)
+
+    results = SupplierSyncScheduler(cache=StubCache())._run_sync()
+
+    assert len(results) == 4
+    assert peak == Counter({"acme": 1, "beta": 1})
+    assert overall_peak[0] == 2
+
+
+def test_concurrent_syncs_share_the_per_supplier_limit(monkeypatch, tmp_path: Path):
+    feeds = [_write_feed(tmp_path, name, 1) for name in ("acme_products.csv", "acme_orders.csv")]
+    lock = threading.Lock()
+    running: Counter[str] = Counter()
+    peak: Counter[str] = Counter()
+
+    def fake_run_pipeline(file_path, supplier_id, record_type, cache):
+        with lock:
+            running[supplier_id] += 1
+            peak[supplier_id] = max(peak[supplier_id], running[supplier_id])
+        time.sleep(0.05)
+        with lock:
+            running[supplier_id] -= 1
+        return _fake_summary(1)
+
+    monkeypatch.setattr("app.scheduler.jobs.run_pipeline", fake_run_pipeline)
+    monkeypatch.setattr(settings, "scheduler_workers", 4)
+    monkeypatch.setattr(settings, "scheduler_per_supplier_limit", 1)
+    scheduler = SupplierSyncScheduler(cache=StubCache(unindexed_names={feed.name for feed in feeds}))
+
+    # A cron sweep and a watcher batch for the same supplier dispatching at once.
+    syncs = [threading.Thread(target=scheduler._sync_paths, args=([feed], "watch")) for feed in feeds]
+    for sync in syncs:
+        sync.start()
+    for sync in syncs:
+        sync.join()
+
+    assert peak == Counter({"acme": 1})
+    assert scheduler._running == 0
+
+
+def test_run_sync_prechecks_cache_in_one_lookup(monkeypatch, tmp_path: Path):
+    _write_feed(tmp_path, "acme_products.csv", 2)
+    _write_feed(tmp_path, "beta_products.csv", 2)
+    _write_feed(tmp_path, "gamma_orders.csv", 2)
+    calls: list[str] = []
+
+    def fake_run_pipeline(file_path, supplier_id, record_type, cache):
+        calls.append(Path(file_path).name)
+        return _fake_summary(2)
+
+    monkeypatch.setattr("app.scheduler.jobs.INCOMING_DIR", tmp_path)
+    monkeypatch.setattr("app.scheduler.jobs.run_pipeline", fake_run_pipeline)
+    cache = StubCache(cached_names={"beta_products.csv"})
+
+    results = SupplierSyncScheduler(cache=cache)._run_sync()
+
+    assert len(cache.lookups) == 1 and len(cache.lookups[0]) == 3
+    assert sorted(calls) == ["acme_products.csv", "gamma_orders.csv"]
+    by_name = {Path(result["file_path"]).name: result for result in results}
+    assert by_name["beta_products.csv"]["skipped_cached"] is True
+    assert by_name["acme_products.csv"]["status"] == "completed"
+
+
+def test_precheck_leaves_unindexed_files_to_the_workers(monkeypatch, tmp_path: Path):
+    _write_feed(tmp_path, "acme_products.csv", 2)
+    _write_feed(tmp_path, "beta_products.csv", 2)
+    calls: list[str] = []
+
+    def fake_run_pipeline(file_path, supplier_id, record_type, cache):
+        calls.append(Path(file_path).name)
+        return _fake_summary(2)
+
+    monkeypatch.setattr("app.scheduler.jobs.INCOMING_DIR", tmp_path)
+    monkeypatch.setattr("app.scheduler.jobs.run_pipeline", fake_run_pipeline)
+    cache = StubCache(cached_names={"acme_products.csv", "beta_products.csv"}, unindexed_names={"beta_products.csv"})
+
+    results = SupplierSyncScheduler(cache=cache)._run_sync()
+
+    assert [len(keys) for keys in cache.lookups] == [1]
+    assert calls == ["beta_products.csv"]
+    assert {Path(result["file_path"]).name: result["skipped_cached"] for result in results} == {
+        "acme_products.csv": True,
+        "beta_products.csv": False,
+    }
+
+
+def test_sync_paths_skips_files_already_being_ingested(monkeypatch, tmp_path: Path):
+    busy = _write_feed(tmp_path, "acme_products.csv", 1)
+    fresh = _write_feed(tmp_path, "beta_products.csv", 1)
+    calls: list[str] = []
+
+    def fake_run_pipeline(file_path, supplier_id, record_type, cache):
+        calls.append(Path(file_path).name)
+        return _fake_summary(1)
+
+    monkeypatch.setattr("app.scheduler.jobs.run_pipeline", fake_run_pipeline)
+    scheduler = SupplierSyncScheduler(cache=StubCache())
+    scheduler._claim([(busy, "acme", "product")])
+
+    results = scheduler._sync_paths([busy, fresh], trigger="watch")
+
+    assert calls == ["beta_products.csv"]
+    assert [Path(result["file_path"]).name for result in results] == ["beta_products.csv"]
+    assert scheduler._active_files == {busy}
+
+
+def test_sync_paths_reruns_files_that_changed_during_their_ingest(monkeypatch, tmp_path: Path):
+    feed = _write_feed(tmp_path, "acme_products.csv", 1)
+    scheduler = SupplierSyncScheduler(cache=StubCache(unindexed_names={"acme_products.csv"}))
+    nested: list[list[dict]] = []
+    queued: list[list] = []
+
+    def fake_run_pipeline(file_path, supplier_id, record_type, cache):
+        if not nested:
+            # A watcher batch for the same file lands while it is still being ingested.
+            nested.append(scheduler._sync_paths([feed], trigger="watch"))
+        return _fake_summary(1)
+
+    monkeypatch.setattr("app.scheduler.jobs.run_pipeline", fake_run_pipeline)
+    monkeypatch.setattr(scheduler.scheduler, "add_job", lambda func, args: queued.append(args))
+
+    scheduler._sync_paths([feed], trigger="watch")
+
+    assert nested == [[]]
+    assert queued == [[[feed], "watch"]]
+    assert scheduler._active_files == set() and scheduler._dirty_files == set()
+
+
+def test_candidate_feeds_skip_zst_without_zstandard(monkeypatch, tmp_path: Path):
+    monkeypatch.setattr("app.ingestion.loaders.zstandard", None)
+    paths = [tmp_path / "acme_products.csv.zst", tmp_path / "acme_orders.csv.gz"]
+
+    feeds, skipped = SupplierSyncScheduler(cache=StubCache())._candidate_feeds(paths)
+
+    assert feeds == [(tmp_path / "acme_orders.csv.gz", "acme", "order")]
+    assert skipped == 1
@@ -0,0 +1,23 @@
+from decimal import Decimal
+
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.orm import Session
+
+from app.db.base import Base
+from app.db.repository import filter_changed_rows
+from app.db.schema import add_missing_columns
+
+
+def test_add_missing_columns_upgrades_tables_created_before_content_hash():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    with engine.begin() as connection:
+        connection.execute(text("ALTER TABLE products DROP COLUMN content_hash"))
+
+    assert add_missing_columns(engine) == ["products.content_hash"]
+    assert "content_hash" in {column["name"] for column in inspect(engine).get_columns("products")}
+    assert add_missing_columns(engine) == []
+
+    row = {"sku": "SKU-1", "price": Decimal("1.00"), "quantity": 1, "supplier_id": "acme", "status": "active"}
+    with Session(engine) as session:
+        assert filter_changed_rows(session, "product", [row]) == ([row], 0)
@@ -0,0 +1,159 @@
+import gzip
+import hashlib
+import threading
+from contextlib import contextmanager
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+
+from app.api import routes
+from app.db.base import Base
+from app.db.models import Product
+from app.ingestion.upload import UploadBodyStream, UploadInterruptedError, run_upload_pipeline
+from app.main import app
+
+
+CSV_BODY = b"sku,price,quantity,status\nSKU-1,10.50,5,active\nSKU-2,3.00,1,inactive\nbad sku!,1.00,1,active\n"
+
+
+class FakeCache:
+    def __init__(self):
+        self.keys: set[str] = set()
+
+    def build_upload_key(self, supplier_id: str, record_type: str, file_hash: str) -> str:
+        return f"ingest:{supplier_id}:{record_type}:upload:{file_hash}"
+
+    def exists(self, key: str) -> bool:
+        return key in self.keys
+
+    def set(self, key: str) -> None:
+        self.keys.add(key)
+
+
+@pytest.fixture
+def engine(monkeypatch):
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+
+    @contextmanager
+    def sqlite_session():
+        with Session(engine) as session:
+            yield session
+
+    monkeypatch.setattr("app.ingestion.upload.get_db_session", sqlite_session)
+    return engine
+
+
+def _feed_in_thread(body: UploadBodyStream, payload: bytes, piece: int = 7) -> threading.Thread:
+    def produce():
+        for offset in range(0, len(payload), piece):
+            if not body.feed(payload[offset : offset + piece]):
+                return
+        body.finish()
+
+    thread = threading.Thread(target=produce)
+    thread.start()
+    return thread
+
+
+def test_body_stream_hashes_every_byte_in_order():
+    body = UploadBodyStream(max_chunks=2)
+    producer = _feed_in_thread(body, CSV_BODY, piece=3)
+
+    assert body.read(10) == CSV_BODY[:3]
+    assert body.drain() == hashlib.sha256(CSV_BODY).hexdigest()
+    producer.join()
+    assert body.size == len(CSV_BODY)
+
+
+def test_body_stream_raises_when_upload_is_interrupted():
+    body = UploadBodyStream()
+    body.feed(b"sku,price\n")
+    body.finish(failed=True)
+
+    assert body.read(100) == b"sku,price\n"
+    with pytest.raises(UploadInterruptedError):
+        body.read(100)
+
+
+@pytest.mark.parametrize("filename, payload", [("feed.csv", CSV_BODY), ("feed.csv.gz", gzip.compress(CSV_BODY))])
+def test_upload_pipeline_ingests_stream_and_caches_digest(engine, filename: str, payload: bytes):
+    cache = FakeCache()
+    body = UploadBodyStream(max_chunks=1)
+    producer = _feed_in_thread(body, payload)
+
+    summary = run_upload_pipeline(body, filename, "supplier_a", "product", cache, chunk_size=2)
+    producer.join()
+
+    assert (summary.processed, summary.inserted, summary.rejected) == (3, 2, 1)
+    assert cache.keys == {f"ingest:supplier_a:product:upload:{hashlib.sha256(payload).hexdigest()}"}
+    with Session(engine) as session:
+        assert session.execute(select(Product.sku).order_by(Product.sku)).scalars().all() == ["SKU-1", "SKU-2"]
+
+
+def test_upload_pipeline_opens_a_session_only_after_the_whole_body(engine, monkeypatch):
+    body = UploadBodyStream(max_chunks=1)
+    sizes: list[int] = []
+
+    @contextmanager
+    def sqlite_session():
+        sizes.append(body.size)
+        with Session(engine) as session:
+            yield session
+
+    monkeypatch.setattr("app.ingestion.upload.get_db_session", sqlite_session)
+    producer = _feed_in_thread(body, CSV_BODY)
+
+    summary = run_upload_pipeline(body, "feed.csv", "supplier_a", "product", FakeCache(), chunk_size=1)
+    producer.join()
+
+    assert sizes == [len(CSV_BODY)]
+    assert summary.inserted == 2
+
+
+def test_upload_pipeline_skips_declared_cached_digest_without_reading(engine):
+    cache = FakeCache()
+    digest = hashlib.sha256(CSV_BODY).hexdigest()
+    cache.keys.add(f"ingest:supplier_a:product:upload:{digest}")
+    body = UploadBodyStream()
+
+    summary = run_upload_pipeline(body, "feed.csv", "supplier_a", "product", cache, expected_sha256=digest)
+
+    assert summary.skipped_cached
+    assert body.size == 0
+    assert body.feed(CSV_BODY) is False
+
+
+def test_upload_endpoint_streams_request_body(engine):
+    cache = FakeCache()
+    routes.cache_instance = cache
+
+    response = TestClient(app).post(
+        "/ingest/upload",
+        params={"filename": "feed.csv", "supplier_id": "supplier_a", "record_type": "product"},
+        content=iter([CSV_BODY[:20], CSV_BODY[20:]]),
+    )
+
+    assert response.status_code == 200
+    assert response.json()["inserted"] == 2
+    assert len(cache.keys) == 1
+
+
+def test_upload_endpoint_rejects_digest_mismatch_and_bad_format(engine):
+    # The digest is checked before any row is written, so a mismatch leaves the database untouched.
+    routes.cache_instance = FakeCache()
+    client = TestClient(app)
+    params = {"filename": "feed.csv", "supplier_id": "supplier_a", "record_type": "product"}
+
+    mismatch = client.post("/ingest/upload", params={**params, "sha256": "0" * 64}, content=CSV_BODY)
+    unsupported = client.post("/ingest/upload", params={**params, "filename": "feed.xml"}, content=b"<x/>")
+
+    assert mismatch.status_code == 400
+    assert mismatch.json()["detail"] == "Upload does not match the declared sha256"
+    with Session(engine) as session:
+        assert session.execute(select(Product)).first() is None
+    assert unsupported.status_code == 400
+    assert unsupported.json()["detail"] == "Unsupported file type: .xml"
@@ -1,6 +1,9 @@
-﻿import pytest
+﻿from decimal import Decimal
+
+import pytest
 from pydantic import ValidationError
 
+from app.ingestion.validation import validate_rows
 from app.models.pydantic_models import OrderIn, ProductIn
 
 
@@ -51,3 +54,43 @@ def test_order_invalid_status_rejected():
             supplier_id="supplier_a",
             status="unknown",
         )
+
+
+def _reference_validate(rows, model):
+    valid, errors = [], []
+    for index, row in enumerate(rows, start=1):
+        try:
+            valid.append(model(**row).model_dump())
+        except ValidationError as exc:
+            errors.append({"index": index, "error": str(exc)})
+    return valid, errors
+
+
+def test_batch_validation_matches_model_validation_for_products():
+    rows = [
+        {"sku": " SKU-1 ", "price": Decimal("1.50"), "quantity": 3, "supplier_id": "s", "status": "active"},
+        {"sku": "bad sku", "price": Decimal("1.50"), "quantity": 3, "supplier_id": "s", "status": "active"},
+        {"sku": "SKU-3", "price": None, "quantity": "x", "supplier_id": "s", "status": "sold"},
+        {"sku": "SKU-4", "price": "2", "quantity": "4", "supplier_id": "s", "status": "backorder"},
+    ]
+
+    assert validate_rows(rows, "product") == _reference_validate(rows, ProductIn)
+
+
+def test_batch_validation_matches_model_validation_for_orders():
+    rows = [
+        {"order_id": "ORD-1", "sku": "SKU-1", "quantity": 1, "supplier_id": "s", "status": "pending", "price": None},
+        {"order_id": "ORD-2", "sku": "SKU-2", "quantity": 1, "supplier_id": "s", "status": "pending", "price": Decimal("-1")},
+        {"order_id": "", "sku": "SKU-3", "quantity": 0, "supplier_id": "s", "status": "lost", "price": None},
+        {"order_id": "ORD-4", "sku": "SKU-4", "quantity": 2, "supplier_id": "s", "status": "shipped"},
+    ]
+
+    assert validate_rows(rows, "order") == _reference_validate(rows, OrderIn)
+
+
+def test_batch_validation_offsets_error_indices():
+    rows = [{"sku": "x", "price": "1", "quantity": 1, "supplier_id": "s", "status": "active"}]
+
+    _, errors = validate_rows(rows, "product", start_index=41)
+
+    assert [error["index"] for error in errors] == [41]
@@ -0,0 +1,62 @@
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+from app.scheduler.watcher import DirectoryWatcher, _load_libc
+
+
+class Collector:
+    def __init__(self):
+        self.batches: list[list[Path]] = []
+        self.event = threading.Event()
+
+    def __call__(self, paths: list[Path]) -> None:
+        self.batches.append(paths)
+        self.event.set()
+
+
+def _wait_for(collector: Collector, timeout: float = 5.0) -> list[Path]:
+    assert collector.event.wait(timeout), "watcher did not report a ready file"
+    return collector.batches[0]
+
+
+@pytest.mark.parametrize("backend", ["poll", "inotify"])
+def test_watcher_reports_new_file_after_it_settles(tmp_path: Path, backend: str):
+    if backend == "inotify" and _load_libc() is None:
+        pytest.skip("inotify is not available")
+    (tmp_path / "existing_products.csv").write_text("sku\n", encoding="utf-8")
+    collector = Collector()
+    watcher = DirectoryWatcher(tmp_path, collector, debounce_seconds=0.2, poll_interval=0.05, backend=backend)
+    watcher.start()
+    try:
+        assert watcher.active_backend == backend
+        (tmp_path / "acme_products.csv").write_text("sku\nSKU-1\n", encoding="utf-8")
+        assert _wait_for(collector) == [tmp_path / "acme_products.csv"]
+    finally:
+        watcher.stop()
+
+
+def test_watcher_waits_while_file_is_still_growing(tmp_path: Path):
+    collector = Collector()
+    watcher = DirectoryWatcher(tmp_path, collector, debounce_seconds=0.3, poll_interval=0.05, backend="poll")
+    watcher.start()
+    try:
+        path = tmp_path / "acme_products.csv"
+        with path.open("w", encoding="utf-8") as file:
+            for _ in range(6):
+                file.write("SKU-1\n")
+                file.flush()
+                time.sleep(0.1)
+            written_at = time.monotonic()
+        _wait_for(collector)
+        assert time.monotonic() - written_at >= 0.2
+        assert collector.batches == [[path]]
+    finally:
+        watcher.stop()
+
+
+def test_watcher_rejects_unknown_backend(tmp_path: Path):
+    with pytest.raises(ValueError):
+        DirectoryWatcher(tmp_path, Collector(), backend="fsevents")